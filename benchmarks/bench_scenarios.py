@@ -0,0 +1,240 @@
+"""
+Benchmarks of the ScenarioBuilder hot paths: create, create_streaming, cleanup_collections,
+load_templates_from_path and consecutive test setups.
+
+Run against the in-process memory backend (default) or a local mongod:
+
+    uv run python benchmarks/bench_scenarios.py
+    uv run python benchmarks/bench_scenarios.py --backend mongo --db-url mongodb://127.0.0.1:27017
+    uv run python benchmarks/bench_scenarios.py --full  # up to 1M documents
+
+Results are printed as docs/sec and per-test overhead, and compared with the baseline
+of the same backend in benchmarks/baseline.json. The script exits with status 1 when a
+case is slower than its baseline by more than the tolerance. Baselines depend on the
+machine: refresh them with --update-baseline after an intended change.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from pymongo import MongoClient
+
+from pytest_scenarios.memory import MemoryClient
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.template_loader import load_templates_from_path
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DB_NAME = "pytest_scenarios_bench"
+
+FLAT_TEMPLATE = {f"field_{i}": f"value_{i}" for i in range(10)}
+NESTED_TEMPLATE = {
+    "name": "nested",
+    "level_1": {
+        "level_2": {"level_3": {"level_4": dict(FLAT_TEMPLATE)}, "tags": ["a", "b"]},
+        "items": [{"sku": f"sku_{i}", "quantity": i} for i in range(5)],
+    },
+}
+# Many large defaults, of which documents only override a top-level field.
+WIDE_TEMPLATE = {
+    **FLAT_TEMPLATE,
+    **{f"section_{i}": {"values": list(range(20)), "nested": NESTED_TEMPLATE} for i in range(20)},
+}
+TEMPLATES = {"flat": FLAT_TEMPLATE, "nested": NESTED_TEMPLATE, "wide": WIDE_TEMPLATE}
+
+
+@dataclass
+class Result:
+    """Outcome of one benchmark case."""
+
+    name: str
+    metric: str
+    value: float
+
+    @property
+    def higher_is_better(self) -> bool:
+        return self.metric != "seconds_per_test"
+
+    def format(self) -> str:
+        if self.higher_is_better:
+            return f"{self.value:,.0f} {self.metric.replace('_per_sec', '')}/sec"
+        return f"{self.value * 1000:.3f} ms/test"
+
+
+def _best_of(repeat: int, setup: Callable[[], Any], run: Callable[[Any], None]) -> float:
+    """Return the fastest of several timed runs, each after an untimed setup."""
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _scenario(collections: int, docs: int, shape: str) -> dict[str, list[dict]]:
+    per_collection = max(1, docs // collections)
+    override = (
+        {"level_1.level_2.level_3.level_4.field_0": 0} if shape == "nested" else {"field_0": 0}
+    )
+    return {
+        f"coll_{c}": [dict(override) for _ in range(per_collection)] for c in range(collections)
+    }
+
+
+def _templates(collections: int, shape: str) -> dict[str, dict]:
+    return {f"coll_{c}": TEMPLATES[shape] for c in range(collections)}
+
+
+def bench_create(db, docs: int, collections: int, shape: str, repeat: int) -> Result:
+    builder = ScenarioBuilder(db, _templates(collections, shape))
+
+    def setup():
+        builder.cleanup_collections()
+        return _scenario(collections, docs, shape)
+
+    seconds = _best_of(repeat, setup, builder.create)
+    builder.cleanup_collections()
+    return Result(f"create/{docs}docs/{collections}colls/{shape}", "docs_per_sec", docs / seconds)
+
+
+def bench_create_streaming(db, docs: int, repeat: int) -> Result:
+    builder = ScenarioBuilder(db, _templates(1, "flat"))
+
+    def setup():
+        builder.cleanup_collections()
+        return {"coll_0": builder.many(docs, field_0=0)}
+
+    seconds = _best_of(repeat, setup, builder.create_streaming)
+    builder.cleanup_collections()
+    return Result(f"create_streaming/{docs}docs", "docs_per_sec", docs / seconds)
+
+
+def bench_cleanup(db, docs: int, collections: int, repeat: int) -> Result:
+    builder = ScenarioBuilder(db, _templates(collections, "flat"))
+
+    def setup():
+        builder.cleanup_collections()
+        builder.create(_scenario(collections, docs, "flat"))
+
+    seconds = _best_of(repeat, setup, lambda _: builder.cleanup_collections())
+    return Result(f"cleanup/{docs}docs/{collections}colls", "docs_per_sec", docs / seconds)
+
+
+def bench_setups(db, tests: int, collections: int, repeat: int) -> Result:
+    """Per-test overhead of the autouse cleanup followed by a small scenario."""
+    builder = ScenarioBuilder(db, _templates(collections, "flat"))
+    scenario = _scenario(collections, collections * 2, "flat")
+
+    def run(_):
+        for _ in range(tests):
+            builder.cleanup_collections()
+            builder.create(scenario)
+
+    seconds = _best_of(repeat, builder.cleanup_collections, run)
+    builder.cleanup_collections()
+    return Result(f"setups/{tests}tests/{collections}colls", "seconds_per_test", seconds / tests)
+
+
+def bench_load_templates(modules: int, repeat: int, cached: bool) -> Result:
+    with tempfile.TemporaryDirectory() as templates_dir, tempfile.TemporaryDirectory() as cache:
+        for i in range(modules):
+            with open(os.path.join(templates_dir, f"coll_{i}.py"), "w") as module:
+                module.write(f"TEMPLATE = {NESTED_TEMPLATE!r}\n")
+        cache_dir = cache if cached else None
+        load_templates_from_path(templates_dir, cache_dir=cache_dir)
+        seconds = _best_of(
+            repeat, lambda: None, lambda _: load_templates_from_path(templates_dir, cache_dir)
+        )
+    name = f"load_templates/{modules}modules/{'cached' if cached else 'uncached'}"
+    return Result(name, "modules_per_sec", modules / seconds)
+
+
+def run_benchmarks(db, full: bool) -> list[Result]:
+    doc_counts = [1, 100, 10_000, 100_000] + ([1_000_000] if full else [])
+    results = []
+    for docs in doc_counts:
+        repeat = 5 if docs <= 10_000 else 1
+        for shape in TEMPLATES:
+            # Wide documents are ~10KB each, keep their memory use bounded.
+            if shape != "wide" or docs <= 10_000:
+                results.append(bench_create(db, docs, 1, shape, repeat=repeat))
+        results.append(bench_cleanup(db, docs, 1, repeat=repeat))
+    results.append(bench_create_streaming(db, doc_counts[-1], repeat=1))
+    for collections in (10, 100):
+        results.append(bench_create(db, 10_000, collections, "flat", repeat=3))
+        results.append(bench_cleanup(db, 10_000, collections, repeat=3))
+    for collections in (1, 10):
+        results.append(bench_setups(db, 100, collections, repeat=3))
+    for modules in (10, 100):
+        results.append(bench_load_templates(modules, repeat=3, cached=False))
+        results.append(bench_load_templates(modules, repeat=3, cached=True))
+    return results
+
+
+def compare(results: list[Result], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """Return a description of every result slower than its baseline beyond the tolerance."""
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected is None:
+            continue
+        if result.higher_is_better:
+            regressed = result.value < expected * (1 - tolerance)
+        else:
+            regressed = result.value > expected * (1 + tolerance)
+        if regressed:
+            regressions.append(f"{result.name}: {result.value:.6g} vs baseline {expected:.6g}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--db-url", default="mongodb://127.0.0.1:27017")
+    parser.add_argument("--full", action="store_true", help="Include 1M document cases")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    client = MemoryClient() if args.backend == "memory" else MongoClient(args.db_url)
+    try:
+        results = run_benchmarks(client[DB_NAME], args.full)
+    finally:
+        client.drop_database(DB_NAME)
+        client.close()
+
+    for result in results:
+        print(f"{result.name:<45} {result.format():>22}")
+    values = {result.name: result.value for result in results}
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({args.backend: values}, output, indent=2, sort_keys=True)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+    if args.update_baseline:
+        baselines[args.backend] = {**baselines.get(args.backend, {}), **values}
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        return 0
+
+    regressions = compare(results, baselines.get(args.backend, {}), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
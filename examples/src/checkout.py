@@ -5,9 +5,11 @@ This is a simplified e-commerce checkout system that validates orders,
 checks product availability, and processes payments.
 """
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Literal
 
+from pymongo import UpdateOne
 from pymongo.database import Database
 
 
@@ -65,28 +67,19 @@ class Checkout:
 
         # Step 2: Validate customer
         customer = self.db["customers"].find_one({"customer_id": order["customer_id"]})
-        if not customer:
-            return CheckoutResult(success=False, error="Customer not found")
-
-        if customer.get("status") != "active":
-            return CheckoutResult(
-                success=False, error=f"Customer is not active: {customer.get('status')}"
-            )
+        error = self._customer_error(customer)
+        if error:
+            return CheckoutResult(success=False, error=error)
 
-        # Step 3: Check stock for all items
-        for item in order.get("items", []):
-            product = self.db["products"].find_one({"product_id": item["product_id"]})
-            if not product:
-                return CheckoutResult(
-                    success=False, error=f"Product not found: {item['product_id']}"
-                )
-            if not product.get("in_stock", False):
-                return CheckoutResult(
-                    success=False, error=f"Product out of stock: {item['product_id']}"
-                )
+        # Step 3: Check stock for all items, fetching every product in one query
+        items = order.get("items", [])
+        products = self._find_products(items)
+        error = self._stock_error(items, products)
+        if error:
+            return CheckoutResult(success=False, error=error)
 
         # Step 4: Calculate total (if not pre-calculated)
-        total = self._calculate_total(order)
+        total = self._calculate_total(order, products)
 
         # Step 5: Mark order as completed
         self.db["orders"].update_one(
@@ -95,12 +88,121 @@ class Checkout:
 
         return CheckoutResult(success=True, order_id=order_id)
 
-    def _calculate_total(self, order: dict) -> float:
+    def process_many(self, order_ids: Iterable[str]) -> dict[str, CheckoutResult]:
+        """
+        Process the checkout of many orders at once, e.g. in a batch-settlement job.
+
+        Orders, customers and products are each loaded with a single $in query,
+        every order is validated in memory like in process, and the completed
+        orders are updated with one bulk_write. The number of round-trips no longer
+        grows with the number of orders.
+
+        Args:
+            order_ids: The identifiers of the orders to process
+
+        Returns:
+            The CheckoutResult of each order, by order id
+        """
+        order_ids = list(dict.fromkeys(order_ids))
+        orders = {
+            order["id"]: order for order in self.db["orders"].find({"id": {"$in": order_ids}})
+        }
+        customer_ids = list({order["customer_id"] for order in orders.values()})
+        customers = {
+            customer["customer_id"]: customer
+            for customer in self.db["customers"].find({"customer_id": {"$in": customer_ids}})
+        }
+        products = self._find_products(
+            [item for order in orders.values() for item in order.get("items", [])]
+        )
+
+        results = {}
+        updates = []
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if not order:
+                results[order_id] = CheckoutResult(success=False, error="Order not found")
+                continue
+            items = order.get("items", [])
+            error = self._customer_error(customers.get(order["customer_id"])) or (
+                self._stock_error(items, products)
+            )
+            if error:
+                results[order_id] = CheckoutResult(success=False, error=error)
+                continue
+            total = self._calculate_total(order, products)
+            updates.append(
+                UpdateOne({"id": order_id}, {"$set": {"status": "completed", "total": total}})
+            )
+            results[order_id] = CheckoutResult(success=True, order_id=order_id)
+
+        if updates:
+            self.db["orders"].bulk_write(updates, ordered=False)
+        return results
+
+    def _customer_error(self, customer: dict | None) -> str | None:
+        """
+        Check the customer can check out.
+
+        Args:
+            customer: The customer document, None if it was not found
+
+        Returns:
+            The error message, or None if the customer is active
+        """
+        if not customer:
+            return "Customer not found"
+        if customer.get("status") != "active":
+            return f"Customer is not active: {customer.get('status')}"
+        return None
+
+    def _stock_error(self, items: list[dict], products: dict[str, dict]) -> str | None:
+        """
+        Check every item of an order is in stock.
+
+        Args:
+            items: The order items
+            products: The products of the order items, by product_id
+
+        Returns:
+            The error message of the first unavailable item, or None if all are in stock
+        """
+        for item in items:
+            product = products.get(item["product_id"])
+            if not product:
+                return f"Product not found: {item['product_id']}"
+            if not product.get("in_stock", False):
+                return f"Product out of stock: {item['product_id']}"
+        return None
+
+    def _find_products(self, items: list[dict]) -> dict[str, dict]:
+        """
+        Fetch the products of all order items in a single round-trip.
+
+        One $in query replaces a find_one per item, so the number of
+        queries stays the same however many lines the order has.
+
+        Args:
+            items: The order items
+
+        Returns:
+            The products found, by product_id
+        """
+        product_ids = list({item["product_id"] for item in items})
+        if not product_ids:
+            return {}
+        cursor = self.db["products"].find(
+            {"product_id": {"$in": product_ids}}, batch_size=len(product_ids)
+        )
+        return {product["product_id"]: product for product in cursor}
+
+    def _calculate_total(self, order: dict, products: dict[str, dict]) -> float:
         """
         Calculate the order total from item prices.
 
         Args:
             order: The order document
+            products: The products of the order items, by product_id
 
         Returns:
             The calculated total price
@@ -112,7 +214,7 @@ class Checkout:
         # Otherwise, calculate from items
         total = 0.0
         for item in order.get("items", []):
-            product = self.db["products"].find_one({"product_id": item["product_id"]})
+            product = products.get(item["product_id"])
             if product:
                 quantity = item.get("quantity", 1)
                 total += product.get("price", 0) * quantity
@@ -130,4 +232,3 @@ class Checkout:
         """
         order = self.db["orders"].find_one({"id": order_id})
         return order.get("status") if order else None
-
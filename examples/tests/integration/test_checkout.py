@@ -10,9 +10,12 @@ Key concepts:
     - Tests focus on behavior, not data setup boilerplate
 """
 
+import pytest
+from pymongo import MongoClient, monitoring
 from pymongo.database import Database
 from src.checkout import Checkout
 
+from pytest_scenarios.factories import cycle, seq
 from pytest_scenarios.scenario import ScenarioBuilder
 
 
@@ -232,3 +235,149 @@ class TestScenarioIsolation:
         # The customer from the previous test should not exist
         assert db["customers"].count_documents({}) == 0
         assert db["customers"].find_one({"customer_id": "test_isolation_customer"}) is None
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Records the name of every command sent to the server."""
+
+    def __init__(self):
+        self.commands: list[str] = []
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self.commands.append(event.command_name)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        pass
+
+
+@pytest.fixture
+def command_counter(db_url: str):
+    counter = CommandCounter()
+    with MongoClient(db_url, event_listeners=[counter]) as client:
+        yield counter, client
+
+
+class TestCheckoutRoundTrips:
+    """Tests proving checkout does not issue one query per order item."""
+
+    @pytest.mark.parametrize("item_count", [1, 10, 50])
+    def test_round_trips_do_not_grow_with_items(
+        self, scenario_builder: ScenarioBuilder, db: Database, command_counter, item_count: int
+    ):
+        """
+        Scenario: Orders of 1, 10 and 50 lines are checked out.
+
+        Products are fetched with a single $in query and reused for the stock check
+        and the total, so every order costs the same four round-trips:
+        order, customer, products and the final update.
+        """
+        # Arrange
+        product_ids = [f"sku-{i:03d}" for i in range(item_count)]
+        scenario_builder.create(
+            {
+                "customers": [{"customer_id": "bulk_buyer", "status": "active"}],
+                "products": [{"product_id": product_id} for product_id in product_ids],
+                "orders": [
+                    {
+                        "id": "bulk_order",
+                        "customer_id": "bulk_buyer",
+                        "items": [{"product_id": product_id} for product_id in product_ids],
+                    }
+                ],
+            }
+        )
+        counter, client = command_counter
+
+        # Act: Run checkout through the monitored client
+        result = Checkout(client[db.name]).process(order_id="bulk_order")
+
+        # Assert
+        assert result.success is True
+        assert counter.commands == ["find", "find", "find", "update"]
+        order = db["orders"].find_one({"id": "bulk_order"})
+        assert order["total"] == 10.0 * item_count
+
+
+def settlement_scenario(scenario_builder: ScenarioBuilder, order_count: int) -> dict:
+    """Orders cycling through valid ones, inactive and missing customers,
+    and out-of-stock or missing products."""
+    return {
+        "customers": [
+            {"customer_id": "settled_customer", "status": "active"},
+            {"customer_id": "closed_customer", "status": "closed"},
+        ],
+        "products": [
+            {"product_id": "sku-stocked", "price": 12.5, "in_stock": True},
+            {"product_id": "sku-sold-out", "in_stock": False},
+        ],
+        "orders": scenario_builder.many(
+            order_count,
+            id=seq("settlement_{:05d}"),
+            customer_id=cycle("settled_customer", "closed_customer", "settled_customer", "gone"),
+            items=cycle(
+                [{"product_id": "sku-stocked", "quantity": 2}],
+                [{"product_id": "sku-stocked"}],
+                [{"product_id": "sku-stocked"}, {"product_id": "sku-sold-out"}],
+                [{"product_id": "sku-unknown"}],
+                [{"product_id": "sku-stocked"}],
+            ),
+        ),
+    }
+
+
+class TestCheckoutProcessMany:
+    """Tests for the bulk checkout used by batch-settlement jobs."""
+
+    def test_process_many_matches_single_order_checkout(
+        self, scenario_builder: ScenarioBuilder, db: Database
+    ):
+        """
+        Scenario: 10k orders are settled in bulk, then one by one from the same data.
+
+        Both paths must give the same result for every order
+        and leave the orders collection in the same state.
+        """
+        order_count = 10_000
+        order_ids = [f"settlement_{i:05d}" for i in range(order_count)] + ["missing_order"]
+        checkout = Checkout(db)
+
+        # Act: bulk path
+        scenario_builder.create(settlement_scenario(scenario_builder, order_count))
+        bulk_results = checkout.process_many(order_ids)
+        bulk_orders = list(db["orders"].find({}, {"_id": 0}).sort("id"))
+
+        # Act: single-order path on a fresh copy of the scenario
+        scenario_builder.cleanup_collections()
+        scenario_builder.create(settlement_scenario(scenario_builder, order_count))
+        single_results = {order_id: checkout.process(order_id) for order_id in order_ids}
+        single_orders = list(db["orders"].find({}, {"_id": 0}).sort("id"))
+
+        # Assert
+        assert bulk_results == single_results
+        assert bulk_orders == single_orders
+        assert sum(result.success for result in bulk_results.values()) == 3_000
+        assert bulk_results["missing_order"].error == "Order not found"
+
+    def test_process_many_round_trips_do_not_grow_with_orders(
+        self, scenario_builder: ScenarioBuilder, db: Database, command_counter
+    ):
+        """
+        Scenario: 100 orders are settled in bulk.
+
+        Orders, customers and products are loaded with one query each
+        and the completed orders are written with a single bulk update.
+        """
+        # Arrange
+        order_ids = [f"settlement_{i:05d}" for i in range(100)]
+        scenario_builder.create(settlement_scenario(scenario_builder, len(order_ids)))
+        counter, client = command_counter
+
+        # Act
+        results = Checkout(client[db.name]).process_many(order_ids)
+
+        # Assert
+        assert sum(result.success for result in results.values()) == 30
+        assert counter.commands == ["find", "find", "find", "update"]
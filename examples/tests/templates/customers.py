@@ -5,3 +5,5 @@ TEMPLATE = {
     "email": "john.doe@example.test",
     "status": "active",
 }
+
+INDEXES = ["customer_id"]
@@ -7,3 +7,6 @@ TEMPLATE = {
     "status": "pending",
     "total": 0.0,
 }
+
+# Indexes created once per session; Checkout looks orders up by id.
+INDEXES = ["id"]
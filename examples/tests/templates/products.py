@@ -6,3 +6,5 @@ TEMPLATE = {
     "in_stock": True,
     "price": 10.0,
 }
+
+INDEXES = ["product_id"]
@@ -0,0 +1,197 @@
+import asyncio
+from collections.abc import Iterable, Mapping
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from pytest_scenarios.factories import many
+from pytest_scenarios.references import dependency_waves, resolve_refs
+from pytest_scenarios.scenario import ScenarioBuilder, ScenarioInsertError, _index_from_info
+from pytest_scenarios.template import CompiledTemplate
+from pytest_scenarios.tracking import TrackedDatabase
+
+try:
+    from pymongo.asynchronous.database import AsyncDatabase
+except ImportError:  # pragma: no cover - the async API needs pymongo 4.9
+    AsyncDatabase = None
+
+
+class AsyncScenarioBuilder:
+    # Factory of generated documents, so tests only need the builder: builder.many(...)
+    many = staticmethod(many)
+
+    def __init__(
+        self,
+        db: AsyncDatabase | TrackedDatabase,
+        templates: Mapping[str, dict],
+        scenario_builder: ScenarioBuilder | None = None,
+    ):
+        """Initialize the AsyncScenarioBuilder with an async MongoDB database and templates.
+        Args:
+            db: The PyMongo AsyncDatabase instance.
+            It is wrapped in a TrackedDatabase (unless it already is one)
+            so writes to each collection are recorded for cleanup.
+            templates: A mapping of templates to be used as blueprints for creating documents.
+            The keys are collection names and the values are the template documents.
+            Each template is compiled on first use and documents are deep-merged into it.
+            Unlike ScenarioBuilder, collections are not created up front:
+            MongoDB creates them on first insert.
+            scenario_builder: Optional ScenarioBuilder sharing the dirty-collection tracking
+            of db, see TrackedDatabase.share_tracking. Cleanup then follows its rules,
+            so baselines are restored, cached scenarios evicted and large collections dropped.
+        """
+        self._db = db if isinstance(db, TrackedDatabase) else TrackedDatabase(db)
+        self._templates = templates
+        self._scenario_builder = scenario_builder
+        self._compiled_templates: dict[str, CompiledTemplate] = {}
+
+    async def create(
+        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False, ordered: bool = True
+    ) -> dict[str, list[ObjectId]]:
+        """Create a scenario with the given steps.
+        The scenario is a dictionary where keys are collection names
+        and values are iterables of documents to insert into those collections.
+        All collections are inserted concurrently, except those holding ref placeholders,
+        which are inserted in dependency waves after the collections they reference.
+        This method returns a dictionary of collection names and list of inserted document IDs.
+        Args:
+            ordered: Passed to insert_many. Failures of every collection are reported
+            together in a single ScenarioInsertError.
+        """
+        scenario_id = ObjectId()
+        scenario_doc = {"scenario_id": scenario_id} if add_scenario_id else {}
+        scenario = {name: list(docs) for name, docs in scenario.items()}
+        waves = dependency_waves(scenario)
+        has_refs = waves is not None
+        if waves is None:
+            waves = [list(scenario)]
+        inserted: dict[str, list[dict]] = {}
+        inserted_ids: dict[str, list[ObjectId]] = {}
+        errors = []
+        for wave in waves:
+            for collection_name in wave:
+                docs = scenario[collection_name]
+                if has_refs:
+                    docs = resolve_refs(docs, inserted)
+                docs = self._merge(collection_name, docs, scenario_doc)
+                if has_refs:
+                    for doc in docs:
+                        # Assigned up front, so documents referencing this one can be resolved.
+                        doc.setdefault("_id", ObjectId())
+                inserted[collection_name] = docs
+            results = await asyncio.gather(
+                *(
+                    self._insert(collection_name, inserted[collection_name], scenario_id, ordered)
+                    for collection_name in wave
+                ),
+                return_exceptions=True,
+            )
+            for collection_name, result in zip(wave, results, strict=True):
+                if not isinstance(result, BaseException):
+                    inserted_ids[collection_name] = result
+                elif isinstance(result, ScenarioInsertError):
+                    errors.append(result)
+                else:
+                    raise result
+            if errors and ordered:
+                break
+        if errors:
+            raise ScenarioInsertError.merge(errors)
+        return {name: inserted_ids[name] for name in scenario}
+
+    def _merge(self, collection_name: str, docs: Iterable[dict], scenario_doc: dict) -> list[dict]:
+        """Merge documents with the template of their collection."""
+        template = self._compiled_template(collection_name)
+        return [template.merge(doc, scenario_doc) for doc in docs]
+
+    async def _insert(
+        self,
+        collection_name: str,
+        docs_to_insert: list[dict],
+        scenario_id: ObjectId,
+        ordered: bool = True,
+    ) -> list[ObjectId]:
+        collection = self._db[collection_name]
+        try:
+            result = await collection.insert_many(
+                docs_to_insert, ordered=ordered, comment=f"AsyncScenarioBuilder {scenario_id}"
+            )
+        except BulkWriteError as error:
+            raise ScenarioInsertError.from_bulk_write_error(
+                collection_name, docs_to_insert, error
+            ) from error
+        if len(result.inserted_ids) != len(docs_to_insert):
+            raise ScenarioInsertError({collection_name: []})
+        return result.inserted_ids
+
+    def _compiled_template(self, collection_name: str) -> CompiledTemplate:
+        """Return the compiled template of a collection, an empty one if it has none.
+        Templates are compiled on first use."""
+        template = self._compiled_templates.get(collection_name)
+        if template is None:
+            template = self._compiled_templates[collection_name] = CompiledTemplate(
+                self._templates.get(collection_name, {})
+            )
+        return template
+
+    @property
+    def collections(self) -> Iterable[str]:
+        """Return the collection names managed by this AsyncScenarioBuilder."""
+        return self._templates.keys()
+
+    @property
+    def dirty_collections(self) -> set[str]:
+        """Return the collection names written since the last cleanup."""
+        return self._db.dirty_collections
+
+    async def cleanup_collections(self, paranoid: bool = False):
+        """Concurrently clear the collections written since the last cleanup.
+        With a scenario_builder, its cleanup rules apply: baseline collections are restored,
+        cached scenarios evicted and collections beyond its drop_threshold dropped.
+        Args:
+            paranoid: If True, clear every collection managed by this AsyncScenarioBuilder
+            as well as the dirty ones, even if no write was recorded for them.
+        """
+        builder = self._scenario_builder
+        if builder is None:
+            names = self.dirty_collections
+            if paranoid:
+                names.update(self.collections)
+            await asyncio.gather(*(self._db[name].delete_many({}) for name in names))
+        else:
+            names = builder._collections_to_clean(paranoid)
+            await asyncio.gather(
+                *(
+                    self._restore_collection(name)
+                    if name in builder._baseline
+                    else self._clear_collection(name)
+                    for name in names
+                )
+            )
+        self._db.reset_dirty(names)
+
+    async def _clear_collection(self, name: str):
+        """Async ScenarioBuilder._clear_collection: delete the documents of a collection,
+        or drop and recreate it with its options and indexes beyond the drop_threshold."""
+        collection = self._db[name]
+        threshold = self._scenario_builder._drop_threshold
+        if not threshold or await collection.estimated_document_count() < threshold:
+            await collection.delete_many({})
+            return
+        options = await collection.options()
+        indexes = [_index_from_info(info) async for info in await collection.list_indexes()]
+        await self._db.drop_collection(name)
+        await self._db.create_collection(name, **options)
+        indexes = [index for index in indexes if index.document["name"] != "_id_"]
+        if indexes:
+            await self._db.database[name].create_indexes(indexes)
+
+    async def _restore_collection(self, name: str):
+        """Async ScenarioBuilder._restore_collection: bring a collection back to its baseline."""
+        collection = self._db[name]
+        baseline_ids = list(self._scenario_builder._baseline[name])
+        await collection.delete_many({"_id": {"$nin": baseline_ids}})
+        current = await collection.find({"_id": {"$in": baseline_ids}}).to_list()
+        changes = self._scenario_builder._restore_requests(name, current)
+        if changes:
+            await collection.bulk_write(changes, ordered=False)
@@ -0,0 +1,48 @@
+"""
+Pickle files kept in pytest's cache directory across sessions, such as the evaluated
+templates and the parsed scenario files. Each file holds a mapping of entries.
+"""
+
+import os
+import pickle
+import tempfile
+from typing import Any
+
+# Cache files written with another version are ignored.
+CACHE_VERSION = 2
+
+
+def read_cache(cache_dir: str | None, file_name: str) -> dict[str, Any]:
+    """Return the entries of a cache file.
+    Missing, unreadable and outdated files give no entries.
+
+    Args:
+        cache_dir: Directory of the cache file, None when caching is off.
+        file_name: Name of the cache file in cache_dir.
+    """
+    if cache_dir is None:
+        return {}
+    try:
+        with open(os.path.join(cache_dir, file_name), "rb") as file:
+            cache = pickle.load(file)
+    except Exception:
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache["entries"]
+
+
+def write_cache(cache_dir: str, entries: dict[str, Any], file_name: str) -> None:
+    """Atomically replace a cache file, so concurrent workers never read a partial one.
+    Empty entries are left out.
+
+    Args:
+        cache_dir: Directory of the cache file, created if needed.
+        entries: The entries to keep, they must be picklable.
+        file_name: Name of the cache file in cache_dir.
+    """
+    entries = {key: entry for key, entry in entries.items() if entry}
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as file:
+        pickle.dump({"version": CACHE_VERSION, "entries": entries}, file)
+    os.replace(file.name, os.path.join(cache_dir, file_name))
@@ -0,0 +1,180 @@
+"""
+Column specs to generate many scenario documents without writing one dictionary each.
+
+    builder.create(
+        {
+            "orders": builder.many(
+                10_000,
+                id=seq("order_{}"),
+                customer_id=cycle("customer_001", "customer_002"),
+                tax=uniform(0, 0.2, seed=42),
+                status="pending",
+            )
+        }
+    )
+
+Each column is generated in batches, and documents are assembled from the batch columns.
+"""
+
+import itertools
+import random
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+DEFAULT_FACTORY_BATCH_SIZE = 1000
+
+
+class Column(ABC):
+    """Spec of the values of one field across the generated documents."""
+
+    @abstractmethod
+    def values(self) -> Iterator[Any]:
+        """Return a fresh iterator over the values of the column, one per document."""
+
+
+class _Seq(Column):
+    def __init__(self, pattern: str | None, start: int, step: int):
+        self._pattern = pattern
+        self._start = start
+        self._step = step
+
+    def values(self) -> Iterator[Any]:
+        numbers = itertools.count(self._start, self._step)
+        return numbers if self._pattern is None else map(self._pattern.format, numbers)
+
+
+class _Cycle(Column):
+    def __init__(self, values: tuple[Any, ...]):
+        self._values = values
+
+    def values(self) -> Iterator[Any]:
+        return itertools.cycle(self._values)
+
+
+class _RandomColumn(Column):
+    """Random values, reproducible when a seed is given."""
+
+    def __init__(self, seed: int | None):
+        self._seed = seed
+
+    def values(self) -> Iterator[Any]:
+        return self._values(random.Random(self._seed))
+
+    @abstractmethod
+    def _values(self, rng: random.Random) -> Iterator[Any]:
+        """Return an iterator over the values of the column, drawn from rng."""
+
+
+class _Choice(_RandomColumn):
+    def __init__(self, values: list[Any], seed: int | None):
+        super().__init__(seed)
+        self._choices = values
+
+    def _values(self, rng: random.Random) -> Iterator[Any]:
+        while True:
+            yield from rng.choices(self._choices, k=DEFAULT_FACTORY_BATCH_SIZE)
+
+
+class _RandInt(_RandomColumn):
+    def __init__(self, low: int, high: int, seed: int | None):
+        super().__init__(seed)
+        self._low = low
+        self._high = high
+
+    def _values(self, rng: random.Random) -> Iterator[Any]:
+        return iter(lambda: rng.randint(self._low, self._high), None)
+
+
+class _Uniform(_RandomColumn):
+    def __init__(self, low: float, high: float, seed: int | None):
+        super().__init__(seed)
+        self._low = low
+        self._high = high
+
+    def _values(self, rng: random.Random) -> Iterator[Any]:
+        return iter(lambda: rng.uniform(self._low, self._high), None)
+
+
+class Many(Iterable[dict]):
+    """Documents generated from column specs, see many."""
+
+    def __init__(self, count: int, batch_size: int, **fields: Any):
+        self._count = count
+        self._batch_size = batch_size
+        self._fields = fields
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        keys = tuple(self._fields)
+        columns = [
+            value.values() if isinstance(value, Column) else itertools.repeat(value)
+            for value in self._fields.values()
+        ]
+        remaining = self._count
+        while remaining > 0:
+            size = min(self._batch_size, remaining)
+            batch = [list(itertools.islice(column, size)) for column in columns]
+            if keys:
+                yield from map(dict, map(zip, itertools.repeat(keys), zip(*batch, strict=True)))
+            else:
+                yield from ({} for _ in range(size))
+            remaining -= size
+
+
+def many(count: int, batch_size: int = DEFAULT_FACTORY_BATCH_SIZE, **fields: Any) -> Many:
+    """Return documents generated from column specs, usable wherever a scenario
+    expects documents.
+
+    Every keyword argument is a field of the generated documents, dotted paths included.
+    Column specs (seq, cycle, choice, randint, uniform) give one value per document,
+    any other value is the same in every document. Columns are generated batch by batch,
+    so memory stays bounded when passed to create_streaming.
+    Iterating again generates the same documents, random columns with a seed included.
+
+    Args:
+        count: Number of documents.
+        batch_size: Number of values generated per column at a time.
+    """
+    return Many(count, batch_size, **fields)
+
+
+def seq(pattern: str | None = None, start: int = 0, step: int = 1) -> Column:
+    """Sequential values: start, start + step, ...
+
+    Args:
+        pattern: Optional format string the number is formatted with, e.g. "order_{}"
+            or "order_{:05d}". Numbers are used as they are without it.
+        start: First number of the sequence.
+        step: Increment between numbers.
+    """
+    return _Seq(pattern, start, step)
+
+
+def cycle(*values: Any) -> Column:
+    """Values repeated in order: cycle("a", "b") gives a, b, a, b, ...
+    A single iterable argument is cycled through as well: cycle(customer_ids)."""
+    if len(values) == 1 and isinstance(values[0], Iterable) and not isinstance(values[0], str):
+        values = tuple(values[0])
+    if not values:
+        raise ValueError("cycle needs at least one value")
+    return _Cycle(values)
+
+
+def choice(values: Sequence[Any], seed: int | None = None) -> Column:
+    """Values picked at random from a sequence, reproducible when a seed is given."""
+    if not values:
+        raise ValueError("choice needs at least one value")
+    return _Choice(list(values), seed)
+
+
+def randint(low: int, high: int, seed: int | None = None) -> Column:
+    """Random integers between low and high, both included, reproducible with a seed."""
+    return _RandInt(low, high, seed)
+
+
+def uniform(low: float, high: float, seed: int | None = None) -> Column:
+    """Random floats between low and high, reproducible with a seed."""
+    return _Uniform(low, high, seed)
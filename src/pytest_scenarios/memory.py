@@ -0,0 +1,696 @@
+"""
+An in-process document store implementing the subset of the PyMongo client, database and
+collection API used by ScenarioBuilder and typical data-access code, so scenario tests can
+run at memory speed without a MongoDB server.
+
+Supported queries: equality (including dotted paths and array elements), $eq, $ne, $gt,
+$gte, $lt, $lte, $in, $nin, $exists, $not, $and, $or and $nor.
+Supported updates: replacement documents, $set, $unset, $inc, $push and $setOnInsert.
+Anything else raises NotImplementedError, as do the PyMongo client, database and collection
+methods and properties it does not implement.
+Indexes are recorded so they can be listed, but not used or enforced, unique ones included.
+"""
+
+import datetime
+import operator
+import re
+import threading
+from collections.abc import Iterable, Iterator, Mapping
+from types import SimpleNamespace
+from typing import Any
+
+import bson
+from bson import Binary, Decimal128, MaxKey, MinKey, ObjectId, Regex, Timestamp
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+from pymongo import (
+    DeleteMany,
+    DeleteOne,
+    IndexModel,
+    InsertOne,
+    MongoClient,
+    ReplaceOne,
+    UpdateMany,
+    UpdateOne,
+)
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+_COMPARISONS = {
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+class MemoryClient:
+    """Stand-in for MongoClient keeping every database in process memory."""
+
+    def __init__(self, host: str | None = None, **kwargs):
+        self._databases: dict[str, MemoryDatabase] = {}
+        self._lock = threading.Lock()
+        # ScenarioBuilder sizes its thread pool from the connection pool; there is none here.
+        self.options = SimpleNamespace(pool_options=SimpleNamespace(max_pool_size=None))
+
+    def __enter__(self) -> "MemoryClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getitem__(self, name: str) -> "MemoryDatabase":
+        return self.get_database(name)
+
+    def __getattr__(self, name: str) -> "MemoryDatabase":
+        return self.get_database(_attribute_name(self, MongoClient, name))
+
+    def get_database(self, name: str, **kwargs) -> "MemoryDatabase":
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = MemoryDatabase(self, name)
+            return self._databases[name]
+
+    def list_database_names(self, **kwargs) -> list[str]:
+        return [name for name, db in self._databases.items() if db.list_collection_names()]
+
+    def drop_database(self, name_or_database, **kwargs) -> None:
+        name = getattr(name_or_database, "name", name_or_database)
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryDatabase:
+    """Stand-in for a PyMongo Database."""
+
+    def __init__(self, client: MemoryClient, name: str):
+        self.client = client
+        self.name = name
+        self._collections: dict[str, MemoryCollection] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"MemoryDatabase({self.name!r})"
+
+    def __getitem__(self, name: str) -> "MemoryCollection":
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str) -> "MemoryCollection":
+        return self.get_collection(_attribute_name(self, Database, name))
+
+    def get_collection(self, name: str, **kwargs) -> "MemoryCollection":
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(self, name)
+            return self._collections[name]
+
+    def with_options(self, **kwargs) -> "MemoryDatabase":
+        return self
+
+    def create_collection(self, name: str, check_exists: bool = True, **kwargs):
+        if check_exists and name in self.list_collection_names():
+            raise CollectionInvalid(f"collection {name} already exists")
+        collection = self.get_collection(name)
+        collection._created = True
+        return collection
+
+    def list_collection_names(self, **kwargs) -> list[str]:
+        return [name for name, collection in self._collections.items() if collection._exists]
+
+    def drop_collection(self, name_or_collection, **kwargs) -> dict[str, Any]:
+        """Empty the collection and its indexes in place: handles obtained before
+        keep pointing at it, and it is recreated by the next write."""
+        name = getattr(name_or_collection, "name", name_or_collection)
+        with self._lock:
+            collection = self._collections.get(name)
+        if collection is not None:
+            collection._clear()
+        return {"ok": 1.0}
+
+    def command(self, command: str | Mapping, **kwargs) -> dict[str, Any]:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        if name in ("hello", "isMaster", "ismaster"):
+            # A standalone server: no replica set, so no transactions.
+            return {"isWritablePrimary": True, "ok": 1.0}
+        raise NotImplementedError(f"MemoryDatabase does not support the {name!r} command")
+
+
+class MemoryCollection:
+    """Stand-in for a PyMongo Collection. Documents are stored BSON round-tripped,
+    so callers never share references with the stored copies."""
+
+    codec_options = DEFAULT_CODEC_OPTIONS
+
+    def __init__(self, database: MemoryDatabase, name: str):
+        self.database = database
+        self.name = name
+        self._documents: dict[Any, dict] = {}
+        self._created = False
+        self._indexes: dict[str, dict] = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+        self._lock = threading.RLock()
+
+    def __repr__(self) -> str:
+        return f"MemoryCollection({self.full_name!r})"
+
+    def __getitem__(self, name: str) -> "MemoryCollection":
+        return self.database[f"{self.name}.{name}"]
+
+    def __getattr__(self, name: str) -> "MemoryCollection":
+        return self[_attribute_name(self, Collection, name)]
+
+    def with_options(self, **kwargs) -> "MemoryCollection":
+        return self
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.database.name}.{self.name}"
+
+    @property
+    def _exists(self) -> bool:
+        return self._created or bool(self._documents)
+
+    def insert_one(self, document: Mapping, **kwargs) -> InsertOneResult:
+        with self._lock:
+            doc_id = self._insert(document)
+        return InsertOneResult(doc_id, True)
+
+    def insert_many(
+        self, documents: Iterable[Mapping], ordered: bool = True, **kwargs
+    ) -> InsertManyResult:
+        inserted_ids = []
+        write_errors = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    inserted_ids.append(self._insert(document))
+                except DuplicateKeyError as error:
+                    write_errors.append(
+                        {"index": index, "code": error.code, "errmsg": str(error), "op": document}
+                    )
+                    if ordered:
+                        break
+        if write_errors:
+            raise BulkWriteError(
+                {"writeErrors": write_errors, "nInserted": len(inserted_ids), "upserted": []}
+            )
+        return InsertManyResult(inserted_ids, True)
+
+    def find(
+        self,
+        filter: Mapping | None = None,
+        projection: Mapping | Iterable[str] | None = None,
+        **kwargs,
+    ) -> "MemoryCursor":
+        return MemoryCursor(self._matching(filter), projection, **kwargs)
+
+    def find_one(self, filter: Any = None, *args, **kwargs) -> dict | None:
+        if filter is not None and not isinstance(filter, Mapping):
+            filter = {"_id": filter}
+        return next(iter(self.find(filter, *args, **kwargs).limit(1)), None)
+
+    def count_documents(self, filter: Mapping, **kwargs) -> int:
+        return len(self._matching(filter))
+
+    def estimated_document_count(self, **kwargs) -> int:
+        return len(self._documents)
+
+    def distinct(self, key: str, filter: Mapping | None = None, **kwargs) -> list:
+        values = []
+        for doc in self._matching(filter):
+            for value in _resolve(doc, key):
+                if value is not _MISSING and value not in values:
+                    values.append(value)
+        return values
+
+    def replace_one(
+        self, filter: Mapping, replacement: Mapping, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        return self._update(filter, replacement, upsert, multi=False)
+
+    def update_one(
+        self, filter: Mapping, update: Mapping, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        return self._update(filter, update, upsert, multi=False)
+
+    def update_many(
+        self, filter: Mapping, update: Mapping, upsert: bool = False, **kwargs
+    ) -> UpdateResult:
+        return self._update(filter, update, upsert, multi=True)
+
+    def delete_one(self, filter: Mapping, **kwargs) -> DeleteResult:
+        return self._delete(filter, multi=False)
+
+    def delete_many(self, filter: Mapping, **kwargs) -> DeleteResult:
+        return self._delete(filter, multi=True)
+
+    def bulk_write(self, requests: Iterable, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        result = {
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+        }
+        write_errors = []
+        # The operation classes keep their arguments in private attributes.
+        for index, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                try:
+                    self.insert_one(request._doc)
+                except DuplicateKeyError as error:
+                    write_errors.append(
+                        {
+                            "index": index,
+                            "code": error.code,
+                            "errmsg": str(error),
+                            "op": request._doc,
+                        }
+                    )
+                    if ordered:
+                        break
+                    continue
+                result["nInserted"] += 1
+            elif isinstance(request, (ReplaceOne, UpdateOne, UpdateMany)):
+                update = self._update(
+                    request._filter,
+                    request._doc,
+                    request._upsert,
+                    multi=isinstance(request, UpdateMany),
+                )
+                result["nMatched"] += update.matched_count
+                result["nModified"] += update.modified_count
+                if update.upserted_id is not None:
+                    result["nUpserted"] += 1
+                    result["upserted"].append({"index": index, "_id": update.upserted_id})
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                deleted = self._delete(request._filter, multi=isinstance(request, DeleteMany))
+                result["nRemoved"] += deleted.deleted_count
+            else:
+                raise NotImplementedError(f"MemoryCollection does not support {request!r}")
+        if write_errors:
+            raise BulkWriteError({**result, "writeErrors": write_errors})
+        return BulkWriteResult(result, True)
+
+    def drop(self, **kwargs) -> None:
+        self.database.drop_collection(self.name)
+
+    def options(self, **kwargs) -> dict[str, Any]:
+        return {}
+
+    def create_indexes(self, indexes: Iterable[IndexModel], **kwargs) -> list[str]:
+        names = []
+        for index in indexes:
+            document = dict(index.document)
+            name = document.pop("name")
+            self._indexes[name] = {"v": 2, "key": list(document.pop("key").items()), **document}
+            names.append(name)
+        self._created = True
+        return names
+
+    def create_index(self, keys, **kwargs) -> str:
+        return self.create_indexes([IndexModel(keys, **kwargs)])[0]
+
+    def index_information(self, **kwargs) -> dict[str, dict]:
+        return {name: dict(info) for name, info in self._indexes.items()}
+
+    def list_indexes(self, **kwargs) -> Iterator[dict]:
+        return iter(
+            [
+                {"name": name, **info, "key": dict(info["key"])}
+                for name, info in self._indexes.items()
+            ]
+        )
+
+    def drop_index(self, index_or_name, **kwargs) -> None:
+        name = (
+            index_or_name
+            if isinstance(index_or_name, str)
+            else IndexModel(index_or_name).document["name"]
+        )
+        self._indexes.pop(name)
+
+    def drop_indexes(self, **kwargs) -> None:
+        self._indexes = {"_id_": self._indexes["_id_"]}
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._indexes = {"_id_": self._indexes["_id_"]}
+            self._created = False
+
+    def _insert(self, document: Mapping) -> Any:
+        doc = _copy(document)
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+        key = _key(doc["_id"])
+        if key in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.full_name} index: _id_",
+                11000,
+            )
+        self._documents[key] = doc
+        return doc["_id"]
+
+    def _matching(self, filter: Mapping | None) -> list[dict]:
+        with self._lock:
+            if filter and set(filter) == {"_id"} and not _is_operator_doc(filter["_id"]):
+                doc = self._documents.get(_key(filter["_id"]))
+                return [doc] if doc is not None else []
+            return [doc for doc in self._documents.values() if _matches(doc, filter or {})]
+
+    def _update(self, filter: Mapping, update: Mapping, upsert: bool, multi: bool) -> UpdateResult:
+        is_replacement = not any(key.startswith("$") for key in update)
+        with self._lock:
+            matched = self._matching(filter)
+            if not multi:
+                matched = matched[:1]
+            modified = 0
+            for doc in matched:
+                new_doc = _replaced(doc, update) if is_replacement else _updated(doc, update, False)
+                if new_doc != doc:
+                    self._documents[_key(doc["_id"])] = new_doc
+                    modified += 1
+            raw_result = {"n": len(matched), "nModified": modified, "ok": 1.0}
+            if not matched and upsert:
+                seed = {
+                    key: value
+                    for key, value in filter.items()
+                    if not key.startswith("$") and not _is_operator_doc(value)
+                }
+                new_doc = (
+                    _replaced(seed, update) if is_replacement else _updated(seed, update, True)
+                )
+                if "_id" in filter and not _is_operator_doc(filter["_id"]):
+                    new_doc["_id"] = filter["_id"]
+                raw_result["upserted"] = self._insert(new_doc)
+                raw_result["n"] = 1
+        return UpdateResult(raw_result, True)
+
+    def _delete(self, filter: Mapping, multi: bool) -> DeleteResult:
+        with self._lock:
+            matched = self._matching(filter)
+            if not multi:
+                matched = matched[:1]
+            for doc in matched:
+                del self._documents[_key(doc["_id"])]
+        return DeleteResult({"n": len(matched), "ok": 1.0}, True)
+
+
+class MemoryCursor:
+    """Stand-in for a PyMongo Cursor over a snapshot of the matching documents."""
+
+    def __init__(
+        self,
+        documents: list[dict],
+        projection: Mapping | Iterable[str] | None = None,
+        sort: list | None = None,
+        skip: int = 0,
+        limit: int = 0,
+        **kwargs,
+    ):
+        self._documents = documents
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = list(sort or [])
+        self._skip = skip
+        self._limit = limit
+        self._iterator: Iterator[dict] | None = None
+
+    def sort(self, key_or_list, direction: int = 1) -> "MemoryCursor":
+        if isinstance(key_or_list, str):
+            self._sort.append((key_or_list, direction))
+        else:
+            self._sort.extend(key_or_list)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = limit
+        return self
+
+    def __iter__(self) -> "MemoryCursor":
+        return self
+
+    def __next__(self) -> dict:
+        if self._iterator is None:
+            self._iterator = self._results()
+        return next(self._iterator)
+
+    def to_list(self, length: int | None = None) -> list[dict]:
+        documents = list(self)
+        return documents[:length] if length else documents
+
+    def _results(self) -> Iterator[dict]:
+        documents = self._documents
+        for key, direction in reversed(self._sort):
+            documents = sorted(
+                documents, key=lambda doc: _sort_key(doc, key), reverse=direction < 0
+            )
+        end = self._skip + self._limit if self._limit else None
+        for doc in documents[self._skip : end]:
+            yield _project(_copy(doc), self._projection)
+
+
+def _attribute_name(handle: object, pymongo_class: type, name: str) -> str:
+    """Return the name of the database or collection an attribute access refers to,
+    like PyMongo does. Methods and properties of the PyMongo class that the memory backend
+    does not implement raise NotImplementedError instead of being taken for names."""
+    if name.startswith("_"):
+        raise AttributeError(name)
+    if hasattr(pymongo_class, name):
+        raise NotImplementedError(f"{type(handle).__name__} does not support {name}")
+    return name
+
+
+def _copy(document: Mapping) -> dict:
+    """Deep copy a document the way a round-trip through the server would."""
+    if isinstance(document, RawBSONDocument):
+        return bson.decode(document.raw)
+    return bson.decode(bson.encode(document))
+
+
+def _key(value: Any) -> Any:
+    """Return a hashable key for an _id value."""
+    try:
+        hash(value)
+    except TypeError:
+        return bson.encode({"_id": value})
+    return value
+
+
+def _is_operator_doc(value: Any) -> bool:
+    return isinstance(value, Mapping) and any(str(key).startswith("$") for key in value)
+
+
+def _resolve(doc: Any, path: str) -> list[Any]:
+    """Return the candidate values at a dotted path, fanning out over arrays.
+    An array is a candidate itself, and so are its elements."""
+    values = [doc]
+    for part in path.split("."):
+        next_values = []
+        for value in values:
+            if isinstance(value, Mapping):
+                next_values.append(value.get(part, _MISSING))
+            elif isinstance(value, list):
+                if part.isdigit():
+                    index = int(part)
+                    next_values.append(value[index] if index < len(value) else _MISSING)
+                else:
+                    next_values.extend(
+                        item.get(part, _MISSING) for item in value if isinstance(item, Mapping)
+                    )
+            else:
+                next_values.append(_MISSING)
+        values = next_values
+    candidates = []
+    for value in values:
+        candidates.append(value)
+        if isinstance(value, list):
+            candidates.extend(value)
+    return candidates or [_MISSING]
+
+
+def _matches(doc: Mapping, query: Mapping) -> bool:
+    for key, condition in query.items():
+        if key == "$and":
+            matched = all(_matches(doc, sub_query) for sub_query in condition)
+        elif key == "$or":
+            matched = any(_matches(doc, sub_query) for sub_query in condition)
+        elif key == "$nor":
+            matched = not any(_matches(doc, sub_query) for sub_query in condition)
+        elif key.startswith("$"):
+            raise NotImplementedError(f"MemoryCollection does not support {key}")
+        else:
+            matched = _matches_condition(_resolve(doc, key), condition)
+        if not matched:
+            return False
+    return True
+
+
+def _matches_condition(candidates: list[Any], condition: Any) -> bool:
+    if not _is_operator_doc(condition):
+        return _equals_any(candidates, condition)
+    for op, operand in condition.items():
+        if op == "$eq":
+            matched = _equals_any(candidates, operand)
+        elif op == "$ne":
+            matched = not _equals_any(candidates, operand)
+        elif op == "$in":
+            matched = any(_equals_any(candidates, value) for value in operand)
+        elif op == "$nin":
+            matched = not any(_equals_any(candidates, value) for value in operand)
+        elif op == "$exists":
+            matched = any(value is not _MISSING for value in candidates) == bool(operand)
+        elif op == "$not":
+            matched = not _matches_condition(candidates, operand)
+        elif op in _COMPARISONS:
+            matched = any(_compare(_COMPARISONS[op], value, operand) for value in candidates)
+        else:
+            raise NotImplementedError(f"MemoryCollection does not support {op}")
+        if not matched:
+            return False
+    return True
+
+
+def _equals_any(candidates: list[Any], value: Any) -> bool:
+    if value is None:
+        return any(candidate is _MISSING or candidate is None for candidate in candidates)
+    return any(candidate is not _MISSING and candidate == value for candidate in candidates)
+
+
+def _compare(compare, value: Any, operand: Any) -> bool:
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return compare(value, operand)
+    except TypeError:
+        return False
+
+
+def _sort_key(doc: Mapping, path: str) -> tuple:
+    return _bson_order(_resolve(doc, path)[0])
+
+
+def _bson_order(value: Any) -> tuple:
+    """Key ordering values of mixed types like MongoDB's BSON comparison order:
+    MinKey, null and missing, numbers, strings, documents, arrays, binary data, ObjectId,
+    booleans, dates, timestamps, regular expressions and MaxKey.
+    Documents and arrays compare field by field and element by element."""
+    if isinstance(value, MinKey):
+        return (0,)
+    if value is _MISSING or value is None:
+        return (1,)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, Decimal128):
+        return (2, value.to_decimal())
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, Mapping):
+        return (4, tuple((str(key), _bson_order(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (5, tuple(_bson_order(item) for item in value))
+    if isinstance(value, (bytes, Binary)):
+        return (6, bytes(value))
+    if isinstance(value, ObjectId):
+        return (7, value.binary)
+    if isinstance(value, datetime.datetime):
+        return (9, value)
+    if isinstance(value, Timestamp):
+        return (10, value.time, value.inc)
+    if isinstance(value, (Regex, re.Pattern)):
+        return (11, value.pattern)
+    if isinstance(value, MaxKey):
+        return (12,)
+    raise NotImplementedError(f"MemoryCursor does not support sorting {type(value).__name__}")
+
+
+def _project(doc: dict, projection: Mapping | Iterable[str] | None) -> dict:
+    if projection is None:
+        return doc
+    if not isinstance(projection, Mapping):
+        projection = dict.fromkeys(projection, 1)
+    included = {key for key, value in projection.items() if value and key != "_id"}
+    if included:
+        keep = included | ({"_id"} if projection.get("_id", 1) else set())
+        return {key: value for key, value in doc.items() if key in keep}
+    excluded = {key for key, value in projection.items() if not value}
+    return {key: value for key, value in doc.items() if key not in excluded}
+
+
+def _replaced(doc: Mapping, replacement: Mapping) -> dict:
+    new_doc = _copy(replacement)
+    if "_id" in doc:
+        new_doc["_id"] = doc["_id"]
+    return new_doc
+
+
+def _updated(doc: Mapping, update: Mapping, inserting: bool) -> dict:
+    new_doc = _copy(doc)
+    for op, fields in update.items():
+        if op == "$setOnInsert" and not inserting:
+            continue
+        for path, value in fields.items():
+            if op in ("$set", "$setOnInsert"):
+                _set_path(new_doc, path, _copy({"v": value})["v"])
+            elif op == "$unset":
+                _unset_path(new_doc, path)
+            elif op == "$inc":
+                current = _resolve(new_doc, path)[0]
+                _set_path(new_doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$push":
+                current = _resolve(new_doc, path)[0]
+                items = [] if current is _MISSING else list(current)
+                if isinstance(value, Mapping) and "$each" in value:
+                    items.extend(value["$each"])
+                else:
+                    items.append(value)
+                _set_path(new_doc, path, _copy({"v": items})["v"])
+            else:
+                raise NotImplementedError(f"MemoryCollection does not support {op}")
+    return new_doc
+
+
+def _set_path(doc: dict, path: str, value: Any) -> None:
+    *parents, last = path.split(".")
+    target: Any = doc
+    for part in parents:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(last)] = value
+    else:
+        target[last] = value
+
+
+def _unset_path(doc: dict, path: str) -> None:
+    *parents, last = path.split(".")
+    target: Any = doc
+    for part in parents:
+        target = target.get(part) if isinstance(target, Mapping) else None
+        if target is None:
+            return
+    if isinstance(target, dict):
+        target.pop(last, None)
@@ -0,0 +1,138 @@
+"""
+Timings of the work pytest-scenarios does around each test: session init, cleanup before
+each test and scenario inserts, per collection with document counts and BSON bytes.
+Enabled with the scenarios-profile option, reported at the end of the session.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class ProfiledCollection:
+    """Inserts into one collection over the whole session."""
+
+    inserts: int = 0
+    docs: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ProfiledTest:
+    """Time spent on one test, split by phase."""
+
+    cleanup: float = 0.0
+    create: float = 0.0
+    call: float = 0.0
+    docs: int = 0
+
+    @property
+    def overhead(self) -> float:
+        """Time spent by pytest-scenarios rather than by the test itself."""
+        return self.cleanup + self.create
+
+
+class ScenarioProfiler:
+    """Collects timings recorded by the fixtures and ScenarioBuilder.
+    Cleanups and creations are attributed to the test started last, see start_test.
+    Recording is thread-safe, as concurrent inserts run in a thread pool."""
+
+    def __init__(self):
+        self.session_init = 0.0
+        self.tests: dict[str, ProfiledTest] = {}
+        self.collections: dict[str, ProfiledCollection] = {}
+        self._current: ProfiledTest | None = None
+        self._creating = False
+        self._lock = threading.Lock()
+
+    def start_test(self, nodeid: str) -> ProfiledTest:
+        """Attribute the timings recorded from now on to the given test."""
+        self._current = self.tests.setdefault(nodeid, ProfiledTest())
+        return self._current
+
+    @contextmanager
+    def time_session_init(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        self.session_init += time.perf_counter() - start
+
+    @contextmanager
+    def time_cleanup(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        if self._current is not None:
+            self._current.cleanup += time.perf_counter() - start
+
+    @contextmanager
+    def time_create(self) -> Iterator[None]:
+        """Time a whole scenario creation, template merges and ref resolution included.
+        Nested creations, such as create_cached calling create, are only counted once."""
+        current = self._current
+        if current is None or self._creating:
+            yield
+            return
+        self._creating = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._creating = False
+            current.create += time.perf_counter() - start
+
+    def record_insert(self, collection_name: str, docs: int, size: int, seconds: float):
+        """Record one insert_many of docs documents totalling size bytes."""
+        with self._lock:
+            collection = self.collections.setdefault(collection_name, ProfiledCollection())
+            collection.inserts += 1
+            collection.docs += docs
+            collection.bytes += size
+            collection.seconds += seconds
+            if self._current is not None:
+                self._current.docs += docs
+
+    def record_call(self, nodeid: str, seconds: float):
+        """Record the duration of a test body."""
+        self.tests.setdefault(nodeid, ProfiledTest()).call += seconds
+
+    def report(self, slowest: int = 10) -> list[str]:
+        """Return the lines of the end-of-session report: totals, then the tests
+        with the most overhead and the collections with the slowest inserts."""
+        tests = self.tests.values()
+        lines = [
+            f"session init {self.session_init:.3f}s, "
+            f"cleanup {sum(test.cleanup for test in tests):.3f}s, "
+            f"create {sum(test.create for test in tests):.3f}s, "
+            f"test bodies {sum(test.call for test in tests):.3f}s",
+            f"slowest {slowest} tests by scenario overhead (cleanup + create):",
+        ]
+        by_overhead = sorted(self.tests.items(), key=lambda item: -item[1].overhead)
+        for nodeid, test in by_overhead[:slowest]:
+            lines.append(
+                f"  {test.overhead:.3f}s cleanup {test.cleanup:.3f}s create {test.create:.3f}s "
+                f"({test.docs} docs) call {test.call:.3f}s {nodeid}"
+            )
+        lines.append(f"slowest {slowest} collections by insert time:")
+        by_seconds = sorted(self.collections.items(), key=lambda item: -item[1].seconds)
+        for name, collection in by_seconds[:slowest]:
+            lines.append(
+                f"  {collection.seconds:.3f}s {collection.docs} docs {collection.bytes} bytes "
+                f"in {collection.inserts} inserts {name}"
+            )
+        return lines
+
+    def to_dict(self) -> dict:
+        return {
+            "session_init": self.session_init,
+            "tests": {nodeid: asdict(test) for nodeid, test in self.tests.items()},
+            "collections": {name: asdict(profile) for name, profile in self.collections.items()},
+        }
+
+    def dump(self, path: str):
+        """Write the timings as JSON, for tracking them across CI runs."""
+        with open(path, "w") as output:
+            json.dump(self.to_dict(), output, indent=2)
@@ -1,11 +1,36 @@
 import os
+import threading
+import time
+import warnings
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 import pytest
 from pymongo import MongoClient
-from pymongo.database import Database
 
+from pytest_scenarios.async_scenario import AsyncScenarioBuilder
+from pytest_scenarios.memory import MemoryClient
+from pytest_scenarios.profiling import ScenarioProfiler
 from pytest_scenarios.scenario import ScenarioBuilder
-from pytest_scenarios.template_loader import load_templates_from_path
+from pytest_scenarios.template_loader import LazyTemplates, load_templates_from_path
+from pytest_scenarios.tracking import TrackedDatabase
+
+try:
+    import pytest_asyncio
+except ImportError:  # pragma: no cover - async fixtures need pytest-asyncio
+    pytest_asyncio = None
+
+try:
+    from pymongo import AsyncMongoClient
+except ImportError:  # pragma: no cover - async fixtures need pymongo 4.9
+    AsyncMongoClient = None
+
+# Set by the scenario_profiler fixture, read by the reporting hooks.
+_PROFILER_KEY = pytest.StashKey[ScenarioProfiler]()
+_PROFILE_JSON_KEY = pytest.StashKey[str]()
+# Set by the scenario_builder fixture: returns the seconds each template module took to load.
+_TEMPLATE_TIMINGS_KEY = pytest.StashKey[Callable[[], dict[str, float]]]()
 
 
 def _option_to_env_var_name(name: str) -> str:
@@ -25,6 +50,75 @@ def _get_option(
     return value
 
 
+def _is_enabled(value: str | None) -> bool:
+    """Interpret a boolean option value."""
+    return str(value).lower() in ("true", "1", "yes", "on")
+
+
+def _worker_db_name(db_name: str) -> str:
+    """Suffix the database name with the pytest-xdist worker id, if running in a worker."""
+    worker_id = os.getenv("PYTEST_XDIST_WORKER")
+    return f"{db_name}_{worker_id}" if worker_id else db_name
+
+
+def _cache_dir(request: pytest.FixtureRequest) -> str | None:
+    """Directory of pytest-scenarios under .pytest_cache, None if the cache plugin is off."""
+    cache = getattr(request.config, "cache", None)
+    return str(cache.mkdir("pytest-scenarios")) if cache is not None else None
+
+
+def _templates_cache_dir(request: pytest.FixtureRequest) -> str | None:
+    """Directory for evaluated templates, None unless templates-cache is enabled."""
+    if not _is_enabled(_get_option(request, "templates-cache", default="false")):
+        return None
+    return _cache_dir(request)
+
+
+def _client_options(request: pytest.FixtureRequest) -> dict[str, int | str]:
+    """MongoClient keyword arguments from the connection tuning options.
+    Options left empty are not passed, so the db-url or driver defaults apply."""
+    names = {
+        "max-pool-size": "maxPoolSize",
+        "min-pool-size": "minPoolSize",
+        "server-selection-timeout-ms": "serverSelectionTimeoutMS",
+        "compressors": "compressors",
+    }
+    options: dict[str, int | str] = {}
+    for name, keyword in names.items():
+        value = _get_option(request, name, default="")
+        if value:
+            options[keyword] = value if keyword == "compressors" else int(value)
+    return options
+
+
+def _warm_up(client: MongoClient, connections: int) -> None:
+    """Open connections in parallel before the first test, so neither it nor the
+    concurrent inserts pay the connection setup latency.
+    All the threads ping the server at once, each checking out its own connection."""
+    start = time.perf_counter()
+    barrier = threading.Barrier(connections)
+
+    def ping(_):
+        barrier.wait()
+        client.admin.command("ping")
+
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="warm-up") as executor:
+        list(executor.map(ping, range(connections)))
+    print(f"Warmed up {connections} connections in {time.perf_counter() - start:.3f}s")
+
+
+def _write_template_timings(terminalreporter, timings: dict[str, float], slowest: int = 5) -> None:
+    """Write how long loading templates took, and the slowest template modules."""
+    if not timings:
+        return
+    terminalreporter.write_sep("=", "pytest-scenarios templates")
+    terminalreporter.write_line(
+        f"Loaded {len(timings)} template modules in {sum(timings.values()):.3f}s"
+    )
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1])[:slowest]:
+        terminalreporter.write_line(f"  {seconds:.3f}s {name}")
+
+
 def _register_options(group: pytest.OptionGroup, name: str, default: str, help: str) -> None:
     env_var_name = _option_to_env_var_name(name)
     default_from_env = os.getenv(env_var_name, default=default)
@@ -53,6 +147,12 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         default="tests/templates",
         help="Directory containing template modules for pytest-scenarios",
     )
+    _register_options(
+        group,
+        name="scenarios-path",
+        default="tests/scenarios",
+        help="Directory of the scenario files read by the scenario_from_file fixture",
+    )
     _register_options(
         group,
         name="db-name",
@@ -65,6 +165,132 @@ def pytest_addoption(parser: pytest.Parser) -> None:
         default="mongodb://127.0.0.1:27017",
         help="MongoDB connection string used by pytest-scenarios fixtures",
     )
+    _register_options(
+        group,
+        name="cleanup-mode",
+        default="dirty",
+        help="Collections cleared before each test: 'dirty' (only the ones written to) "
+        "or 'paranoid' (every template collection)",
+    )
+    _register_options(
+        group,
+        name="concurrent-inserts",
+        default="false",
+        help="Insert the collections of a scenario in parallel threads ('true' or 'false')",
+    )
+    _register_options(
+        group,
+        name="drop-threshold",
+        default="0",
+        help="Cleanup drops and recreates collections holding at least this many documents, "
+        "instead of deleting them one by one (0 never drops)",
+    )
+    _register_options(
+        group,
+        name="isolation",
+        default="cleanup",
+        help="How tests are isolated: 'cleanup' (clear collections before each test) "
+        "or 'transaction' (abort a per-test transaction, replica sets only)",
+    )
+    _register_options(
+        group,
+        name="lazy-templates",
+        default="false",
+        help="Import each template module on first use of its collection, "
+        "and let MongoDB create collections on first insert ('true' or 'false')",
+    )
+    _register_options(
+        group,
+        name="template-workers",
+        default="1",
+        help="Number of threads importing template modules",
+    )
+    _register_options(
+        group,
+        name="templates-cache",
+        default="false",
+        help="Cache evaluated template modules in .pytest_cache between sessions; "
+        "modules they import and values computed at import time are not refreshed "
+        "('true' or 'false')",
+    )
+    _register_options(
+        group,
+        name="db-backend",
+        default="mongo",
+        help="Database backend: 'mongo' (connect to db-url) "
+        "or 'memory' (in-process store, no server needed)",
+    )
+    _register_options(
+        group,
+        name="max-pool-size",
+        default="",
+        help="Maximum number of connections of the MongoClient pool, "
+        "also the number of concurrent-inserts threads (empty: driver default)",
+    )
+    _register_options(
+        group,
+        name="min-pool-size",
+        default="",
+        help="Connections opened in parallel at session start and kept open "
+        "(empty: driver default, no warm-up)",
+    )
+    _register_options(
+        group,
+        name="server-selection-timeout-ms",
+        default="",
+        help="How long to wait for a suitable MongoDB server, in milliseconds "
+        "(empty: driver default)",
+    )
+    _register_options(
+        group,
+        name="compressors",
+        default="",
+        help="Comma-separated wire protocol compressors, e.g. 'zstd,snappy,zlib' "
+        "(empty: no compression)",
+    )
+    _register_options(
+        group,
+        name="scenarios-profile",
+        default="false",
+        help="Time session init, cleanups and scenario inserts, and report the slowest "
+        "tests and collections at the end of the session ('true' or 'false')",
+    )
+    _register_options(
+        group,
+        name="scenarios-profile-json",
+        default="",
+        help="File the scenarios-profile timings are written to as JSON, enabling it",
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: pytest.Item):
+    """Record the duration of each test body when profiling."""
+    profiler = item.config.stash.get(_PROFILER_KEY, None)
+    start = time.perf_counter()
+    try:
+        return (yield)
+    finally:
+        if profiler is not None:
+            profiler.record_call(item.nodeid, time.perf_counter() - start)
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    """Print how long the templates took to load and the scenarios-profile report,
+    and write its JSON file if configured."""
+    template_timings = config.stash.get(_TEMPLATE_TIMINGS_KEY, None)
+    if template_timings is not None:
+        _write_template_timings(terminalreporter, template_timings())
+    profiler = config.stash.get(_PROFILER_KEY, None)
+    if profiler is None:
+        return
+    terminalreporter.write_sep("=", "pytest-scenarios profile")
+    for line in profiler.report():
+        terminalreporter.write_line(line)
+    json_path = config.stash.get(_PROFILE_JSON_KEY, "")
+    if json_path:
+        profiler.dump(json_path)
+        terminalreporter.write_line(f"profile written to {json_path}")
 
 
 @pytest.fixture(scope="session")
@@ -73,25 +299,200 @@ def templates_path(request: pytest.FixtureRequest):
 
 
 @pytest.fixture(scope="session")
-def mongo_client(request: pytest.FixtureRequest):
-    db_url = _get_option(request, "db-url", default="mongodb://127.0.0.1:27017")
-    with MongoClient(db_url) as client:
+def scenarios_path(request: pytest.FixtureRequest):
+    return _get_option(request, "scenarios-path", default="tests/scenarios")
+
+
+@pytest.fixture(scope="session")
+def db_url(request: pytest.FixtureRequest):
+    return _get_option(request, "db-url", default="mongodb://127.0.0.1:27017")
+
+
+@pytest.fixture(scope="session")
+def db_backend(request: pytest.FixtureRequest):
+    return _get_option(request, "db-backend", default="mongo")
+
+
+@pytest.fixture(scope="session")
+def mongo_client(request: pytest.FixtureRequest, db_url: str, db_backend: str):
+    """Client of the configured backend, tuned by the connection pool options.
+    With min-pool-size, that many connections are opened before the first test.
+    The memory backend ignores db_url and the tuning options."""
+    if db_backend == "memory":
+        with MemoryClient(db_url) as client:
+            yield client
+        return
+    options = _client_options(request)
+    with MongoClient(db_url, **options) as client:
+        if options.get("minPoolSize"):
+            _warm_up(client, options["minPoolSize"])
         yield client
 
 
 @pytest.fixture(scope="session")
 def db(request: pytest.FixtureRequest, mongo_client: MongoClient):
-    db_name = _get_option(request, "db-name", default="test_db")
-    yield mongo_client[db_name]
+    """Database used by the tests.
+    Under pytest-xdist every worker gets its own database, dropped at the end of the session."""
+    configured_db_name = _get_option(request, "db-name", default="test_db")
+    db_name = _worker_db_name(configured_db_name)
+    yield TrackedDatabase(mongo_client[db_name])
+    if db_name != configured_db_name:
+        mongo_client.drop_database(db_name)
+
+
+@pytest.fixture(scope="session")
+def scenario_profiler(request: pytest.FixtureRequest) -> ScenarioProfiler | None:
+    """Profiler of the session when the scenarios-profile option is on, None otherwise."""
+    json_path = _get_option(request, "scenarios-profile-json", default="")
+    enabled = _is_enabled(_get_option(request, "scenarios-profile", default="false"))
+    if not enabled and not json_path:
+        return None
+    profiler = request.config.stash[_PROFILER_KEY] = ScenarioProfiler()
+    request.config.stash[_PROFILE_JSON_KEY] = json_path
+    return profiler
+
+
+@pytest.fixture(scope="session")
+def scenario_baseline() -> dict[str, list[dict]]:
+    """Scenario inserted once per session and restored before each test.
+    Override this fixture in a conftest.py to share reference data across tests."""
+    return {}
 
 
 @pytest.fixture(scope="session")
-def scenario_builder(db: Database, templates_path: str) -> ScenarioBuilder:
-    templates = load_templates_from_path(templates_path)
-    return ScenarioBuilder(db, templates)
+def scenario_builder(
+    request: pytest.FixtureRequest,
+    db: TrackedDatabase,
+    templates_path: str,
+    scenario_baseline: dict[str, list[dict]],
+    scenario_profiler: ScenarioProfiler | None,
+):
+    with scenario_profiler.time_session_init() if scenario_profiler else nullcontext():
+        builder = _build_scenario_builder(
+            request, db, templates_path, scenario_baseline, scenario_profiler
+        )
+    yield builder
+    builder.close()
+
+
+def _build_scenario_builder(
+    request: pytest.FixtureRequest,
+    db: TrackedDatabase,
+    templates_path: str,
+    scenario_baseline: dict[str, list[dict]],
+    profiler: ScenarioProfiler | None,
+) -> ScenarioBuilder:
+    """Load the templates and create the session builder with its baseline."""
+    cache_dir = _templates_cache_dir(request)
+    files_cache_dir = _cache_dir(request)
+    lazy = _is_enabled(_get_option(request, "lazy-templates", default="false"))
+    if lazy:
+        templates = LazyTemplates(templates_path, cache_dir=cache_dir)
+        indexes = templates.indexes
+        # Read at the end of the session, once the tests have imported what they use.
+        request.config.stash[_TEMPLATE_TIMINGS_KEY] = lambda: templates.timings
+    else:
+        workers = int(_get_option(request, "template-workers", default="1"))
+        timings: dict[str, float] = {}
+        indexes = {}
+        templates = load_templates_from_path(
+            templates_path, cache_dir=cache_dir, workers=workers, timings=timings, indexes=indexes
+        )
+        request.config.stash[_TEMPLATE_TIMINGS_KEY] = lambda: timings
+    concurrent = _get_option(request, "concurrent-inserts", default="false")
+    drop_threshold = int(_get_option(request, "drop-threshold", default="0"))
+    builder = ScenarioBuilder(
+        db,
+        templates,
+        concurrent=_is_enabled(concurrent),
+        lazy=lazy,
+        indexes=indexes,
+        drop_threshold=drop_threshold,
+        profiler=profiler,
+        files_cache_dir=os.path.join(files_cache_dir, "scenarios") if files_cache_dir else None,
+    )
+    if scenario_baseline:
+        builder.set_baseline(scenario_baseline)
+    return builder
+
+
+@pytest.fixture
+def scenario_from_file(
+    scenario_builder: ScenarioBuilder, scenarios_path: str
+) -> Callable[..., dict[str, list]]:
+    """Create the scenario of a file under scenarios-path, e.g.
+    scenario_from_file("checkout.json"). Keyword arguments are passed to create_from_file."""
+
+    def create(name: str, **kwargs) -> dict[str, list]:
+        return scenario_builder.create_from_file(os.path.join(scenarios_path, name), **kwargs)
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def cleanup_mode(request: pytest.FixtureRequest):
+    return _get_option(request, "cleanup-mode", default="dirty")
+
+
+@pytest.fixture(scope="session")
+def isolation(request: pytest.FixtureRequest, scenario_builder: ScenarioBuilder) -> str:
+    isolation = _get_option(request, "isolation", default="cleanup")
+    if isolation == "transaction" and not scenario_builder.supports_transactions():
+        warnings.warn(
+            "pytest-scenarios: transaction isolation needs a replica set or sharded cluster, "
+            "falling back to cleanup isolation",
+            stacklevel=1,
+        )
+        return "cleanup"
+    return isolation
 
 
 @pytest.fixture(scope="function", autouse=True)
-def cleanup_database(scenario_builder: ScenarioBuilder):
-    """Clear all collections in the database before each test function."""
-    scenario_builder.cleanup_collections()
+def cleanup_database(
+    request: pytest.FixtureRequest,
+    scenario_builder: ScenarioBuilder,
+    cleanup_mode: str,
+    isolation: str,
+):
+    """Clear the collections written by previous tests before each test function.
+    Collections seeded by scenario_baseline are restored to the baseline instead.
+    With transaction isolation, the test also runs inside a transaction that is
+    aborted afterwards, so its writes never need cleaning."""
+    profiler = scenario_builder.profiler
+    if profiler is not None:
+        profiler.start_test(request.node.nodeid)
+    with profiler.time_cleanup() if profiler is not None else nullcontext():
+        scenario_builder.cleanup_collections(paranoid=cleanup_mode == "paranoid")
+    if isolation == "transaction":
+        with scenario_builder.transaction():
+            yield
+    else:
+        yield
+
+
+if pytest_asyncio is not None and AsyncMongoClient is not None:
+
+    @pytest_asyncio.fixture(scope="session", loop_scope="session")
+    async def async_mongo_client(request: pytest.FixtureRequest, db_url: str, db_backend: str):
+        """Async client of the mongo backend, tuned like mongo_client.
+        It is bound to the session event loop, so async tests using it must run in that loop:
+        mark them with pytest.mark.asyncio(loop_scope="session") or set
+        asyncio_default_test_loop_scope = session."""
+        if db_backend == "memory":
+            pytest.skip("async fixtures need the mongo db-backend")
+        async with AsyncMongoClient(db_url, **_client_options(request)) as client:
+            yield client
+
+    @pytest.fixture
+    def async_db(async_mongo_client, db: TrackedDatabase, isolation: str) -> TrackedDatabase:
+        """Async handle on the test database, sharing dirty-collection tracking with db.
+        Its writes cannot join the test transaction, so transaction isolation skips the test."""
+        if isolation == "transaction":
+            pytest.skip("async fixtures do not support transaction isolation")
+        return db.share_tracking(async_mongo_client[db.name])
+
+    @pytest.fixture
+    def async_scenario_builder(
+        async_db: TrackedDatabase, scenario_builder: ScenarioBuilder
+    ) -> AsyncScenarioBuilder:
+        return AsyncScenarioBuilder(async_db, scenario_builder.templates, scenario_builder)
@@ -0,0 +1,109 @@
+"""
+Placeholders linking the documents of a scenario across collections.
+
+    builder.create(
+        {
+            "customers": [{"name": "Alice"}],
+            "orders": [{"customer_id": ref("customers", 0, "customer_id")}],
+        }
+    )
+
+A collection is inserted after the collections it references, so placeholders are
+replaced by values of documents that were actually inserted, template defaults included.
+"""
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+
+class Ref:
+    """Placeholder for a field of another document of the same scenario, see ref."""
+
+    __slots__ = ("collection", "index", "field")
+
+    def __init__(self, collection: str, index: int, field: str):
+        self.collection = collection
+        self.index = index
+        self.field = field
+
+    def __repr__(self) -> str:
+        return f"ref({self.collection!r}, {self.index}, {self.field!r})"
+
+
+def ref(collection: str, index: int = 0, field: str = "_id") -> Ref:
+    """Return a placeholder for a field of a document inserted by the same scenario.
+
+    Args:
+        collection: Name of the referenced collection, which must be part of the scenario.
+        index: Position of the referenced document within the collection's documents.
+        field: Field of the referenced document, dotted paths included. Defaults to its _id.
+    """
+    return Ref(collection, index, field)
+
+
+def dependency_waves(scenario: Mapping[str, list[dict]]) -> list[list[str]] | None:
+    """Group the collections of a scenario in waves that can be inserted concurrently.
+    Each wave only references collections of the previous waves.
+    Returns None when the scenario has no references at all.
+    Raises ValueError for references to collections missing from the scenario,
+    and for circular references, a collection referencing itself included."""
+    dependencies = {
+        name: {placeholder.collection for placeholder in _iter_refs(docs)}
+        for name, docs in scenario.items()
+    }
+    if not any(dependencies.values()):
+        return None
+    for name, referenced in dependencies.items():
+        missing = referenced - scenario.keys()
+        if missing:
+            raise ValueError(
+                f"Collection {name} references {', '.join(sorted(missing))}, "
+                "which is not part of the scenario"
+            )
+    waves = []
+    done: set[str] = set()
+    while dependencies:
+        wave = [name for name, referenced in dependencies.items() if referenced <= done]
+        if not wave:
+            raise ValueError(
+                f"Circular references between collections: {', '.join(sorted(dependencies))}"
+            )
+        waves.append(wave)
+        done.update(wave)
+        for name in wave:
+            del dependencies[name]
+    return waves
+
+
+def resolve_refs(value: Any, inserted: Mapping[str, list[dict]]) -> Any:
+    """Return a copy of value with its placeholders replaced by the referenced values.
+    Args:
+        inserted: The documents of the referenced collections, as inserted.
+    """
+    if isinstance(value, Ref):
+        try:
+            doc = inserted[value.collection][value.index]
+        except IndexError:
+            raise ValueError(f"{value!r} is out of range") from None
+        for part in value.field.split("."):
+            try:
+                doc = doc[int(part)] if isinstance(doc, list) else doc[part]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise ValueError(f"{value!r} does not exist") from None
+        return doc
+    if isinstance(value, Mapping):
+        return {key: resolve_refs(item, inserted) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_refs(item, inserted) for item in value]
+    return value
+
+
+def _iter_refs(value: Any) -> Iterator[Ref]:
+    if isinstance(value, Ref):
+        yield value
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _iter_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_refs(item)
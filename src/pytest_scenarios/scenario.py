@@ -1,67 +1,724 @@
-from collections.abc import Iterable
+import copy
+import functools
+import hashlib
+import time
+import warnings
+from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any
 
+import bson
 from bson import ObjectId
+from bson.codec_options import CodecOptions, TypeRegistry
+from bson.raw_bson import RawBSONDocument
+from pymongo import IndexModel, InsertOne, ReplaceOne
+from pymongo.client_session import ClientSession
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+
+from pytest_scenarios.factories import many
+from pytest_scenarios.profiling import ScenarioProfiler
+from pytest_scenarios.references import Ref, dependency_waves, resolve_refs
+from pytest_scenarios.scenario_files import load_scenario_file
+from pytest_scenarios.template import CompiledTemplate
+from pytest_scenarios.tracking import TrackedDatabase
+
+# Bounds of each batch when streaming large scenarios.
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_BATCH_BYTES = 16 * 1024 * 1024
+# Index options compared with the declared indexes, besides their keys.
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+@dataclass
+class FailedDocument:
+    """A document the server refused to insert."""
+
+    index: int
+    code: int | None
+    message: str
+    document: Mapping
+
+
+class ScenarioInsertError(ValueError):
+    """Raised when some documents of a scenario could not be inserted.
+    The failures attribute maps each collection name to its failed documents."""
+
+    def __init__(self, failures: dict[str, list[FailedDocument]], reason: str | None = None):
+        self.failures = failures
+        details = "; ".join(
+            f"{name}[{failure.index}]: {failure.message}"
+            for name, collection_failures in failures.items()
+            for failure in collection_failures
+        )
+        message = "Failed to insert all documents"
+        if details or reason:
+            message = f"{message}: {details or reason}"
+        super().__init__(message)
+
+    @classmethod
+    def from_bulk_write_error(
+        cls, collection_name: str, docs: list[Mapping], error: BulkWriteError, offset: int = 0
+    ) -> "ScenarioInsertError":
+        """Build the error from a BulkWriteError raised by insert_many(docs).
+        Args:
+            offset: Position of docs[0] within all the documents of the collection.
+        """
+        failures = [
+            FailedDocument(
+                index=offset + write_error["index"],
+                code=write_error.get("code"),
+                message=write_error.get("errmsg", ""),
+                document=docs[write_error["index"]],
+            )
+            for write_error in error.details.get("writeErrors", [])
+        ]
+        return cls({collection_name: failures}, reason=str(error))
+
+    @classmethod
+    def merge(cls, errors: Iterable["ScenarioInsertError"]) -> "ScenarioInsertError":
+        """Combine the errors of several collections into one."""
+        failures: dict[str, list[FailedDocument]] = {}
+        for error in errors:
+            for name, collection_failures in error.failures.items():
+                failures.setdefault(name, []).extend(collection_failures)
+        return cls(failures)
 
 
 class ScenarioBuilder:
-    def __init__(self, db: Database, templates: dict[str, dict]):
+    # Factory of generated documents, so tests only need the builder: builder.many(...)
+    many = staticmethod(many)
+
+    def __init__(
+        self,
+        db: Database | TrackedDatabase,
+        templates: Mapping[str, dict],
+        concurrent: bool = False,
+        lazy: bool = False,
+        indexes: Mapping[str, list] | None = None,
+        drop_threshold: int = 0,
+        profiler: ScenarioProfiler | None = None,
+        files_cache_dir: str | None = None,
+    ):
         """Initialize the ScenarioBuilder with a MongoDB database and templates.
         Args:
             db: The MongoDB database instance.
-            templates: A dictionary of templates to be used as blueprints for creating documents.
+            It is wrapped in a TrackedDatabase (unless it already is one)
+            so writes to each collection are recorded for cleanup.
+            templates: A mapping of templates to be used as blueprints for creating documents.
             The keys are collection names and the values are the template documents.
+            Each template is compiled on first use and documents are deep-merged into it,
+            so a LazyTemplates mapping only imports the templates that are used.
             We also create the collections in the database.
+            concurrent: If True, the collections of a scenario are inserted in parallel
+            by a thread pool sized to the MongoClient connection pool.
+            lazy: If True, collections are not created up front:
+            MongoDB creates each one on its first insert.
+            indexes: Optional index declarations by collection name, usually the INDEXES
+            lists of the template modules. Each one is a pymongo IndexModel, or the keys
+            IndexModel accepts. They are created once, up front or on first insert when
+            lazy, and kept across cleanups. Existing indexes that differ raise a warning.
+            drop_threshold: Cleanup drops and recreates collections holding at least this
+            many documents instead of deleting them one by one. 0 never drops.
+            profiler: Optional ScenarioProfiler recording how long each scenario takes to
+            create, and the duration, document count and BSON size of every insert.
+            Sizes are only computed when profiling.
+            files_cache_dir: Optional directory where create_from_file keeps parsed
+            scenario files across sessions.
         """
-        self._db = db
+        self._db = db if isinstance(db, TrackedDatabase) else TrackedDatabase(db)
         self._templates = templates
-        self._init_collections()
+        self._compiled_templates: dict[str, CompiledTemplate] = {}
+        self._baseline: dict[str, dict[ObjectId, dict]] = {}
+        self._cached: dict[Hashable, dict[str, list[ObjectId]]] = {}
+        self._indexes = indexes or {}
+        self._indexed: set[str] = set()
+        self._drop_threshold = drop_threshold
+        self.profiler = profiler
+        self._files_cache_dir = files_cache_dir
+        self._executor = (
+            ThreadPoolExecutor(
+                max_workers=self._db.client.options.pool_options.max_pool_size or None,
+                thread_name_prefix="ScenarioBuilder",
+            )
+            if concurrent
+            else None
+        )
+        if not lazy:
+            self._init_collections()
+            for collection_name in self._indexes:
+                self._ensure_indexes(collection_name)
+        # Data left behind by a previous session is unknown, so the first cleanup sweeps all.
+        self._db.mark_dirty(*self.collections)
 
     def create(
-        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False
+        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False, ordered: bool = True
     ) -> dict[str, list[ObjectId]]:
         """Create a scenario with the given steps.
         The scenario is a dictionary where keys are collection names
         and values are iterables of documents to insert into those collections.
+        Documents can link to documents of other collections with ref placeholders,
+        see pytest_scenarios.references.
+        This method returns a dictionary of collection names and list of inserted document IDs.
+        Args:
+            ordered: If False, the server may apply the inserts in any order and keeps going
+            after a failed document; every collection is attempted and all failures are
+            reported together in a single ScenarioInsertError.
+        """
+        with self._time_create():
+            inserted_ids = dict(self._create(scenario, add_scenario_id, ordered))
+        # Dependency waves may insert collections out of order.
+        return {collection_name: inserted_ids[collection_name] for collection_name in scenario}
+
+    def create_from_file(
+        self, path: str, add_scenario_id=False, ordered: bool = True
+    ) -> dict[str, list[ObjectId]]:
+        """Create the scenario stored in a JSON (Extended JSON), BSON or YAML file,
+        see pytest_scenarios.scenario_files. Parsed JSON and YAML files are cached by
+        content hash, so loading the same file again costs little more than inserting it.
+        This method returns a dictionary of collection names and list of inserted document IDs.
+        """
+        scenario = load_scenario_file(path, self._files_cache_dir)
+        return self.create(scenario, add_scenario_id, ordered)
+
+    def create_cached(
+        self,
+        scenario: dict[str, Iterable[dict]],
+        key: Hashable | None = None,
+        add_scenario_id=False,
+    ) -> dict[str, list[ObjectId]]:
+        """Create a read-only scenario once and reuse it until its collections are written.
+        The first call inserts the scenario like create, but its collections are not marked
+        dirty, so cleanup leaves them alone. Later calls with the same key return the same
+        document IDs without inserting anything. As soon as any of those collections is
+        written to and cleaned, the cached scenario is dropped and the next call inserts
+        it again. Cached documents stay visible to every test until then.
+        Inside a transaction the scenario is created as usual and not cached,
+        since aborting the transaction undoes it.
         This method returns a dictionary of collection names and list of inserted document IDs.
+        Args:
+            key: Identifies the scenario in the cache. Defaults to a hash of its documents.
         """
-        return dict(self._create(scenario, add_scenario_id))
+        if self._db.session is not None:
+            return self.create(scenario, add_scenario_id)
+        scenario = {name: list(docs) for name, docs in scenario.items()}
+        if key is None:
+            key = _scenario_key(scenario, add_scenario_id)
+        cached = self._cached.get(key)
+        if cached is None:
+            dirty_before = self.dirty_collections
+            cached = self._cached[key] = self.create(scenario, add_scenario_id)
+            # Collections the test had already written to are still cleaned, evicting the cache.
+            self._db.reset_dirty(set(cached) - dirty_before)
+        return {name: list(ids) for name, ids in cached.items()}
+
+    def drop_cached(self, key: Hashable):
+        """Forget a scenario created by create_cached and mark its collections dirty,
+        so the next cleanup removes its documents. This lets a module-scoped fixture
+        limit a cached scenario to the tests of one module."""
+        cached = self._cached.pop(key, None)
+        if cached:
+            self._db.mark_dirty(*cached)
+
+    def _evict_cached(self, collection_names: Iterable[str]):
+        """Drop the cached scenarios with documents in any of the given collections."""
+        names = set(collection_names)
+        self._cached = {
+            key: cached for key, cached in self._cached.items() if names.isdisjoint(cached)
+        }
 
     def _create(
-        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False
+        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False, ordered: bool = True
     ) -> Iterable[tuple[str, list[ObjectId]]]:
         """Create a scenario with the given steps.
         The scenario is a dictionary where keys are collection names
         and values are iterables of documents to insert into those collections.
         This method yields tuples of collection name and list of inserted document IDs.
-        They are only created when iterating over the returned iterable."""
+        They are only created when iterating over the returned iterable.
+        When documents hold ref placeholders, collections are inserted in dependency waves:
+        a collection is inserted once the collections it references are, and its
+        placeholders are replaced by values of the inserted documents.
+        Each wave is inserted like a scenario without references."""
+        scenario_id = ObjectId()
+        scenario_doc = {"scenario_id": scenario_id} if add_scenario_id else {}
+        scenario = {name: list(docs) for name, docs in scenario.items()}
+        waves = dependency_waves(scenario)
+        if waves is None:
+            insert = functools.partial(
+                self._insert, scenario_id=scenario_id, scenario_doc=scenario_doc, ordered=ordered
+            )
+            yield from self._insert_wave(
+                {name: functools.partial(insert, name, docs) for name, docs in scenario.items()},
+                ordered,
+            )
+            return
+
+        inserted: dict[str, list[dict]] = {}
+        errors = []
+        for wave in waves:
+            tasks = {}
+            for collection_name in wave:
+                docs = self._merge(
+                    collection_name, resolve_refs(scenario[collection_name], inserted), scenario_doc
+                )
+                for doc in docs:
+                    # Assigned up front, so documents referencing this one can be resolved.
+                    doc.setdefault("_id", ObjectId())
+                inserted[collection_name] = docs
+                tasks[collection_name] = functools.partial(
+                    self._insert_merged, collection_name, docs, scenario_id, ordered
+                )
+            try:
+                yield from self._insert_wave(tasks, ordered)
+            except ScenarioInsertError as error:
+                if ordered:
+                    raise
+                errors.append(error)
+        if errors:
+            raise ScenarioInsertError.merge(errors)
+
+    def _insert_wave(
+        self, inserts: dict[str, Callable[[], list[ObjectId]]], ordered: bool
+    ) -> Iterator[tuple[str, list[ObjectId]]]:
+        """Run the inserts of independent collections, yielding their inserted IDs.
+        In concurrent mode all collections are submitted to the thread pool at once,
+        except while a transaction session is bound, as sessions are not thread-safe."""
+        if self._executor is None or self._db.session is not None:
+            results = inserts.items()
+        else:
+            futures = {
+                collection_name: self._executor.submit(insert)
+                for collection_name, insert in inserts.items()
+            }
+            wait(futures.values())
+            results = (
+                (collection_name, future.result) for collection_name, future in futures.items()
+            )
+
+        errors = []
+        for collection_name, get_inserted_ids in results:
+            try:
+                inserted_ids = get_inserted_ids()
+            except ScenarioInsertError as error:
+                if ordered:
+                    raise
+                errors.append(error)
+                continue
+            yield collection_name, inserted_ids
+        if errors:
+            raise ScenarioInsertError.merge(errors)
+
+    def _insert(
+        self,
+        collection_name: str,
+        docs: Iterable[dict],
+        scenario_id: ObjectId,
+        scenario_doc: dict,
+        ordered: bool = True,
+    ) -> list[ObjectId]:
+        """Insert the documents of one collection merged with its template.
+        With large templates, they are encoded straight to BSON from the template's
+        cached encoding, so only the fields each document overrides are encoded."""
+        template = self._compiled_template(collection_name)
+        codec_options = self._db[collection_name].codec_options
+        if not template.splices(codec_options):
+            docs_to_insert = self._merge(collection_name, docs, scenario_doc)
+            return self._insert_merged(collection_name, docs_to_insert, scenario_id, ordered)
+        encoded = [template.encode(doc, scenario_doc, codec_options=codec_options) for doc in docs]
+        return self._insert_encoded(collection_name, encoded, scenario_id, ordered)
+
+    def _merge(self, collection_name: str, docs: Iterable[dict], scenario_doc: dict) -> list[dict]:
+        """Merge documents with the template of their collection."""
+        template = self._compiled_template(collection_name)
+        return [template.merge(doc, scenario_doc) for doc in docs]
+
+    def _insert_merged(
+        self,
+        collection_name: str,
+        docs_to_insert: list[dict],
+        scenario_id: ObjectId,
+        ordered: bool = True,
+    ) -> list[ObjectId]:
+        """Insert documents already merged with their template."""
+        self._ensure_indexes(collection_name)
+        collection = self._db[collection_name]
+        start = time.perf_counter()
+        try:
+            result = collection.insert_many(
+                docs_to_insert, ordered=ordered, comment=f"ScenarioBuilder {scenario_id}"
+            )
+        except BulkWriteError as error:
+            raise ScenarioInsertError.from_bulk_write_error(
+                collection_name, docs_to_insert, error
+            ) from error
+        if self.profiler is not None:
+            self.profiler.record_insert(
+                collection_name,
+                len(docs_to_insert),
+                sum(len(bson.encode(doc)) for doc in docs_to_insert),
+                time.perf_counter() - start,
+            )
+        if len(result.inserted_ids) != len(docs_to_insert):
+            raise ScenarioInsertError({collection_name: []})
+        return result.inserted_ids
+
+    def _insert_encoded(
+        self,
+        collection_name: str,
+        encoded: list[tuple[ObjectId, RawBSONDocument]],
+        scenario_id: ObjectId,
+        ordered: bool = True,
+    ) -> list[ObjectId]:
+        """Insert BSON-encoded documents, returning their IDs.
+        They are sent with bulk_write, as insert_many does not report how many
+        RawBSONDocument were inserted."""
+        self._ensure_indexes(collection_name)
+        collection = self._db[collection_name]
+        raws = [raw for _, raw in encoded]
+        start = time.perf_counter()
+        try:
+            result = collection.bulk_write(
+                [InsertOne(raw) for raw in raws],
+                ordered=ordered,
+                comment=f"ScenarioBuilder {scenario_id}",
+            )
+        except BulkWriteError as error:
+            raise ScenarioInsertError.from_bulk_write_error(collection_name, raws, error) from error
+        if self.profiler is not None:
+            self.profiler.record_insert(
+                collection_name,
+                len(raws),
+                sum(len(raw.raw) for raw in raws),
+                time.perf_counter() - start,
+            )
+        if result.acknowledged and result.inserted_count != len(raws):
+            raise ScenarioInsertError({collection_name: []})
+        return [doc_id for doc_id, _ in encoded]
+
+    def iter_create(
+        self,
+        scenario: dict[str, Iterable[dict]],
+        add_scenario_id=False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        ordered: bool = True,
+    ) -> Iterator[tuple[str, list[ObjectId]]]:
+        """Create a scenario by streaming its documents in bounded batches.
+        Documents can come from generators: they are merged with the template and
+        BSON-encoded one at a time, and sent in a bulk write whenever a batch reaches
+        batch_size documents or max_batch_bytes bytes, so memory stays flat however
+        large the scenario is. Unlike create, ref placeholders are not resolved.
+        This method yields a tuple of collection name and inserted document IDs per batch.
+        They are only created when iterating over the returned iterator.
+        Args:
+            ordered: Passed to bulk_write; False lets the server apply writes in any order.
+            Failed documents raise a ScenarioInsertError indexed from the collection's start,
+            as does a batch of which fewer documents than sent are inserted.
+        """
         scenario_id = ObjectId()
         scenario_doc = {"scenario_id": scenario_id} if add_scenario_id else {}
         for collection_name, docs in scenario.items():
+            self._ensure_indexes(collection_name)
             collection = self._db[collection_name]
-            template = self._templates.get(collection_name, {})
-            docs_to_insert = [template | doc | scenario_doc for doc in docs]
-            result = collection.insert_many(
-                docs_to_insert, comment=f"ScenarioBuilder {scenario_id}"
+            template = self._compiled_template(collection_name)
+            codec_options = collection.codec_options
+            raw_docs = (
+                template.encode(doc, scenario_doc, codec_options=codec_options) for doc in docs
             )
-            if len(result.inserted_ids) != len(docs_to_insert):
-                raise ValueError("Failed to insert all documents")
+            offset = 0
+            for batch in _batched(raw_docs, batch_size, max_batch_bytes):
+                raws = [raw for _, raw in batch]
+                start = time.perf_counter()
+                try:
+                    result = collection.bulk_write(
+                        [InsertOne(raw) for raw in raws],
+                        ordered=ordered,
+                        comment=f"ScenarioBuilder {scenario_id}",
+                    )
+                except BulkWriteError as error:
+                    raise ScenarioInsertError.from_bulk_write_error(
+                        collection_name, raws, error, offset
+                    ) from error
+                if self.profiler is not None:
+                    self.profiler.record_insert(
+                        collection_name,
+                        len(raws),
+                        sum(len(raw.raw) for raw in raws),
+                        time.perf_counter() - start,
+                    )
+                if result.acknowledged and result.inserted_count != len(raws):
+                    raise ScenarioInsertError({collection_name: []})
+                offset += len(batch)
+                # PyMongo does not report the ids of RawBSONDocument inserts.
+                yield collection_name, [doc_id for doc_id, _ in batch]
+
+    def create_streaming(
+        self,
+        scenario: dict[str, Iterable[dict]],
+        add_scenario_id=False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_batch_bytes: int = DEFAULT_BATCH_BYTES,
+        ordered: bool = True,
+    ) -> dict[str, int]:
+        """Create a scenario in bounded batches, see iter_create.
+        This method returns a dictionary of collection names and number of inserted documents,
+        instead of keeping every inserted document ID in memory.
+        """
+        counts = dict.fromkeys(scenario, 0)
+        with self._time_create():
+            for collection_name, inserted_ids in self.iter_create(
+                scenario, add_scenario_id, batch_size, max_batch_bytes, ordered
+            ):
+                counts[collection_name] += len(inserted_ids)
+        return counts
 
-            yield collection_name, result.inserted_ids
+    def _time_create(self) -> AbstractContextManager:
+        return self.profiler.time_create() if self.profiler is not None else nullcontext()
 
     def _init_collections(self) -> Iterable[dict]:
         """Register templates in the database.
         The templates is a dictionary where keys are collection names
-        and values are iterables of documents to insert into those collections."""
+        and values are iterables of documents to insert into those collections.
+        Collections that already exist are listed in a single round-trip and skipped."""
+        existing = set(self._db.list_collection_names())
         for collection_name in self._templates:
-            self._db.create_collection(collection_name, check_exists=False)
+            if collection_name not in existing:
+                self._db.create_collection(collection_name, check_exists=False)
+
+    def _ensure_indexes(self, collection_name: str):
+        """Create the declared indexes of a collection, once per builder.
+        Only the missing ones are created, and a warning lists the existing indexes
+        that are not declared or have different keys or INDEX_OPTIONS."""
+        if collection_name in self._indexed:
+            return
+        self._indexed.add(collection_name)
+        declared = {
+            model.document["name"]: model
+            for model in map(_index_model, self._indexes.get(collection_name, ()))
+        }
+        if not declared:
+            return
+        collection = self._db.database[collection_name]
+        existing = collection.index_information()
+        drift = sorted(
+            name
+            for name, info in existing.items()
+            if name != "_id_"
+            and (
+                name not in declared
+                or list(info["key"]) != list(declared[name].document["key"].items())
+                or _index_options(info) != _index_options(declared[name].document)
+            )
+        )
+        if drift:
+            warnings.warn(
+                f"pytest-scenarios: indexes of collection {collection_name} differ from "
+                f"its template: {', '.join(drift)}",
+                stacklevel=2,
+            )
+        missing = [model for name, model in declared.items() if name not in existing]
+        if missing:
+            collection.create_indexes(missing)
+
+    def _compiled_template(self, collection_name: str) -> CompiledTemplate:
+        """Return the compiled template of a collection, an empty one if it has none.
+        Templates are compiled on first use."""
+        template = self._compiled_templates.get(collection_name)
+        if template is None:
+            template = self._compiled_templates[collection_name] = CompiledTemplate(
+                self._templates.get(collection_name, {})
+            )
+        return template
 
     @property
     def collections(self) -> Iterable[str]:
         """Return the collection names managed by this ScenarioBuilder."""
         return self._templates.keys()
 
-    def cleanup_collections(self):
-        """Clear all collections managed by this ScenarioBuilder."""
-        for name in self.collections:
+    @property
+    def templates(self) -> Mapping[str, dict]:
+        """Return the templates by collection name."""
+        return self._templates
+
+    def close(self):
+        """Shut down the thread pool used in concurrent mode."""
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    @property
+    def dirty_collections(self) -> set[str]:
+        """Return the collection names written since the last cleanup."""
+        return self._db.dirty_collections
+
+    def set_baseline(
+        self, scenario: dict[str, Iterable[dict]], add_scenario_id=False
+    ) -> dict[str, list[ObjectId]]:
+        """Insert a scenario that cleanup restores instead of wiping.
+        The collections in the scenario are emptied, the scenario is created and
+        a snapshot of the inserted documents is kept in memory.
+        From then on, cleanup_collections brings those collections back to the snapshot
+        by undoing only the documents added, changed or deleted since.
+        This method returns a dictionary of collection names and list of inserted document IDs.
+        """
+        # Collections of a replaced baseline must be wiped by the next cleanup.
+        self._db.mark_dirty(*self._baseline)
+        self._evict_cached(scenario)
+        for name in scenario:
             self._db[name].delete_many({})
+        inserted_ids_by_collection = self.create(scenario, add_scenario_id)
+        self._baseline = {
+            name: {doc["_id"]: doc for doc in self._db[name].find({"_id": {"$in": ids}})}
+            for name, ids in inserted_ids_by_collection.items()
+        }
+        self._db.reset_dirty(self._baseline)
+        return inserted_ids_by_collection
+
+    @property
+    def baseline(self) -> dict[str, list[dict]]:
+        """Return the baseline documents by collection name."""
+        return {name: copy.deepcopy(list(docs.values())) for name, docs in self._baseline.items()}
+
+    def cleanup_collections(self, paranoid: bool = False):
+        """Clear the collections written since the last cleanup.
+        Collections holding baseline documents are restored to the baseline instead.
+        Args:
+            paranoid: If True, clear every collection managed by this ScenarioBuilder
+            as well as the dirty ones, even if no write was recorded for them.
+        """
+        names = self._collections_to_clean(paranoid)
+        for name in sorted(names):
+            if name in self._baseline:
+                self._restore_collection(name)
+            else:
+                self._clear_collection(name)
+        self._db.reset_dirty(names)
+
+    def _collections_to_clean(self, paranoid: bool) -> set[str]:
+        """Return the collections the next cleanup clears or restores,
+        dropping the cached scenarios with documents in any of them."""
+        names = self.dirty_collections
+        if paranoid:
+            names.update(self.collections, self._baseline)
+        self._evict_cached(names)
+        return names
+
+    def _clear_collection(self, name: str):
+        """Remove every document of a collection.
+        Collections holding at least drop_threshold documents are dropped and recreated
+        with the same options and indexes, much faster than deleting each document."""
+        collection = self._db[name]
+        if not self._drop_threshold or (
+            collection.estimated_document_count() < self._drop_threshold
+        ):
+            collection.delete_many({})
+            return
+        options = collection.options()
+        indexes = [_index_from_info(info) for info in collection.list_indexes()]
+        self._db.drop_collection(name)
+        self._db.create_collection(name, **options)
+        indexes = [index for index in indexes if index.document["name"] != "_id_"]
+        if indexes:
+            self._db.database[name].create_indexes(indexes)
+
+    def _restore_collection(self, name: str):
+        """Bring a collection back to its baseline documents.
+        Documents added since are deleted, and baseline documents that were changed
+        or deleted are written back in a single bulk operation."""
+        collection = self._db[name]
+        baseline_ids = list(self._baseline[name])
+        collection.delete_many({"_id": {"$nin": baseline_ids}})
+        changes = self._restore_requests(name, collection.find({"_id": {"$in": baseline_ids}}))
+        if changes:
+            collection.bulk_write(changes, ordered=False)
+
+    def _restore_requests(self, name: str, current: Iterable[dict]) -> list[ReplaceOne]:
+        """Return the writes bringing the current baseline documents of a collection
+        back to their snapshot, writing back the changed and deleted ones."""
+        current_by_id = {doc["_id"]: doc for doc in current}
+        return [
+            ReplaceOne({"_id": doc_id}, doc, upsert=True)
+            for doc_id, doc in self._baseline[name].items()
+            if current_by_id.get(doc_id) != doc
+        ]
+
+    def supports_transactions(self) -> bool:
+        """Return whether the server is a replica set or sharded cluster member,
+        the deployments where multi-document transactions are available."""
+        hello = self._db.client.admin.command("hello")
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    @contextmanager
+    def transaction(self) -> Iterator[ClientSession]:
+        """Run the enclosed block inside a transaction that is always aborted.
+        While it is active, create and every collection obtained from the tracked
+        database route through the transaction's session, so aborting it undoes
+        their writes and those collections no longer need cleaning."""
+        dirty_before = self.dirty_collections
+        with self._db.client.start_session() as session:
+            session.start_transaction()
+            self._db.bind_session(session)
+            try:
+                yield session
+            finally:
+                self._db.bind_session(None)
+                if session.in_transaction:
+                    session.abort_transaction()
+        self._db.reset_dirty(self.dirty_collections - dirty_before)
+
+
+def _index_model(index: IndexModel | str | list) -> IndexModel:
+    return index if isinstance(index, IndexModel) else IndexModel(index)
+
+
+def _index_options(index: Mapping) -> dict[str, Any]:
+    """Return the INDEX_OPTIONS set on an index description or document."""
+    return {
+        option: index[option]
+        for option in INDEX_OPTIONS
+        if option in index and index[option] is not False
+    }
+
+
+def _index_from_info(info: Mapping) -> IndexModel:
+    """Rebuild an index from its list_indexes description."""
+    options = {key: value for key, value in info.items() if key not in ("v", "key", "ns")}
+    return IndexModel(list(info["key"].items()), **options)
+
+
+def _encode_ref(value):
+    """Encode ref placeholders by what they reference, so scenarios holding them can be hashed."""
+    if isinstance(value, Ref):
+        return {"$scenarioRef": [value.collection, value.index, value.field]}
+    return value
+
+
+_KEY_CODEC_OPTIONS = CodecOptions(type_registry=TypeRegistry(fallback_encoder=_encode_ref))
+
+
+def _scenario_key(scenario: dict[str, list[dict]], add_scenario_id: bool) -> str:
+    """Return a hash identifying the documents of a scenario."""
+    encoded = bson.encode(
+        {"scenario": scenario, "add_scenario_id": add_scenario_id},
+        codec_options=_KEY_CODEC_OPTIONS,
+    )
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _batched(
+    raw_docs: Iterable[tuple[ObjectId, RawBSONDocument]], batch_size: int, max_batch_bytes: int
+) -> Iterator[list[tuple[ObjectId, RawBSONDocument]]]:
+    """Group encoded documents into batches bounded by count and byte size.
+    A single document larger than max_batch_bytes gets a batch of its own."""
+    batch: list[tuple[ObjectId, RawBSONDocument]] = []
+    batch_bytes = 0
+    for doc_id, raw in raw_docs:
+        size = len(raw.raw)
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_batch_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append((doc_id, raw))
+        batch_bytes += size
+    if batch:
+        yield batch
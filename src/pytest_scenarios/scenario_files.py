@@ -0,0 +1,154 @@
+"""
+Scenarios stored in files instead of Python literals: a mapping of collection names
+to lists of documents, like the argument of ScenarioBuilder.create.
+
+- .json: Extended JSON, e.g. {"orders": [{"_id": {"$oid": "..."}, "total": 10}]}
+- .bson: one or more concatenated BSON documents, each mapping collection names to lists
+  of documents. The lists of the same collection are concatenated, so a file can exceed
+  the 16MB limit of a single document. BSON decoding costs close to unpickling, so
+  these files are not cached: they are memory-mapped and decoded on every load, and the
+  decoded documents are the only copy held in memory.
+- .yaml / .yml: plain YAML, when PyYAML is installed.
+
+JSON and YAML files are read whole and parsed once: the result is cached by content hash
+in memory, up to MAX_CACHED_BYTES, and optionally on disk, in one cache file per source
+file that each new version replaces.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+
+import bson
+from bson import json_util
+from bson.errors import InvalidBSON
+
+from pytest_scenarios.cache import read_cache, write_cache
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - YAML scenario files need PyYAML
+    yaml = None
+
+SCENARIO_FILE_EXTENSIONS = (".json", ".bson", ".yaml", ".yml")
+
+# Total size of the pickled scenarios kept in memory, least recently used ones go first.
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+
+# Pickled scenarios by file hash, and file hashes by (path, modification time, size).
+_parsed: OrderedDict[str, bytes] = OrderedDict()
+_hashes: dict[tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+# Naive UTC datetimes, like documents read with the default pymongo codec options.
+_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
+
+def load_scenario_file(path: str, cache_dir: str | None = None) -> dict[str, list[dict]]:
+    """Read the scenario of a file, see the module documentation for the formats.
+    Each call returns new documents, so callers can modify them.
+
+    Args:
+        path: Path of the scenario file, its extension gives the format.
+        cache_dir: Optional directory where parsed JSON and YAML files are kept across
+            sessions. Each file gets one cache file, named after its path and
+            holding the SHA-256 hash of the content it was parsed from.
+    Raises:
+        ValueError: For unknown extensions and files that are not a mapping of
+            collection names to lists of documents.
+    """
+    path = os.path.abspath(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SCENARIO_FILE_EXTENSIONS:
+        raise ValueError(
+            f"Unsupported scenario file {path}, "
+            f"expected one of: {', '.join(SCENARIO_FILE_EXTENSIONS)}"
+        )
+    if extension == ".bson":
+        with _mapped(path) as data:
+            return _parse_bson(path, data)
+    stat = os.stat(path)
+    file_key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        pickled = _parsed.get(_hashes.get(file_key, ""))
+    if pickled is not None:
+        return pickle.loads(pickled)
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = hashlib.sha256(data).hexdigest()
+    cache_file_name = f"{hashlib.sha256(path.encode()).hexdigest()}.pickle"
+    cached = read_cache(cache_dir, cache_file_name)
+    scenario = cached.get("scenario") if cached.get("digest") == digest else None
+    if scenario is None:
+        scenario = _parse(path, extension, data)
+        if cache_dir is not None:
+            write_cache(cache_dir, {"digest": digest, "scenario": scenario}, cache_file_name)
+    _remember(file_key, digest, pickle.dumps(scenario, protocol=pickle.HIGHEST_PROTOCOL))
+    return scenario
+
+
+def _remember(file_key: tuple[str, int, int], digest: str, pickled: bytes) -> None:
+    """Keep a parsed scenario in memory, evicting the least recently used ones
+    beyond MAX_CACHED_BYTES. Scenarios larger than that are not kept."""
+    with _lock:
+        _hashes[file_key] = digest
+        if len(pickled) > MAX_CACHED_BYTES:
+            return
+        _parsed[digest] = pickled
+        _parsed.move_to_end(digest)
+        size = sum(map(len, _parsed.values()))
+        while size > MAX_CACHED_BYTES:
+            size -= len(_parsed.popitem(last=False)[1])
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[bytes | mmap.mmap]:
+    """Map a file in memory, read-only. Empty files, which cannot be mapped, give b""."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def _parse_bson(path: str, data: bytes | mmap.mmap) -> dict[str, list[dict]]:
+    scenario: dict[str, list[dict]] = {}
+    try:
+        # Decoded one document at a time, only the current one is copied out of the map.
+        for part in bson.decode_iter(data):
+            for name, docs in _validated(path, part).items():
+                scenario.setdefault(name, []).extend(docs)
+    except InvalidBSON as error:
+        raise ValueError(f"Invalid scenario file {path}: {error}") from error
+    return scenario
+
+
+def _parse(path: str, extension: str, data: bytes) -> dict[str, list[dict]]:
+    text = data.decode("utf-8")
+    if extension == ".json":
+        try:
+            return _validated(
+                path, json_util.loads(text, json_options=_JSON_OPTIONS) if text.strip() else {}
+            )
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid scenario file {path}: {error}") from error
+    if yaml is None:
+        raise ImportError(f"Reading the YAML scenario file {path} needs PyYAML")
+    return _validated(path, yaml.safe_load(text) or {})
+
+
+def _validated(path: str, scenario: object) -> dict[str, list[dict]]:
+    if not isinstance(scenario, Mapping):
+        raise ValueError(f"Scenario file {path} must hold a mapping of collection names")
+    for name, docs in scenario.items():
+        if not isinstance(docs, list) or not all(isinstance(doc, Mapping) for doc in docs):
+            raise ValueError(
+                f"Collection {name} of scenario file {path} must hold a list of documents"
+            )
+    return dict(scenario)
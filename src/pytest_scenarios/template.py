@@ -0,0 +1,170 @@
+"""
+Templates compiled once per collection and merged with the documents of each scenario.
+"""
+
+import copy
+from collections.abc import Mapping
+from typing import Any
+
+import bson
+from bson import ObjectId
+from bson.codec_options import DEFAULT_CODEC_OPTIONS, CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+# Untouched template bytes below which encode encodes whole documents instead of splicing.
+MIN_SPLICED_BYTES = 512
+
+
+class CompiledTemplate:
+    """A template prepared once to be merged with many documents.
+
+    Documents are deep-merged into the template: nested dictionaries are merged
+    key by key instead of being replaced, and dotted keys such as "specs.ram_gb"
+    override a single nested field. Any other value, lists included, replaces
+    the template value.
+
+    Merging is copy-on-write: each result is a shallow copy of the template, and
+    only the subdocuments an override touches are copied. Untouched subdocuments
+    are shared between results, so they must not be mutated in place.
+
+    Documents can also be produced directly as BSON with encode: each template field
+    is encoded once, and only the fields an override touches are encoded again.
+    """
+
+    def __init__(self, template: Mapping[str, Any]):
+        # Private copy, so later changes to the template module do not leak into results.
+        self._template = copy.deepcopy(dict(template))
+        # BSON element of each template field and assembly plans, built on first encode.
+        self._elements: dict[str, bytes] = {}
+        self._plans: dict[tuple[str, ...], list] = {}
+        self._codec_options: CodecOptions | None = None
+        self._encoded_size = 0
+
+    def merge(self, *overrides: Mapping[str, Any]) -> dict[str, Any]:
+        """Return a new document with the overrides applied in order on top of the template."""
+        doc = self._template.copy()
+        for override in overrides:
+            _merge_into(doc, override)
+        return doc
+
+    def encode(
+        self, *overrides: Mapping[str, Any], codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS
+    ) -> tuple[Any, RawBSONDocument]:
+        """Return the _id and BSON encoding of merge(*overrides), assigning a new
+        ObjectId when neither the template nor the overrides set one.
+        The template fields no override touches are copied from their cached encoding,
+        so wide templates with large nested defaults are not re-encoded per document.
+        Fields come in the same order as in merge, with _id first like PyMongo sends it.
+        Args:
+            codec_options: Options of the collection the document is inserted into.
+        """
+        template = self._template
+        touched: dict[str, Any] = {}
+        for override in overrides:
+            for key, value in override.items():
+                if (isinstance(key, str) and "." in key) or isinstance(value, Mapping):
+                    field = key.split(".", 1)[0] if isinstance(key, str) else key
+                    if field not in touched and field in template:
+                        touched[field] = template[field]
+                    _merge_into(touched, {key: value})
+                else:
+                    touched[key] = value
+        if "_id" not in touched:
+            touched["_id"] = template["_id"] if "_id" in template else ObjectId()
+
+        plan = self._plan(tuple(touched), codec_options)
+        if not plan:
+            # Same field order as merge, with _id first.
+            doc = {"_id": touched["_id"], **template, **touched}
+            return touched["_id"], RawBSONDocument(bson.encode(doc, codec_options=codec_options))
+        body = b"".join(
+            [
+                part
+                if part.__class__ is bytes
+                else bson.encode({key: touched[key] for key in part}, codec_options=codec_options)[
+                    4:-1
+                ]
+                for part in plan
+            ]
+        )
+        raw = (len(body) + 5).to_bytes(4, "little") + body + b"\x00"
+        return touched["_id"], RawBSONDocument(raw)
+
+    def splices(self, codec_options: CodecOptions = DEFAULT_CODEC_OPTIONS) -> bool:
+        """Return whether encode may splice cached template bytes. Small templates never
+        do: merging and inserting their documents as dicts is cheaper than encoding them."""
+        self._prepare(codec_options)
+        return self._encoded_size >= MIN_SPLICED_BYTES
+
+    def _prepare(self, codec_options: CodecOptions) -> None:
+        """Encode each template field with the given codec options, unless already done."""
+        if self._codec_options != codec_options:
+            self._elements = {
+                key: _encode_element(key, value, codec_options)
+                for key, value in self._template.items()
+            }
+            self._encoded_size = sum(map(len, self._elements.values()))
+            self._plans = {}
+            self._codec_options = codec_options
+
+    def _plan(self, fields: tuple[str, ...], codec_options: CodecOptions) -> list:
+        """Return how documents overriding the given top-level fields are assembled:
+        runs of cached template elements as bytes, and tuples of the fields encoded
+        per document. The plan of each set of fields is computed once.
+        An empty plan means encoding whole documents is cheaper, as the untouched
+        template fields are too small to outweigh the cost of splicing."""
+        self._prepare(codec_options)
+        plan = self._plans.get(fields)
+        if plan is None:
+            # _id goes first, then the template fields, then the fields only overrides set.
+            order = [("_id", None)]
+            order += [
+                (key, None if key in fields else element)
+                for key, element in self._elements.items()
+                if key != "_id"
+            ]
+            order += [(key, None) for key in fields if key not in self._elements and key != "_id"]
+            plan = self._plans[fields] = []
+            for key, element in order:
+                if element is None:
+                    if plan and isinstance(plan[-1], tuple):
+                        plan[-1] += (key,)
+                    else:
+                        plan.append((key,))
+                elif plan and isinstance(plan[-1], bytes):
+                    plan[-1] += element
+                else:
+                    plan.append(element)
+            if sum(len(part) for part in plan if isinstance(part, bytes)) < MIN_SPLICED_BYTES:
+                plan.clear()
+        return plan
+
+    @property
+    def template(self) -> dict[str, Any]:
+        """Return the compiled template document."""
+        return self._template
+
+
+def _merge_into(doc: dict[str, Any], override: Mapping[str, Any]) -> None:
+    """Deep-merge override into doc, which must be a copy owned by the caller."""
+    for key, value in override.items():
+        if isinstance(key, str) and "." in key:
+            key, rest = key.split(".", 1)
+            value = {rest: value}
+            base = doc.get(key)
+            if not isinstance(base, Mapping):
+                base = {}
+        else:
+            base = doc.get(key)
+        if isinstance(value, Mapping) and isinstance(base, Mapping):
+            merged = dict(base)
+            _merge_into(merged, value)
+            doc[key] = merged
+        else:
+            doc[key] = value
+
+
+def _encode_element(key: str, value: Any, codec_options: CodecOptions) -> bytes:
+    """Return the BSON element of one field: type byte, key and value,
+    without the length prefix and trailing null byte of the enclosing document."""
+    return bson.encode({key: value}, codec_options=codec_options)[4:-1]
@@ -1,33 +1,284 @@
 """
-A utility to dynamically load template dictionaries from modules in a given package.
+A utility to dynamically load template dictionaries from modules in a given package
+and its subpackages.
 """
 
+import hashlib
 import importlib
 import os
-from typing import Any
+import pickle
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple
 
+from pytest_scenarios.cache import read_cache, write_cache
 
-def load_templates_from_path(path: str) -> dict[str, Any]:
+CACHE_FILE_NAME = "templates.pickle"
+
+
+class _TemplateModule(NamedTuple):
+    """What a template module defines."""
+
+    found: bool
+    template: Any
+    indexes: list
+
+
+_NOT_FOUND = _TemplateModule(False, None, [])
+
+
+def load_templates_from_path(
+    path: str,
+    cache_dir: str | None = None,
+    workers: int = 1,
+    timings: dict[str, float] | None = None,
+    indexes: dict[str, list] | None = None,
+) -> dict[str, Any]:
     """
-    Loads all TEMPLATE dictionaries from Python files in the given directory.
+    Loads all TEMPLATE dictionaries from Python files in the given directory and its
+    subdirectories, see discover_template_files for how collections are named.
 
     Args:
-        path: Filesystem path to the directory containing template modules.
+        path: Filesystem path to the directory containing template modules,
+            or the dotted name of an importable package holding them.
+        cache_dir: Optional directory where evaluated templates are cached between sessions.
+            A module is executed again only when its mtime or size changed and its content
+            hash no longer matches. Changes to modules a template imports are not detected.
+        workers: Number of threads importing template modules. Template modules must not
+            depend on each other's import side effects when it is greater than 1.
+        timings: Optional dictionary filled with the seconds each module took to load,
+            by collection name.
+        indexes: Optional dictionary filled with the INDEXES list of the modules that
+            define one, by collection name.
 
     Returns:
-        A dictionary mapping filename (without .py) to the TEMPLATE dict in each file.
+        A dictionary mapping collection name to the TEMPLATE dict in each file.
     """
+    files = discover_template_files(path)
+    cache = read_cache(cache_dir, CACHE_FILE_NAME)
+    timings = {} if timings is None else timings
+
+    def load(name: str) -> tuple[_TemplateModule, dict | None]:
+        return _load_template(name, files[name], cache_dir, cache.get(files[name]), timings)
+
+    if workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="templates") as pool:
+            results = list(pool.map(load, files))
+    else:
+        results = [load(name) for name in files]
+
     templates = {}
-    abs_path = os.path.abspath(path)
-    for filename in os.listdir(abs_path):
-        if filename.endswith(".py") and filename != "__init__.py":
-            module_name = filename[:-3]
-            file_path = os.path.join(abs_path, filename)
-            spec = importlib.util.spec_from_file_location(module_name, file_path)
-            if not spec or not spec.loader:
-                continue
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            if hasattr(module, "TEMPLATE"):
-                templates[module_name] = module.TEMPLATE
+    cache_changed = False
+    for name, (module, entry) in zip(files, results, strict=True):
+        if cache_dir is not None and entry is not cache.get(files[name]):
+            cache[files[name]] = entry
+            cache_changed = True
+        if module.found:
+            templates[name] = module.template
+        if module.indexes and indexes is not None:
+            indexes[name] = module.indexes
+    if cache_changed:
+        write_cache(cache_dir, cache, CACHE_FILE_NAME)
     return templates
+
+
+def discover_template_files(path: str) -> dict[str, str]:
+    """Return the template module files under a directory, by collection name.
+
+    Subdirectories are scanned recursively, and the collection name of a module in a
+    subdirectory is its relative path joined with dots: billing/invoices.py holds the
+    template of the "billing.invoices" collection. __init__.py files and directories
+    whose name starts with "_" or "." (such as __pycache__) are skipped.
+
+    Args:
+        path: Filesystem path to the directory, or the dotted name of an importable package.
+    """
+    files: dict[str, str] = {}
+    pending = [(_resolve_templates_dir(path), "")]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.name.startswith(("_", ".")):
+                        pending.append((entry.path, f"{prefix}{entry.name}."))
+                elif entry.name.endswith(".py") and entry.name != "__init__.py":
+                    files[f"{prefix}{entry.name[:-3]}"] = entry.path
+    return dict(sorted(files.items()))
+
+
+def _resolve_templates_dir(path: str) -> str:
+    """Return the directory of a templates path, resolving dotted package names."""
+    if not os.path.isdir(path) and all(part.isidentifier() for part in path.split(".")):
+        try:
+            spec = importlib.util.find_spec(path)
+        except ImportError:
+            spec = None
+        if spec and spec.submodule_search_locations:
+            return next(iter(spec.submodule_search_locations))
+    return os.path.abspath(path)
+
+
+def _load_template(
+    name: str,
+    file_path: str,
+    cache_dir: str | None,
+    entry: dict | None,
+    timings: dict[str, float],
+) -> tuple[_TemplateModule, dict | None]:
+    """Load one template module, through the cache when there is one, and time it."""
+    start = time.perf_counter()
+    if cache_dir is None:
+        module = _exec_template(name, file_path)
+    else:
+        module, entry = _load_cached_template(name, file_path, entry)
+    timings[name] = time.perf_counter() - start
+    return module, entry
+
+
+class LazyTemplates(Mapping[str, Any]):
+    """Templates discovered by filename and imported on first access.
+
+    Listing the directory is enough to know the collection names, so only the modules
+    of the collections a test session actually uses are executed. A module that turns
+    out not to define TEMPLATE is still listed, but looking it up raises KeyError.
+    """
+
+    def __init__(self, path: str, cache_dir: str | None = None):
+        """
+        Args:
+            path: Filesystem path to the directory containing template modules,
+                or the dotted name of an importable package, see discover_template_files.
+            cache_dir: Optional directory where evaluated templates are cached between
+                sessions, see load_templates_from_path.
+        """
+        self._files = discover_template_files(path)
+        self._cache_dir = cache_dir
+        self._cache: dict[str, dict] | None = None
+        self._loaded: dict[str, _TemplateModule] = {}
+        self._timings: dict[str, float] = {}
+        # Concurrent inserts may look up templates from several threads.
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> Any:
+        module = self._module(name)
+        if not module.found:
+            raise KeyError(name)
+        return module.template
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def loaded(self) -> set[str]:
+        """Return the names of the templates imported so far."""
+        return set(self._loaded)
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """Return the seconds each template imported so far took to load."""
+        return dict(self._timings)
+
+    @property
+    def indexes(self) -> Mapping[str, list]:
+        """Return the INDEXES lists by collection name, importing modules on access."""
+        return _LazyIndexes(self)
+
+    def _module(self, name: str) -> _TemplateModule:
+        if name not in self._loaded:
+            if name not in self._files:
+                raise KeyError(name)
+            with self._lock:
+                if name not in self._loaded:
+                    self._loaded[name] = self._load(name)
+        return self._loaded[name]
+
+    def _load(self, name: str) -> _TemplateModule:
+        file_path = self._files[name]
+        if self._cache_dir is not None and self._cache is None:
+            self._cache = read_cache(self._cache_dir, CACHE_FILE_NAME)
+        entry = self._cache.get(file_path) if self._cache is not None else None
+        module, new_entry = _load_template(name, file_path, self._cache_dir, entry, self._timings)
+        if self._cache is not None and new_entry is not entry:
+            self._cache[file_path] = new_entry
+            write_cache(self._cache_dir, self._cache, CACHE_FILE_NAME)
+        return module
+
+
+class _LazyIndexes(Mapping[str, list]):
+    """INDEXES lists of LazyTemplates, empty for modules that define none."""
+
+    def __init__(self, templates: LazyTemplates):
+        self._templates = templates
+
+    def __getitem__(self, name: str) -> list:
+        return self._templates._module(name).indexes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._templates)
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+
+def _exec_template(module_name: str, file_path: str) -> _TemplateModule:
+    """Execute a template module and return its TEMPLATE and INDEXES, if any."""
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    if not spec or not spec.loader:
+        return _NOT_FOUND
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return _TemplateModule(
+        hasattr(module, "TEMPLATE"),
+        getattr(module, "TEMPLATE", None),
+        list(getattr(module, "INDEXES", [])),
+    )
+
+
+def _load_cached_template(
+    module_name: str, file_path: str, entry: dict | None
+) -> tuple[_TemplateModule, dict | None]:
+    """Return what a module defines from its cache entry when it is still valid,
+    executing the module otherwise. Also returns the entry to keep in the cache."""
+    stat = os.stat(file_path)
+    if entry and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+        module = _unpickle_module(entry)
+        if module is not None:
+            return module, entry
+    with open(file_path, "rb") as file:
+        digest = hashlib.sha256(file.read()).hexdigest()
+    if entry and entry["sha256"] == digest:
+        module = _unpickle_module(entry)
+        if module is not None:
+            # Touched but unchanged, e.g. after a checkout.
+            return module, {**entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    module = _exec_template(module_name, file_path)
+    try:
+        pickled = pickle.dumps(module)
+    except Exception:
+        # Templates holding values that cannot be pickled are executed every time.
+        return module, None
+    entry = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+        "module": pickled,
+    }
+    return module, entry
+
+
+def _unpickle_module(entry: dict) -> _TemplateModule | None:
+    """Return the cached module, None if it can no longer be unpickled,
+    e.g. because a class it references was moved."""
+    try:
+        return pickle.loads(entry["module"])
+    except Exception:
+        return None
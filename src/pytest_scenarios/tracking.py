@@ -0,0 +1,239 @@
+"""
+Thin wrappers around PyMongo database and collection handles that record which
+collections have been written to, so cleanup can skip the untouched ones.
+They can also bind a session, routing collection operations through a transaction.
+"""
+
+import functools
+import inspect
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from pymongo.client_session import ClientSession
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from pytest_scenarios.memory import MemoryCollection, MemoryDatabase
+
+try:
+    from pymongo.asynchronous.collection import AsyncCollection
+    from pymongo.asynchronous.database import AsyncDatabase
+except ImportError:  # pragma: no cover - the async API needs pymongo 4.9
+    AsyncCollection = AsyncDatabase = None
+
+_COLLECTION_TYPES = tuple(
+    t for t in (Collection, AsyncCollection, MemoryCollection) if t is not None
+)
+_DATABASE_TYPES = tuple(t for t in (Database, AsyncDatabase, MemoryDatabase) if t is not None)
+# PyMongo handles define __call__, only to raise a helpful TypeError.
+_HANDLE_TYPES = _COLLECTION_TYPES + _DATABASE_TYPES
+
+# Collection methods that can modify the documents stored in a collection.
+WRITE_METHODS = frozenset(
+    {
+        "insert_one",
+        "insert_many",
+        "replace_one",
+        "update_one",
+        "update_many",
+        "delete_one",
+        "delete_many",
+        "bulk_write",
+        "find_one_and_delete",
+        "find_one_and_replace",
+        "find_one_and_update",
+        "drop",
+        "rename",
+    }
+)
+
+# Collection methods that accept a session and may run inside a transaction.
+SESSION_METHODS = (WRITE_METHODS - {"drop", "rename"}) | {
+    "find",
+    "find_one",
+    "count_documents",
+    "distinct",
+    "aggregate",
+}
+
+
+class TrackedCollection:
+    """Proxy for a Collection that marks it dirty before any write method runs.
+
+    While a session is bound to the tracker, it is passed to every method in
+    SESSION_METHODS unless the caller provides its own. Collection and database handles
+    returned by its attributes and methods, such as with_options or database,
+    are tracked as well. The target of rename, and the $out and $merge targets of
+    aggregate pipelines, are marked dirty too.
+    """
+
+    def __init__(self, collection: Collection | AsyncCollection, tracker: "TrackedDatabase"):
+        self._collection = collection
+        self._tracker = tracker
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._collection, name)
+        if isinstance(value, _HANDLE_TYPES) or not callable(value):
+            return self._tracker._track(value)
+        if name in WRITE_METHODS:
+            self._tracker.mark_dirty(self._collection.name)
+        session = self._tracker.session
+        if session is not None and name in SESSION_METHODS:
+            value = _with_session(value, session)
+        if name == "rename":
+            value = _marking_dirty(
+                value, self._tracker, lambda new_name, *args, **kwargs: [new_name]
+            )
+        elif name == "aggregate":
+            value = _marking_dirty(value, self._tracker, _pipeline_targets)
+        return _tracking_results(value, self._tracker)
+
+    def __getitem__(self, name: str) -> "TrackedCollection":
+        return TrackedCollection(self._collection[name], self._tracker)
+
+    def __repr__(self) -> str:
+        return f"TrackedCollection({self._collection!r})"
+
+
+class TrackedDatabase:
+    """Proxy for a Database that hands out TrackedCollection instances.
+
+    Every collection obtained through this proxy reports its writes back here,
+    so `dirty_collections` lists the collections that need cleaning.
+    Both Database and AsyncDatabase can be wrapped. Database handles returned by its
+    methods, such as with_options, share its dirty collections and bound session.
+    """
+
+    def __init__(self, db: Database | AsyncDatabase):
+        self._db = db
+        self._dirty: set[str] = set()
+        self._session: ClientSession | None = None
+        # Tracker whose session this one follows, for handles derived from it.
+        self._parent: TrackedDatabase | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._db, name)
+        if isinstance(value, _HANDLE_TYPES) or not callable(value):
+            return self._track(value)
+        if name == "aggregate":
+            value = _marking_dirty(value, self, _pipeline_targets)
+        return _tracking_results(value, self)
+
+    def __getitem__(self, name: str) -> TrackedCollection:
+        return TrackedCollection(self._db[name], self)
+
+    def __repr__(self) -> str:
+        return f"TrackedDatabase({self._db!r})"
+
+    def get_collection(self, name: str, **kwargs) -> TrackedCollection:
+        return TrackedCollection(self._db.get_collection(name, **kwargs), self)
+
+    def drop_collection(self, name_or_collection, **kwargs) -> dict[str, Any]:
+        name = getattr(name_or_collection, "name", name_or_collection)
+        self.mark_dirty(name)
+        if isinstance(name_or_collection, TrackedCollection):
+            name_or_collection = name
+        return self._db.drop_collection(name_or_collection, **kwargs)
+
+    @property
+    def database(self) -> Database | AsyncDatabase:
+        """Return the wrapped PyMongo database."""
+        return self._db
+
+    def share_tracking(self, db: Database | AsyncDatabase) -> "TrackedDatabase":
+        """Wrap another handle, e.g. an AsyncDatabase, recording its writes in this tracker.
+        Unlike handles derived from this database, it does not follow its bound session."""
+        tracked = TrackedDatabase(db)
+        tracked._dirty = self._dirty
+        return tracked
+
+    def _track(self, value: Any) -> Any:
+        """Wrap collection and database handles so they report to this tracker."""
+        if isinstance(value, _COLLECTION_TYPES):
+            return TrackedCollection(value, self)
+        if isinstance(value, _DATABASE_TYPES):
+            tracked = self.share_tracking(value)
+            tracked._parent = self
+            return tracked
+        return value
+
+    @property
+    def session(self) -> ClientSession | None:
+        """Return the session bound to this database, if any."""
+        if self._parent is not None:
+            return self._parent.session
+        return self._session
+
+    def bind_session(self, session: ClientSession | None) -> None:
+        """Route collection operations through the given session, or stop doing so with None."""
+        if self._parent is not None:
+            self._parent.bind_session(session)
+        else:
+            self._session = session
+
+    @property
+    def dirty_collections(self) -> set[str]:
+        """Return the names of the collections written since the last reset."""
+        return set(self._dirty)
+
+    def mark_dirty(self, *names: str) -> None:
+        """Flag the given collections as written."""
+        self._dirty.update(names)
+
+    def reset_dirty(self, names: Iterable[str] | None = None) -> None:
+        """Forget the given dirty collections, or all of them if no names are given."""
+        if names is None:
+            self._dirty.clear()
+        else:
+            self._dirty.difference_update(names)
+
+
+def _pipeline_targets(pipeline: Iterable[Mapping] = (), *args, **kwargs) -> list[str]:
+    """Return the names of the collections an aggregation pipeline writes to."""
+    targets = []
+    for stage in pipeline:
+        target = stage.get("$out", stage.get("$merge"))
+        if isinstance(target, Mapping):
+            target = target.get("into", target)
+        if isinstance(target, Mapping):
+            target = target.get("coll")
+        if isinstance(target, str):
+            targets.append(target)
+    return targets
+
+
+def _marking_dirty(method, tracker: "TrackedDatabase", targets):
+    """Mark the collections targets finds in the call arguments dirty before calling."""
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        tracker.mark_dirty(*targets(*args, **kwargs))
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
+def _tracking_results(method, tracker: "TrackedDatabase"):
+    """Wrap the collection and database handles a method returns."""
+
+    async def tracked(awaitable):
+        return tracker._track(await awaitable)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        # Async API methods, such as AsyncDatabase.create_collection, return coroutines.
+        if inspect.isawaitable(result):
+            return tracked(result)
+        return tracker._track(result)
+
+    return wrapper
+
+
+def _with_session(method, session: ClientSession):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        kwargs.setdefault("session", session)
+        return method(*args, **kwargs)
+
+    return wrapper
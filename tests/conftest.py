@@ -1,7 +1,28 @@
 import pytest
 from syrupy.extensions.json import JSONSnapshotExtension
 
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.tracking import TrackedDatabase
+
 
 @pytest.fixture
 def snapshot_json(snapshot):
     return snapshot.with_defaults(extension_class=JSONSnapshotExtension)
+
+
+@pytest.fixture
+def make_builder(db: TrackedDatabase):
+    """Factory of builders sharing the session tracker: the collections of every builder made,
+    baselines included, are marked dirty afterwards, so their data is wiped before the next test.
+    """
+    builders: list[ScenarioBuilder] = []
+
+    def make(templates: dict[str, dict], **kwargs) -> ScenarioBuilder:
+        builder = ScenarioBuilder(db, templates, **kwargs)
+        builders.append(builder)
+        return builder
+
+    yield make
+    for builder in builders:
+        db.mark_dirty(*builder.collections, *builder.baseline)
+        builder.close()
@@ -7,3 +7,5 @@ TEMPLATE = {
     ],
     "tax": 0.15,
 }
+
+INDEXES = ["id", [("customer_id", 1), ("id", -1)]]
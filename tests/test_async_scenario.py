@@ -0,0 +1,164 @@
+"""Tests for the AsyncScenarioBuilder and its fixtures."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from pytest_scenarios.async_scenario import AsyncScenarioBuilder
+from pytest_scenarios.references import ref
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.tracking import TrackedDatabase
+
+# async_mongo_client is bound to the session event loop.
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+
+async def test_async_create_inserts_all_collections(
+    async_scenario_builder: AsyncScenarioBuilder, db: TrackedDatabase
+):
+    """Every collection of the scenario is inserted and merged with its template."""
+    result = await async_scenario_builder.create(
+        {
+            "customers": [{"name": "Alice"}, {"name": "Louis"}],
+            "orders": [{"id": "order_001"}],
+        }
+    )
+
+    assert list(result) == ["customers", "orders"]
+    assert len(result["customers"]) == 2
+    assert len(result["orders"]) == 1
+    alice = db["customers"].find_one({"name": "Alice"})
+    assert alice["status"] == "active"  # from tests/templates/customers.py
+
+
+async def test_async_create_with_scenario_id(
+    async_scenario_builder: AsyncScenarioBuilder, db: TrackedDatabase
+):
+    """All documents of an async scenario share the same scenario_id."""
+    await async_scenario_builder.create(
+        {"customers": [{"name": "Alice"}], "orders": [{"id": "order_001"}]},
+        add_scenario_id=True,
+    )
+
+    customer = db["customers"].find_one({})
+    order = db["orders"].find_one({})
+    assert customer["scenario_id"] == order["scenario_id"]
+
+
+async def test_async_writes_are_cleaned_by_sync_cleanup(
+    async_scenario_builder: AsyncScenarioBuilder, scenario_builder: ScenarioBuilder
+):
+    """Async writes are recorded in the tracker shared with the db fixture."""
+    await async_scenario_builder.create({"customers": [{"name": "Alice"}]})
+
+    assert "customers" in scenario_builder.dirty_collections
+
+
+async def test_async_cleanup_collections(
+    async_scenario_builder: AsyncScenarioBuilder, db: TrackedDatabase
+):
+    """Async cleanup clears the dirty collections."""
+    await async_scenario_builder.create(
+        {"customers": [{"name": "Alice"}], "orders": [{"id": "order_001"}]}
+    )
+
+    await async_scenario_builder.cleanup_collections()
+
+    assert db["customers"].count_documents({}) == 0
+    assert db["orders"].count_documents({}) == 0
+    assert async_scenario_builder.dirty_collections == set()
+
+
+async def test_async_paranoid_cleanup(
+    async_scenario_builder: AsyncScenarioBuilder, db: TrackedDatabase
+):
+    """Paranoid async cleanup clears untracked template collections too."""
+    db.database["products"].insert_one({"name": "untracked"})
+
+    await async_scenario_builder.cleanup_collections(paranoid=True)
+
+    assert db["products"].count_documents({}) == 0
+
+
+async def test_async_cleanup_restores_baseline(
+    make_builder, db: TrackedDatabase, async_db: TrackedDatabase
+):
+    """With a ScenarioBuilder, async cleanup restores baseline collections instead of
+    emptying them, and they stay tracked for later cleanups."""
+    scenario_builder = make_builder({"customers": {}})
+    async_builder = AsyncScenarioBuilder(async_db, scenario_builder.templates, scenario_builder)
+    scenario_builder.set_baseline({"customers": [{"name": "Alice"}]})
+    await async_db["customers"].insert_one({"name": "Louis"})
+    await async_db["customers"].update_one({"name": "Alice"}, {"$set": {"name": "Bob"}})
+
+    await async_builder.cleanup_collections()
+
+    assert [doc["name"] for doc in db["customers"].find({})] == ["Alice"]
+    await async_db["customers"].delete_many({})
+    await async_builder.cleanup_collections()
+    assert [doc["name"] for doc in db["customers"].find({})] == ["Alice"]
+
+
+async def test_async_cleanup_evicts_cached_scenarios(
+    make_builder, db: TrackedDatabase, async_db: TrackedDatabase
+):
+    """A cached scenario whose collection the async cleanup empties is inserted again."""
+    scenario_builder = make_builder({"products": {}})
+    async_builder = AsyncScenarioBuilder(async_db, scenario_builder.templates, scenario_builder)
+    await async_builder.cleanup_collections()
+    scenario = {"products": [{"sku": "a"}]}
+    first = scenario_builder.create_cached(scenario)
+    await async_db["products"].insert_one({"sku": "b"})
+
+    await async_builder.cleanup_collections()
+    second = scenario_builder.create_cached(scenario)
+
+    assert second != first
+    assert db["products"].find_one({"_id": second["products"][0]}) is not None
+
+
+async def test_async_cleanup_drops_large_collections(
+    make_builder, db: TrackedDatabase, async_db: TrackedDatabase
+):
+    """Collections beyond the drop_threshold are dropped and recreated with their indexes."""
+    scenario_builder = make_builder({"products": {}}, drop_threshold=2)
+    async_builder = AsyncScenarioBuilder(async_db, scenario_builder.templates, scenario_builder)
+    await async_db["products"].create_index("sku", unique=True)
+    await async_db["products"].insert_many([{"sku": "a"}, {"sku": "b"}])
+
+    await async_builder.cleanup_collections()
+
+    assert db["products"].count_documents({}) == 0
+    assert "sku_1" in db["products"].index_information()
+    db["products"].drop_index("sku_1")
+
+
+async def test_async_create_raises_on_partial_insert(
+    async_scenario_builder: AsyncScenarioBuilder, monkeypatch
+):
+    """If insert_many does not return all inserted ids, raise ValueError."""
+
+    async def fake_insert_many(self, docs, comment=None, **kwargs):
+        return SimpleNamespace(inserted_ids=[1])
+
+    import pymongo.asynchronous.collection
+
+    monkeypatch.setattr(
+        pymongo.asynchronous.collection.AsyncCollection, "insert_many", fake_insert_many
+    )
+
+    with pytest.raises(ValueError):
+        await async_scenario_builder.create({"customers": [{"name": "a"}, {"name": "b"}]})
+
+
+async def test_async_create_resolves_references(async_scenario_builder, async_db):
+    """Referencing collections are inserted after the ones they reference."""
+    result = await async_scenario_builder.create(
+        {
+            "orders": [{"id": "order_1", "customer_id": ref("customers", 0, "customer_id")}],
+            "customers": [{"customer_id": "c1"}],
+        }
+    )
+
+    assert list(result) == ["orders", "customers"]
+    assert (await async_db["orders"].find_one({"id": "order_1"}))["customer_id"] == "c1"
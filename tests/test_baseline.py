@@ -0,0 +1,75 @@
+"""Tests for the baseline restore cleanup strategy."""
+
+import pytest
+
+from pytest_scenarios.scenario import ScenarioBuilder
+
+
+@pytest.fixture
+def baseline_builder(make_builder) -> ScenarioBuilder:
+    builder = make_builder({"customers": {"status": "active"}, "orders": {}})
+    builder.set_baseline(
+        {"customers": [{"name": "Alice"}, {"name": "Bob"}], "products": [{"name": "Laptop"}]}
+    )
+    return builder
+
+
+def test_set_baseline_inserts_and_snapshots(baseline_builder: ScenarioBuilder, db):
+    """The baseline is inserted once and kept as the restore target."""
+    assert db["customers"].count_documents({}) == 2
+    assert sorted(doc["name"] for doc in baseline_builder.baseline["customers"]) == [
+        "Alice",
+        "Bob",
+    ]
+    assert not {"customers", "products"} & baseline_builder.dirty_collections
+
+
+def test_set_baseline_replaces_existing_documents(make_builder, db):
+    """Leftover documents in baseline collections are removed before seeding."""
+    db["customers"].insert_one({"name": "Leftover"})
+    builder = make_builder({"customers": {}})
+    builder.set_baseline({"customers": [{"name": "Alice"}]})
+    assert [doc["name"] for doc in db["customers"].find({})] == ["Alice"]
+
+
+def test_cleanup_restores_baseline(baseline_builder: ScenarioBuilder, db):
+    """Added, changed and deleted documents are all brought back to the baseline."""
+    baseline_builder.cleanup_collections()
+    db["customers"].update_one({"name": "Alice"}, {"$set": {"status": "inactive"}})
+    db["customers"].delete_one({"name": "Bob"})
+    baseline_builder.create({"customers": [{"name": "Carol"}], "orders": [{"id": "o1"}]})
+
+    baseline_builder.cleanup_collections()
+
+    customers = {doc["name"]: doc for doc in db["customers"].find({})}
+    assert sorted(customers) == ["Alice", "Bob"]
+    assert customers["Alice"]["status"] == "active"
+    assert db["orders"].count_documents({}) == 0
+    assert baseline_builder.dirty_collections == set()
+
+
+def test_cleanup_leaves_untouched_baseline_alone(baseline_builder: ScenarioBuilder, db):
+    """Baseline collections nobody wrote to are not restored."""
+    baseline_builder.cleanup_collections()
+    db.database["products"].insert_one({"name": "untracked"})
+
+    baseline_builder.cleanup_collections()
+
+    assert db["products"].count_documents({}) == 2
+
+
+def test_paranoid_cleanup_restores_baseline(baseline_builder: ScenarioBuilder, db):
+    """Paranoid cleanup restores baseline collections even without recorded writes."""
+    baseline_builder.cleanup_collections()
+    db.database["products"].insert_one({"name": "untracked"})
+
+    baseline_builder.cleanup_collections(paranoid=True)
+
+    assert [doc["name"] for doc in db["products"].find({})] == ["Laptop"]
+
+
+def test_baseline_is_a_copy(baseline_builder: ScenarioBuilder):
+    """Mutating the returned baseline does not alter the restore target."""
+    baseline_builder.baseline["customers"][0]["name"] = "Mallory"
+    names = {doc["name"] for doc in baseline_builder.baseline["customers"]}
+    assert names == {"Alice", "Bob"}
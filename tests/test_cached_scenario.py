@@ -0,0 +1,95 @@
+"""Tests for read-only scenarios cached across tests."""
+
+import pytest
+
+from pytest_scenarios.references import ref
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.tracking import TrackedDatabase
+
+REFERENCE_DATA = {
+    "products": [{"name": "Laptop"}, {"name": "Phone"}],
+    "customers": [{"name": "Alice"}],
+}
+
+
+@pytest.fixture
+def cache_builder(make_builder) -> ScenarioBuilder:
+    builder = make_builder({"customers": {"status": "active"}, "products": {}})
+    builder.cleanup_collections()
+    return builder
+
+
+def test_create_cached_inserts_once(cache_builder: ScenarioBuilder, db: TrackedDatabase):
+    """The same scenario is only inserted once and leaves its collections clean."""
+    first = cache_builder.create_cached(REFERENCE_DATA)
+    cache_builder.cleanup_collections()
+    second = cache_builder.create_cached(REFERENCE_DATA)
+
+    assert first == second
+    assert db["products"].count_documents({}) == 2
+    assert db["customers"].count_documents({}) == 1
+    assert cache_builder.dirty_collections == set()
+
+
+def test_create_cached_accepts_generators(cache_builder: ScenarioBuilder, db: TrackedDatabase):
+    """Documents can come from generators, they are hashed after being consumed."""
+    cache_builder.create_cached({"products": ({"name": name} for name in ["A", "B"])})
+    cache_builder.create_cached({"products": ({"name": name} for name in ["A", "B"])})
+
+    assert db["products"].count_documents({}) == 2
+
+
+def test_write_evicts_cached_scenario(cache_builder: ScenarioBuilder, db: TrackedDatabase):
+    """Once a test writes to a cached collection, cleanup wipes it and the scenario
+    is inserted again on next use."""
+    first = cache_builder.create_cached(REFERENCE_DATA, key="reference")
+    db["products"].delete_one({"name": "Laptop"})
+
+    cache_builder.cleanup_collections()
+    assert db["customers"].count_documents({}) == 1
+    assert db["products"].count_documents({}) == 0
+
+    second = cache_builder.create_cached(REFERENCE_DATA, key="reference")
+    assert second["products"] != first["products"]
+    assert db["products"].count_documents({}) == 2
+
+
+def test_create_cached_keeps_existing_dirty_collections(
+    cache_builder: ScenarioBuilder, db: TrackedDatabase
+):
+    """A collection written before caching is still cleaned afterwards."""
+    db["customers"].insert_one({"name": "Temporary"})
+    cache_builder.create_cached(REFERENCE_DATA)
+
+    assert cache_builder.dirty_collections == {"customers"}
+
+
+def test_drop_cached_marks_collections_dirty(cache_builder: ScenarioBuilder, db):
+    """Dropping a cached scenario removes its documents at the next cleanup."""
+    cache_builder.create_cached(REFERENCE_DATA, key="reference")
+    cache_builder.drop_cached("reference")
+
+    assert cache_builder.dirty_collections >= {"customers", "products"}
+    cache_builder.cleanup_collections()
+    assert db["products"].count_documents({}) == 0
+
+
+def test_create_cached_with_references(cache_builder: ScenarioBuilder, db: TrackedDatabase):
+    """Scenarios holding ref placeholders are hashed by what the placeholders reference."""
+    scenario = {
+        "products": [{"name": "Laptop"}],
+        "customers": [{"name": "Alice", "product_id": ref("products")}],
+    }
+    first = cache_builder.create_cached(scenario)
+    second = cache_builder.create_cached(scenario)
+    other = cache_builder.create_cached(
+        {
+            "products": [{"name": "Laptop"}],
+            "customers": [{"name": "Alice", "product_id": ref("products", 0, "name")}],
+        }
+    )
+
+    assert first == second
+    assert other != first
+    customer = db["customers"].find_one({"_id": first["customers"][0]})
+    assert customer["product_id"] == first["products"][0]
@@ -0,0 +1,81 @@
+"""Tests for the bulk document factories."""
+
+import pytest
+
+from pytest_scenarios.factories import Column, choice, cycle, many, randint, seq, uniform
+from pytest_scenarios.scenario import ScenarioBuilder
+
+
+def test_many_with_columns_and_constants():
+    docs = list(
+        many(4, id=seq("order_{:03d}", start=1), customer_id=cycle("c1", "c2"), status="new")
+    )
+
+    assert docs == [
+        {"id": "order_001", "customer_id": "c1", "status": "new"},
+        {"id": "order_002", "customer_id": "c2", "status": "new"},
+        {"id": "order_003", "customer_id": "c1", "status": "new"},
+        {"id": "order_004", "customer_id": "c2", "status": "new"},
+    ]
+
+
+def test_many_spans_batches():
+    docs = list(many(5, batch_size=2, n=seq(step=10)))
+
+    assert [doc["n"] for doc in docs] == [0, 10, 20, 30, 40]
+
+
+def test_many_without_fields():
+    assert list(many(3)) == [{}, {}, {}]
+    assert len(many(3)) == 3
+
+
+def test_cycle_accepts_an_iterable():
+    assert [doc["c"] for doc in many(3, c=cycle(["a", "b"]))] == ["a", "b", "a"]
+    with pytest.raises(ValueError):
+        cycle()
+
+
+def test_random_columns_are_reproducible_with_seed():
+    factory = many(
+        50, kind=choice(["a", "b", "c"], seed=1), qty=randint(1, 3, seed=2), tax=uniform(0, 1, 3)
+    )
+
+    first, second = list(factory), list(factory)
+
+    assert first == second
+    assert {doc["kind"] for doc in first} <= {"a", "b", "c"}
+    assert all(1 <= doc["qty"] <= 3 for doc in first)
+    assert all(0 <= doc["tax"] <= 1 for doc in first)
+
+
+def test_columns_must_implement_their_values():
+    """Column subclasses that do not implement values cannot be instantiated."""
+
+    class Incomplete(Column):
+        pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        Incomplete()
+
+
+def test_builder_creates_many(scenario_builder: ScenarioBuilder, db):
+    """Generated documents are merged with the template like any other."""
+    result = scenario_builder.create(
+        {"orders": scenario_builder.many(20, id=seq("order_{}"), customer_id=cycle("c1", "c2"))}
+    )
+
+    assert len(result["orders"]) == 20
+    order = db["orders"].find_one({"id": "order_7"})
+    assert order["customer_id"] == "c2"
+    assert order["tax"] == 0.15
+    assert db["orders"].count_documents({"customer_id": "c1"}) == 10
+
+
+def test_builder_streams_many(scenario_builder: ScenarioBuilder, db):
+    counts = scenario_builder.create_streaming(
+        {"customers": scenario_builder.many(2500, name=seq("customer_{}"))}, batch_size=1000
+    )
+
+    assert counts == {"customers": 2500}
+    assert db["customers"].count_documents({}) == 2500
@@ -0,0 +1,122 @@
+"""Tests for the index declarations of templates."""
+
+import warnings
+
+import pytest
+from pymongo import IndexModel
+
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.template_loader import LazyTemplates, load_templates_from_path
+from pytest_scenarios.tracking import TrackedDatabase
+
+
+def test_loader_collects_indexes(tmp_path):
+    (tmp_path / "orders.py").write_text("TEMPLATE = {}\nINDEXES = ['id']\n")
+    (tmp_path / "customers.py").write_text("TEMPLATE = {}\n")
+    indexes: dict[str, list] = {}
+
+    load_templates_from_path(str(tmp_path), indexes=indexes)
+
+    assert indexes == {"orders": ["id"]}
+
+
+def test_cached_modules_keep_indexes(tmp_path):
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    (templates_dir / "orders.py").write_text(
+        "from pymongo import IndexModel\nTEMPLATE = {}\nINDEXES = [IndexModel('id', unique=True)]\n"
+    )
+    cache_dir = str(tmp_path / "cache")
+
+    for _ in range(2):
+        indexes: dict[str, list] = {}
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir, indexes=indexes)
+        assert indexes["orders"][0].document == {"key": {"id": 1}, "name": "id_1", "unique": True}
+
+
+def test_lazy_templates_expose_indexes(tmp_path):
+    (tmp_path / "orders.py").write_text("TEMPLATE = {}\nINDEXES = ['id']\n")
+    (tmp_path / "customers.py").write_text("TEMPLATE = {}\n")
+    templates = LazyTemplates(str(tmp_path))
+
+    assert templates.indexes["orders"] == ["id"]
+    assert templates.indexes["customers"] == []
+    assert templates.loaded == {"orders", "customers"}
+
+
+def test_session_builder_creates_template_indexes(scenario_builder: ScenarioBuilder, db):
+    """The INDEXES of tests/templates/orders.py exist and survive cleanups."""
+    scenario_builder.create({"orders": [{"id": "order_1"}]})
+    scenario_builder.cleanup_collections()
+
+    assert {"id_1", "customer_id_1_id_-1"} <= set(db["orders"].index_information())
+
+
+@pytest.fixture
+def indexed_collection(db: TrackedDatabase):
+    yield "indexed_things"
+    db.drop_collection("indexed_things")
+
+
+def test_indexes_are_created_once(db: TrackedDatabase, indexed_collection: str):
+    indexes = {indexed_collection: [IndexModel("sku", unique=True), "name"]}
+    builder = ScenarioBuilder(db, {indexed_collection: {}}, indexes=indexes)
+    builder.create({indexed_collection: [{"sku": "a"}]})
+
+    info = db[indexed_collection].index_information()
+    assert info["sku_1"]["unique"] is True
+    assert "name_1" in info
+    builder.close()
+
+
+def test_lazy_builder_creates_indexes_on_first_insert(db: TrackedDatabase, indexed_collection: str):
+    builder = ScenarioBuilder(
+        db, {indexed_collection: {}}, lazy=True, indexes={indexed_collection: ["sku"]}
+    )
+    assert indexed_collection not in db.list_collection_names()
+
+    builder.create({indexed_collection: [{"sku": "a"}]})
+
+    assert "sku_1" in db[indexed_collection].index_information()
+    builder.close()
+
+
+def test_index_drift_warns(db: TrackedDatabase, indexed_collection: str):
+    db[indexed_collection].create_index("legacy")
+    db[indexed_collection].create_index([("sku", -1)], name="sku_1")
+
+    with pytest.warns(UserWarning, match="legacy_1, sku_1"):
+        ScenarioBuilder(db, {indexed_collection: {}}, indexes={indexed_collection: ["sku"]})
+
+
+@pytest.mark.parametrize(
+    "existing, declared",
+    [
+        ({}, {"unique": True}),
+        ({"sparse": True}, {}),
+        ({"expireAfterSeconds": 60}, {"expireAfterSeconds": 0}),
+        (
+            {"partialFilterExpression": {"sku": {"$exists": True}}},
+            {"partialFilterExpression": {"name": {"$exists": True}}},
+        ),
+    ],
+)
+def test_index_option_drift_warns(
+    db: TrackedDatabase, indexed_collection: str, existing: dict, declared: dict
+):
+    db[indexed_collection].create_index("sku", **existing)
+
+    with pytest.warns(UserWarning, match="sku_1"):
+        ScenarioBuilder(
+            db,
+            {indexed_collection: {}},
+            indexes={indexed_collection: [IndexModel("sku", **declared)]},
+        )
+
+
+def test_no_warning_without_drift(db: TrackedDatabase, indexed_collection: str):
+    ScenarioBuilder(db, {indexed_collection: {}}, indexes={indexed_collection: ["sku"]})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        ScenarioBuilder(db, {indexed_collection: {}}, indexes={indexed_collection: ["sku"]})
@@ -0,0 +1,201 @@
+"""Tests for the in-memory backend."""
+
+import datetime
+
+import pytest
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+
+from pytest_scenarios.memory import MemoryClient, MemoryCollection
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.tracking import TrackedCollection, TrackedDatabase
+
+
+@pytest.fixture
+def collection() -> MemoryCollection:
+    collection = MemoryClient()["test_db"]["customers"]
+    collection.insert_many(
+        [
+            {"_id": 1, "name": "Alice", "age": 30, "address": {"city": "Madrid"}},
+            {"_id": 2, "name": "Bob", "age": 25, "tags": ["new", "vip"]},
+            {"_id": 3, "name": "Carol", "age": 35, "status": None},
+        ]
+    )
+    return collection
+
+
+def test_find_one_by_equality(collection: MemoryCollection):
+    assert collection.find_one({"name": "Bob"})["_id"] == 2
+    assert collection.find_one(3)["name"] == "Carol"
+    assert collection.find_one({"name": "Nobody"}) is None
+
+
+def test_find_with_operators(collection: MemoryCollection):
+    def ids(query):
+        return [doc["_id"] for doc in collection.find(query)]
+
+    assert ids({"age": {"$gte": 30}}) == [1, 3]
+    assert ids({"age": {"$gt": 25, "$lt": 35}}) == [1]
+    assert ids({"_id": {"$in": [2, 3, 4]}}) == [2, 3]
+    assert ids({"_id": {"$nin": [2, 3]}}) == [1]
+    assert ids({"name": {"$ne": "Alice"}}) == [2, 3]
+    assert ids({"address.city": "Madrid"}) == [1]
+    assert ids({"tags": "vip"}) == [2]
+    assert ids({"status": None}) == [1, 2, 3]
+    assert ids({"status": {"$exists": True}}) == [3]
+    assert ids({"age": {"$not": {"$gt": 25}}}) == [2]
+    assert ids({"$or": [{"_id": 1}, {"name": "Carol"}]}) == [1, 3]
+    assert ids({"$and": [{"age": {"$gt": 20}}, {"age": {"$lt": 30}}]}) == [2]
+
+
+def test_unsupported_operator_raises(collection: MemoryCollection):
+    with pytest.raises(NotImplementedError):
+        collection.find_one({"name": {"$regex": "^A"}})
+
+
+def test_cursor_sort_skip_limit_and_projection(collection: MemoryCollection):
+    cursor = collection.find({}, {"name": 1, "_id": 0}).sort("age", -1).skip(1).limit(1)
+    assert cursor.to_list() == [{"name": "Alice"}]
+
+
+def test_documents_are_copied(collection: MemoryCollection):
+    """Mutating inserted or returned documents does not change the stored ones."""
+    doc = {"_id": 4, "items": [1]}
+    collection.insert_one(doc)
+    doc["items"].append(2)
+    collection.find_one(4)["items"].append(3)
+    assert collection.find_one(4)["items"] == [1]
+
+
+def test_insert_assigns_ids_and_accepts_raw_bson(collection: MemoryCollection):
+    result = collection.insert_many([{"name": "Dan"}, RawBSONDocument(b"\x05\x00\x00\x00\x00")])
+    assert len(result.inserted_ids) == 2
+    assert collection.count_documents({}) == 5
+
+
+def test_duplicate_ids_raise(collection: MemoryCollection):
+    with pytest.raises(DuplicateKeyError):
+        collection.insert_one({"_id": 1})
+    with pytest.raises(BulkWriteError) as error:
+        collection.insert_many([{"_id": 1}, {"_id": 10}], ordered=False)
+    assert error.value.details["writeErrors"][0]["code"] == 11000
+    assert error.value.details["nInserted"] == 1
+
+
+def test_bulk_write_reports_duplicate_inserts(collection: MemoryCollection):
+    with pytest.raises(BulkWriteError) as error:
+        collection.bulk_write([InsertOne({"_id": 1}), InsertOne({"_id": 11})], ordered=False)
+    assert error.value.details["writeErrors"][0]["index"] == 0
+    assert error.value.details["nInserted"] == 1
+
+
+def test_updates(collection: MemoryCollection):
+    result = collection.update_one({"_id": 1}, {"$set": {"address.zip": "28001"}})
+    assert (result.matched_count, result.modified_count) == (1, 1)
+    collection.update_many({}, {"$inc": {"age": 1}})
+    collection.update_one({"_id": 2}, {"$push": {"tags": "old"}, "$unset": {"name": ""}})
+
+    assert collection.find_one(1)["address"] == {"city": "Madrid", "zip": "28001"}
+    assert [doc["age"] for doc in collection.find()] == [31, 26, 36]
+    assert collection.find_one(2)["tags"] == ["new", "vip", "old"]
+    assert "name" not in collection.find_one(2)
+
+
+def test_upsert_and_replace(collection: MemoryCollection):
+    result = collection.update_one(
+        {"_id": 9}, {"$set": {"name": "Eve"}, "$setOnInsert": {"age": 20}}, upsert=True
+    )
+    assert result.upserted_id == 9
+    collection.replace_one({"_id": 1}, {"name": "Alice II"})
+
+    assert collection.find_one(9) == {"_id": 9, "name": "Eve", "age": 20}
+    assert collection.find_one(1) == {"_id": 1, "name": "Alice II"}
+
+
+def test_deletes_and_bulk_write(collection: MemoryCollection):
+    result = collection.bulk_write(
+        [
+            DeleteOne({"_id": 1}),
+            ReplaceOne({"_id": 5}, {"name": "Frank"}, upsert=True),
+            UpdateOne({"_id": 2}, {"$set": {"age": 26}}),
+        ]
+    )
+    assert (result.deleted_count, result.upserted_count, result.modified_count) == (1, 1, 1)
+    assert collection.delete_many({"age": {"$gt": 0}}).deleted_count == 2
+    assert collection.distinct("name") == ["Frank"]
+
+
+def test_collections_and_databases():
+    client = MemoryClient()
+    db = client["test_db"]
+    db.create_collection("orders")
+    with pytest.raises(CollectionInvalid):
+        db.create_collection("orders")
+    db["customers"].insert_one({"name": "Alice"})
+
+    assert sorted(db.list_collection_names()) == ["customers", "orders"]
+    assert client.list_database_names() == ["test_db"]
+    db.drop_collection("customers")
+    assert db.list_collection_names() == ["orders"]
+    assert db.customers.count_documents({}) == 0
+
+
+def test_drop_keeps_the_collection_object():
+    """Dropped collections are emptied in place and recreated by the next write."""
+    db = MemoryClient()["test_db"]
+    customers = db["customers"]
+    customers.insert_one({"name": "Alice"})
+    customers.create_index("name")
+
+    customers.drop()
+
+    assert db["customers"] is customers
+    assert db.list_collection_names() == []
+    assert list(customers.index_information()) == ["_id_"]
+    customers.insert_one({"name": "Bob"})
+    assert db.list_collection_names() == ["customers"]
+
+
+def test_attributes_are_databases_and_collections_unless_pymongo_names():
+    client = MemoryClient()
+
+    assert client.test_db is client["test_db"]
+    assert client.test_db.customers is client["test_db"]["customers"]
+    assert client.test_db.customers.archive is client["test_db"]["customers.archive"]
+    for handle, name in [
+        (client, "start_session"),
+        (client.test_db, "list_collections"),
+        (client.test_db, "aggregate"),
+        (client.test_db.customers, "aggregate"),
+        (client.test_db.customers, "rename"),
+    ]:
+        with pytest.raises(NotImplementedError, match=name):
+            getattr(handle, name)
+
+
+def test_sort_mixed_types_in_bson_order():
+    collection = MemoryClient()["test_db"]["values"]
+    values = [True, "text", ObjectId(), {"a": 1}, 2.5, None, [1], 1, datetime.datetime(2024, 1, 1)]
+    collection.insert_many([{"_id": index, "value": value} for index, value in enumerate(values)])
+    collection.insert_one({"_id": "missing"})
+
+    ids = [doc["_id"] for doc in collection.find({}).sort("value", 1)]
+
+    assert ids == [5, "missing", 7, 4, 1, 3, 6, 2, 0, 8]
+
+
+def test_scenario_builder_on_memory_backend():
+    """ScenarioBuilder runs unchanged on the memory backend, without transactions."""
+    db = MemoryClient()["test_db"]
+    builder = ScenarioBuilder(db, {"customers": {"status": "active"}}, concurrent=True)
+
+    ids = builder.create({"customers": [{"name": "Alice"}, {"name": "Bob"}]})
+
+    assert isinstance(TrackedDatabase(db)["customers"], TrackedCollection)
+    assert db["customers"].count_documents({"status": "active"}) == len(ids["customers"]) == 2
+    assert not builder.supports_transactions()
+    builder.cleanup_collections()
+    assert db["customers"].count_documents({}) == 0
+    builder.close()
@@ -18,10 +18,18 @@ def test_reload_pytest_fixtures_module():
     reloaded = importlib.reload(module)
     assert hasattr(reloaded, "_get_option")
     assert hasattr(reloaded, "templates_path")
+    assert hasattr(reloaded, "db_url")
+    assert hasattr(reloaded, "db_backend")
     assert hasattr(reloaded, "mongo_client")
     assert hasattr(reloaded, "db")
+    assert hasattr(reloaded, "scenario_profiler")
+    assert hasattr(reloaded, "scenario_baseline")
     assert hasattr(reloaded, "scenario_builder")
+    assert hasattr(reloaded, "cleanup_mode")
+    assert hasattr(reloaded, "isolation")
     assert hasattr(reloaded, "cleanup_database")
+    assert hasattr(reloaded, "async_db")
+    assert hasattr(reloaded, "async_scenario_builder")
 
 
 def test_reload_scenario_module():
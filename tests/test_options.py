@@ -3,7 +3,15 @@
 import os
 from unittest.mock import ANY, MagicMock, patch
 
-from pytest_scenarios.pytest_fixtures import _get_option, pytest_addoption
+from pytest_scenarios.pytest_fixtures import (
+    _client_options,
+    _get_option,
+    _is_enabled,
+    _templates_cache_dir,
+    _warm_up,
+    _worker_db_name,
+    pytest_addoption,
+)
 
 
 def test_get_option_returns_cli_value() -> None:
@@ -51,6 +59,13 @@ def test_pytest_addoption_registers_defaults() -> None:
         default="tests/templates",
         help=ANY,
     )
+    group.addoption.assert_any_call(
+        "--scenarios-path",
+        action="store",
+        dest="scenarios_path",
+        default="tests/scenarios",
+        help=ANY,
+    )
     group.addoption.assert_any_call(
         "--db-name",
         action="store",
@@ -65,6 +80,83 @@ def test_pytest_addoption_registers_defaults() -> None:
         default="mongodb://127.0.0.1:27017",
         help=ANY,
     )
+    group.addoption.assert_any_call(
+        "--cleanup-mode",
+        action="store",
+        dest="cleanup_mode",
+        default="dirty",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--concurrent-inserts",
+        action="store",
+        dest="concurrent_inserts",
+        default="false",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--drop-threshold",
+        action="store",
+        dest="drop_threshold",
+        default="0",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--isolation",
+        action="store",
+        dest="isolation",
+        default="cleanup",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--lazy-templates",
+        action="store",
+        dest="lazy_templates",
+        default="false",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--template-workers",
+        action="store",
+        dest="template_workers",
+        default="1",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--templates-cache",
+        action="store",
+        dest="templates_cache",
+        default="false",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--db-backend",
+        action="store",
+        dest="db_backend",
+        default="mongo",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--min-pool-size",
+        action="store",
+        dest="min_pool_size",
+        default="",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--compressors",
+        action="store",
+        dest="compressors",
+        default="",
+        help=ANY,
+    )
+    group.addoption.assert_any_call(
+        "--scenarios-profile",
+        action="store",
+        dest="scenarios_profile",
+        default="false",
+        help=ANY,
+    )
     ini_parser.addini.assert_any_call(
         name="templates-path",
         help=ANY,
@@ -83,6 +175,18 @@ def test_pytest_addoption_registers_defaults() -> None:
         default="mongodb://127.0.0.1:27017",
         type="string",
     )
+    ini_parser.addini.assert_any_call(
+        name="cleanup-mode",
+        help=ANY,
+        default="dirty",
+        type="string",
+    )
+    ini_parser.addini.assert_any_call(
+        name="isolation",
+        help=ANY,
+        default="cleanup",
+        type="string",
+    )
 
 
 def test_pytest_addoption_honors_environment_defaults() -> None:
@@ -108,3 +212,57 @@ def test_pytest_addoption_honors_environment_defaults() -> None:
         default="env/templates",
         type="string",
     )
+
+
+def test_worker_db_name_without_xdist(monkeypatch) -> None:
+    """Outside pytest-xdist the configured database name is used as is."""
+    monkeypatch.delenv("PYTEST_XDIST_WORKER", raising=False)
+
+    assert _worker_db_name("test_db") == "test_db"
+
+
+def test_worker_db_name_with_xdist(monkeypatch) -> None:
+    """Each pytest-xdist worker gets its own database."""
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw3")
+
+    assert _worker_db_name("test_db") == "test_db_gw3"
+
+
+def test_is_enabled() -> None:
+    """Boolean options accept the usual spellings of true."""
+    assert _is_enabled("true")
+    assert _is_enabled("True")
+    assert _is_enabled("1")
+    assert not _is_enabled("false")
+    assert not _is_enabled(None)
+
+
+def test_templates_cache_is_opt_in() -> None:
+    """Evaluated templates are only cached when templates-cache is enabled."""
+    request = MagicMock()
+    request.config.cache.mkdir.return_value = "/cache/pytest-scenarios"
+    values = {"--templates-cache": "false"}
+    request.config.getoption.side_effect = lambda option, default=None: values[option]
+
+    assert _templates_cache_dir(request) is None
+    values["--templates-cache"] = "true"
+    assert _templates_cache_dir(request) == "/cache/pytest-scenarios"
+
+
+def test_client_options_only_passes_configured_values() -> None:
+    """Empty tuning options keep the db-url and driver defaults."""
+    request = MagicMock()
+    values = {"--max-pool-size": "20", "--min-pool-size": "", "--compressors": "zstd,zlib"}
+    request.config.getoption.side_effect = lambda option, default=None: values.get(option, "")
+
+    assert _client_options(request) == {"maxPoolSize": 20, "compressors": "zstd,zlib"}
+
+
+def test_warm_up_pings_in_parallel() -> None:
+    """Every warm-up thread runs its ping at the same time as the others."""
+    client = MagicMock()
+
+    _warm_up(client, 4)
+
+    assert client.admin.command.call_count == 4
+    client.admin.command.assert_called_with("ping")
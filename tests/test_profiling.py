@@ -0,0 +1,114 @@
+"""Tests for the scenarios-profile timings and report."""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytest_scenarios import pytest_fixtures
+from pytest_scenarios.profiling import ScenarioProfiler
+from pytest_scenarios.scenario import ScenarioBuilder
+
+
+@pytest.fixture
+def profiled_builder(make_builder) -> ScenarioBuilder:
+    """A builder recording into its own profiler."""
+    builder = make_builder(
+        {"customers": {"status": "active"}, "orders": {}}, profiler=ScenarioProfiler()
+    )
+    builder.profiler.start_test("test_a")
+    return builder
+
+
+def test_inserts_are_recorded_per_collection(profiled_builder: ScenarioBuilder):
+    """Every insert adds its document count and BSON size to its collection."""
+    profiled_builder.create({"customers": [{"name": "Alice"}, {"name": "Bob"}]})
+    profiled_builder.create_streaming({"customers": [{}], "orders": [{}, {}, {}]}, batch_size=2)
+
+    customers = profiled_builder.profiler.collections["customers"]
+    orders = profiled_builder.profiler.collections["orders"]
+    assert (customers.inserts, customers.docs) == (2, 3)
+    assert (orders.inserts, orders.docs) == (2, 3)
+    assert customers.bytes > 0 and orders.bytes > 0
+
+
+def test_creations_are_attributed_to_the_current_test(profiled_builder: ScenarioBuilder):
+    """Creation time and documents go to the test started last, cleanups are timed apart."""
+    profiler = profiled_builder.profiler
+    profiled_builder.create({"customers": [{"name": "Alice"}]})
+    profiled_builder.create_cached({"orders": [{}]})
+    profiler.start_test("test_b")
+    with profiler.time_cleanup():
+        profiled_builder.cleanup_collections()
+    profiled_builder.create({"orders": [{}, {}]})
+
+    assert profiler.tests["test_a"].docs == 2
+    assert profiler.tests["test_a"].create > 0
+    assert profiler.tests["test_a"].cleanup == 0
+    assert profiler.tests["test_b"].docs == 2
+    assert profiler.tests["test_b"].cleanup > 0
+
+
+def test_report_lists_slowest_tests_and_collections(profiled_builder: ScenarioBuilder):
+    profiled_builder.create({"customers": [{"name": "Alice"}]})
+    profiled_builder.profiler.record_call("test_a", 0.5)
+
+    lines = profiled_builder.profiler.report()
+
+    assert "test bodies 0.500s" in lines[0]
+    assert any(line.endswith(" test_a") and "(1 docs)" in line for line in lines)
+    assert any(line.endswith(" customers") for line in lines)
+
+
+def test_terminal_summary_writes_json(tmp_path):
+    """The report is printed at the end of the session and dumped to the JSON file."""
+    profiler = ScenarioProfiler()
+    profiler.record_insert("customers", docs=3, size=120, seconds=0.25)
+    config = MagicMock()
+    json_path = tmp_path / "profile.json"
+    # Looked up at call time, as test_module_reload redefines the stash keys.
+    config.stash = {
+        pytest_fixtures._PROFILER_KEY: profiler,
+        pytest_fixtures._PROFILE_JSON_KEY: str(json_path),
+    }
+    reporter = MagicMock()
+
+    pytest_fixtures.pytest_terminal_summary(reporter, config)
+
+    reporter.write_sep.assert_called_once_with("=", "pytest-scenarios profile")
+    dumped = json.loads(json_path.read_text())
+    assert dumped["collections"]["customers"] == {
+        "inserts": 1,
+        "docs": 3,
+        "bytes": 120,
+        "seconds": 0.25,
+    }
+
+
+def test_terminal_summary_lists_template_timings():
+    """Template load times are read at the end of the session, so lazy loads are included."""
+    timings = {"customers": 0.25}
+    config = MagicMock()
+    config.stash = {pytest_fixtures._TEMPLATE_TIMINGS_KEY: lambda: timings}
+    reporter = MagicMock()
+    timings["orders"] = 0.5
+
+    pytest_fixtures.pytest_terminal_summary(reporter, config)
+
+    reporter.write_sep.assert_called_once_with("=", "pytest-scenarios templates")
+    lines = [call.args[0] for call in reporter.write_line.call_args_list]
+    assert lines == [
+        "Loaded 2 template modules in 0.750s",
+        "  0.500s orders",
+        "  0.250s customers",
+    ]
+
+
+def test_terminal_summary_is_silent_without_profiler():
+    config = MagicMock()
+    config.stash = {}
+    reporter = MagicMock()
+
+    pytest_fixtures.pytest_terminal_summary(reporter, config)
+
+    reporter.write_sep.assert_not_called()
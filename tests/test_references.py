@@ -0,0 +1,89 @@
+"""Tests for cross-collection references."""
+
+import pytest
+
+from pytest_scenarios.references import dependency_waves, ref, resolve_refs
+from pytest_scenarios.scenario import ScenarioBuilder
+
+
+def test_scenario_without_references_has_no_waves():
+    assert dependency_waves({"customers": [{"name": "Alice"}], "orders": [{}]}) is None
+
+
+def test_dependency_waves_are_topological():
+    scenario = {
+        "orders": [{"customer_id": ref("customers"), "items": [{"id": ref("products")}]}],
+        "payments": [{"order_id": ref("orders")}],
+        "customers": [{}],
+        "products": [{}],
+    }
+
+    assert dependency_waves(scenario) == [["customers", "products"], ["orders"], ["payments"]]
+
+
+def test_reference_to_missing_collection_raises():
+    with pytest.raises(ValueError, match="customers"):
+        dependency_waves({"orders": [{"customer_id": ref("customers")}]})
+
+
+def test_circular_references_raise():
+    with pytest.raises(ValueError, match="Circular"):
+        dependency_waves({"a": [{"b": ref("b")}], "b": [{"a": ref("a")}]})
+    with pytest.raises(ValueError, match="Circular"):
+        dependency_waves({"a": [{}, {"parent": ref("a", 0)}]})
+
+
+def test_resolve_refs_with_dotted_fields():
+    inserted = {"customers": [{"_id": 1, "address": {"city": "Madrid"}, "tags": ["a", "b"]}]}
+    doc = {
+        "customer": ref("customers"),
+        "city": ref("customers", 0, "address.city"),
+        "tags": [ref("customers", 0, "tags.1")],
+    }
+
+    assert resolve_refs(doc, inserted) == {"customer": 1, "city": "Madrid", "tags": ["b"]}
+    with pytest.raises(ValueError, match="out of range"):
+        resolve_refs(ref("customers", 1), inserted)
+    with pytest.raises(ValueError, match="does not exist"):
+        resolve_refs(ref("customers", 0, "email"), inserted)
+
+
+def test_create_resolves_references(scenario_builder: ScenarioBuilder, db):
+    """Placeholders are replaced by values of the inserted documents, template defaults too."""
+    result = scenario_builder.create(
+        {
+            "orders": [
+                {
+                    "id": "order_1",
+                    "customer_id": ref("customers", 1, "customer_id"),
+                    "customer_ref": ref("customers", 1),
+                    "items": [{"product_id": ref("products", 0, "product_id"), "quantity": 1}],
+                }
+            ],
+            "customers": [{"customer_id": "c1"}, {"customer_id": "c2"}],
+            "products": [{}],
+        }
+    )
+
+    order = db["orders"].find_one({"id": "order_1"})
+    product = db["products"].find_one({"_id": result["products"][0]})
+    assert list(result) == ["orders", "customers", "products"]
+    assert order["customer_id"] == "c2"
+    assert order["customer_ref"] == result["customers"][1]
+    assert order["items"] == [{"product_id": product["product_id"], "quantity": 1}]
+
+
+def test_concurrent_create_resolves_references(db, scenario_builder: ScenarioBuilder):
+    builder = ScenarioBuilder(db, scenario_builder.templates, concurrent=True)
+    try:
+        result = builder.create(
+            {
+                "orders": builder.many(3, customer_id=ref("customers", 0, "customer_id")),
+                "customers": [{"customer_id": "c1"}],
+            }
+        )
+    finally:
+        builder.close()
+
+    assert len(result["orders"]) == 3
+    assert db["orders"].count_documents({"customer_id": "c1"}) == 3
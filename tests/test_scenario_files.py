@@ -0,0 +1,184 @@
+"""Tests for scenarios read from JSON and BSON files."""
+
+import datetime
+import os
+from collections import OrderedDict
+
+import bson
+import pytest
+from bson import Decimal128, ObjectId
+
+from pytest_scenarios import scenario_files
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.scenario_files import load_scenario_file
+from pytest_scenarios.tracking import TrackedDatabase
+
+SCENARIOS_DIR = os.path.join(os.path.dirname(__file__), "scenarios")
+
+
+@pytest.fixture(autouse=True)
+def empty_memory_cache(monkeypatch):
+    """Every test starts without parsed files in memory."""
+    monkeypatch.setattr(scenario_files, "_parsed", OrderedDict())
+    monkeypatch.setattr(scenario_files, "_hashes", {})
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Fail the test if a file is parsed instead of being read from a cache."""
+
+    def parse(*args):
+        raise AssertionError("the scenario file was parsed again")
+
+    monkeypatch.setattr(scenario_files, "_parse", parse)
+
+
+def _file_key(path) -> tuple[str, int, int]:
+    stat = os.stat(path)
+    return str(path), stat.st_mtime_ns, stat.st_size
+
+
+def test_load_extended_json():
+    """Extended JSON types are decoded to their BSON types."""
+    scenario = load_scenario_file(os.path.join(SCENARIOS_DIR, "checkout.json"))
+
+    assert scenario["customers"][0]["_id"] == ObjectId("650000000000000000000001")
+    assert scenario["orders"][0]["created_at"] == datetime.datetime(2024, 1, 2, 3, 4, 5)
+    assert scenario["orders"][1]["total"] == Decimal128("19.99")
+
+
+def test_load_concatenated_bson(tmp_path):
+    """The documents of a collection spread over several BSON documents are concatenated."""
+    path = tmp_path / "large.bson"
+    path.write_bytes(
+        bson.encode({"orders": [{"id": 1}], "customers": [{"name": "Alice"}]})
+        + bson.encode({"orders": [{"id": 2}, {"id": 3}]})
+    )
+
+    scenario = load_scenario_file(str(path))
+
+    assert scenario == {
+        "orders": [{"id": 1}, {"id": 2}, {"id": 3}],
+        "customers": [{"name": "Alice"}],
+    }
+
+
+def test_load_empty_files(tmp_path):
+    (tmp_path / "empty.bson").write_bytes(b"")
+    (tmp_path / "empty.json").write_text("")
+
+    assert load_scenario_file(str(tmp_path / "empty.bson")) == {}
+    assert load_scenario_file(str(tmp_path / "empty.json")) == {}
+
+
+def test_repeated_loads_use_memory_cache(tmp_path, request):
+    """A file is parsed once, and every load returns documents of its own."""
+    path = tmp_path / "scenario.json"
+    path.write_text('{"orders": [{"id": "a"}]}')
+    first = load_scenario_file(str(path))
+    first["orders"][0]["id"] = "changed"
+    request.getfixturevalue("no_parsing")
+
+    assert load_scenario_file(str(path)) == {"orders": [{"id": "a"}]}
+
+
+def test_disk_cache_survives_sessions(tmp_path, monkeypatch, request):
+    """Parsed files are found on disk once the memory cache is gone."""
+    path = tmp_path / "scenario.json"
+    path.write_text('{"orders": [{"id": "a"}]}')
+    cache_dir = str(tmp_path / "cache")
+    load_scenario_file(str(path), cache_dir)
+    monkeypatch.setattr(scenario_files, "_parsed", OrderedDict())
+    monkeypatch.setattr(scenario_files, "_hashes", {})
+    request.getfixturevalue("no_parsing")
+
+    assert load_scenario_file(str(path), cache_dir) == {"orders": [{"id": "a"}]}
+
+
+def test_disk_cache_keeps_one_file_per_source(tmp_path, monkeypatch):
+    """A changed file replaces its cache file, the stale scenario is never read back."""
+    path = tmp_path / "scenario.json"
+    cache_dir = tmp_path / "cache"
+    for orders in ('[{"id": "a"}]', '[{"id": "b"}]'):
+        path.write_text(f'{{"orders": {orders}}}')
+        monkeypatch.setattr(scenario_files, "_hashes", {})
+        load_scenario_file(str(path), str(cache_dir))
+    monkeypatch.setattr(scenario_files, "_parsed", OrderedDict())
+    monkeypatch.setattr(scenario_files, "_hashes", {})
+
+    assert len(list(cache_dir.iterdir())) == 1
+    assert load_scenario_file(str(path), str(cache_dir)) == {"orders": [{"id": "b"}]}
+
+
+def test_memory_cache_is_bounded(tmp_path, monkeypatch):
+    """The least recently used scenarios are evicted beyond MAX_CACHED_BYTES."""
+    paths = [tmp_path / f"scenario_{i}.json" for i in range(3)]
+    for i, path in enumerate(paths):
+        path.write_text(f'{{"orders": [{{"id": "{i}", "notes": "{"x" * 100}"}}]}}')
+    load_scenario_file(str(paths[0]))
+    monkeypatch.setattr(
+        scenario_files, "MAX_CACHED_BYTES", 2 * len(scenario_files._parsed.popitem()[1])
+    )
+
+    for path in paths:
+        load_scenario_file(str(path))
+
+    assert len(scenario_files._parsed) == 2
+    assert scenario_files._hashes[_file_key(paths[0])] not in scenario_files._parsed
+
+
+def test_bson_files_are_not_cached(tmp_path):
+    """BSON files are decoded from the mapped file on every load, without a pickled copy."""
+    path = tmp_path / "large.bson"
+    path.write_bytes(bson.encode({"orders": [{"id": 1}]}))
+
+    assert load_scenario_file(str(path), str(tmp_path / "cache")) == {"orders": [{"id": 1}]}
+    assert not scenario_files._parsed
+    assert not (tmp_path / "cache").exists()
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    path = tmp_path / "scenario.json"
+    path.write_text('{"orders": [{"id": "a"}]}')
+    load_scenario_file(str(path))
+    path.write_text('{"orders": [{"id": "b"}, {"id": "c"}]}')
+
+    assert load_scenario_file(str(path)) == {"orders": [{"id": "b"}, {"id": "c"}]}
+
+
+@pytest.mark.parametrize(
+    "name, content, message",
+    [
+        ("scenario.txt", "{}", "Unsupported scenario file"),
+        ("scenario.json", "[]", "must hold a mapping"),
+        ("scenario.json", '{"orders": {"id": 1}}', "must hold a list of documents"),
+        ("scenario.json", '{"orders": [', "Invalid scenario file"),
+    ],
+)
+def test_invalid_files_raise_value_error(tmp_path, name, content, message):
+    path = tmp_path / name
+    path.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        load_scenario_file(str(path))
+
+
+def test_create_from_file_merges_templates(db: TrackedDatabase):
+    """Documents read from files are merged with their templates like any scenario."""
+    builder = ScenarioBuilder(db, {"customers": {"status": "active"}, "orders": {"items": []}})
+
+    inserted = builder.create_from_file(os.path.join(SCENARIOS_DIR, "checkout.json"))
+
+    assert inserted["customers"] == [ObjectId("650000000000000000000001")]
+    assert len(inserted["orders"]) == 2
+    customer = db["customers"].find_one({"customer_id": "customer_file"})
+    assert customer["status"] == "active"
+    assert db["orders"].count_documents({"items": []}) == 2
+
+
+def test_scenario_from_file_fixture(scenario_from_file, db: TrackedDatabase):
+    """The fixture reads files relative to scenarios-path, tests/scenarios by default."""
+    inserted = scenario_from_file("checkout.json")
+
+    assert len(inserted["orders"]) == 2
+    assert db["orders"].find_one({"id": "order_file_2"})["total"] == Decimal128("19.99")
@@ -3,10 +3,15 @@
 from types import SimpleNamespace
 
 import pytest
+from bson import ObjectId
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError
 from syrupy.filters import props
 
+from pytest_scenarios import scenario
 from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.template import MIN_SPLICED_BYTES
+from pytest_scenarios.template_loader import LazyTemplates
 
 
 def test_scenario_fixture_creation(scenario_builder: ScenarioBuilder, db: Database, snapshot_json):
@@ -46,19 +51,29 @@ def test_collections_empty_before_test(db: Database):
         assert count == 0, f"Collection {collection_name} is not empty before test"
 
 
-def test_create_raises_on_partial_insert(db, scenario_builder, monkeypatch):
-    """If insert_many does not return all inserted ids, raise ValueError."""
+def _fake_partial_inserts(monkeypatch, db):
+    """Make every insert of the db backend report fewer documents than were sent."""
 
     def fake_insert_many(self, docs, comment=None, **kwargs):
         # Return a result with fewer inserted ids than docs
-        result = SimpleNamespace()
-        result.inserted_ids = [1]
-        return result
+        return SimpleNamespace(inserted_ids=[1])
 
-    # Patch the insert_many method on the Collection class so any collection instance will use it
-    import pymongo.collection
+    def fake_bulk_write(self, requests, comment=None, **kwargs):
+        return SimpleNamespace(acknowledged=True, inserted_count=1)
 
-    monkeypatch.setattr(pymongo.collection.Collection, "insert_many", fake_insert_many)
+    # Patch the collection class so any collection instance will use them
+    collection_class = type(db.database["customers"])
+    monkeypatch.setattr(collection_class, "insert_many", fake_insert_many)
+    monkeypatch.setattr(collection_class, "bulk_write", fake_bulk_write)
+
+
+@pytest.mark.parametrize("spliced", [False, True], ids=["dicts", "spliced"])
+def test_create_raises_on_partial_insert(db, scenario_builder, monkeypatch, spliced):
+    """If fewer documents than sent are inserted, raise ValueError.
+    Large templates are sent as spliced BSON, small ones as dicts."""
+    if spliced:
+        scenario_builder = ScenarioBuilder(db, {"customers": {"notes": "x" * MIN_SPLICED_BYTES}})
+    _fake_partial_inserts(monkeypatch, db)
 
     scenario = {"customers": [{"name": "a"}, {"name": "b"}]}
 
@@ -153,3 +168,219 @@ class TestScenarioBuilderEdgeCases:
         assert doc["status"] == "inactive"
         # New value should be added
         assert doc["name"] == "item1"
+
+
+class TestConcurrentScenarioBuilder:
+    """Tests for the opt-in concurrent insert mode."""
+
+    @pytest.fixture
+    def concurrent_builder(self, db, scenario_builder):
+        builder = ScenarioBuilder(db, scenario_builder.templates, concurrent=True)
+        yield builder
+        builder.close()
+
+    def test_concurrent_create_returns_ids_in_scenario_order(self, concurrent_builder, db):
+        """Concurrent mode returns the same mapping as sequential mode."""
+        result = concurrent_builder.create(
+            {
+                "orders": [{"id": "order_001"}, {"id": "order_002"}],
+                "customers": [{"name": "Alice"}],
+                "products": [{"name": "Laptop"}],
+            }
+        )
+
+        assert list(result) == ["orders", "customers", "products"]
+        for collection_name, inserted_ids in result.items():
+            assert db[collection_name].count_documents({"_id": {"$in": inserted_ids}}) == len(
+                inserted_ids
+            )
+        # Template values are merged as in sequential mode
+        assert db["customers"].find_one({})["status"] == "active"
+
+    def test_concurrent_create_raises_on_partial_insert(self, concurrent_builder, db, monkeypatch):
+        """The all-or-nothing check still applies to parallel inserts."""
+        _fake_partial_inserts(monkeypatch, db)
+
+        with pytest.raises(ValueError):
+            concurrent_builder.create(
+                {"customers": [{"name": "a"}, {"name": "b"}], "orders": [{"id": "o"}]}
+            )
+
+
+class TestStreamingScenarioBuilder:
+    """Tests for streaming large scenarios in bounded batches."""
+
+    def test_iter_create_streams_generators_in_batches(self, scenario_builder, db):
+        """Documents from a generator are inserted in batches of batch_size."""
+        docs = ({"name": f"customer_{i}"} for i in range(25))
+
+        batches = list(scenario_builder.iter_create({"customers": docs}, batch_size=10))
+
+        assert [(name, len(ids)) for name, ids in batches] == [
+            ("customers", 10),
+            ("customers", 10),
+            ("customers", 5),
+        ]
+        assert db["customers"].count_documents({"status": "active"}) == 25
+
+    def test_iter_create_bounds_batches_by_bytes(self, scenario_builder):
+        """A batch is flushed before it would exceed max_batch_bytes."""
+        docs = [{"name": "x" * 1000} for _ in range(5)]
+
+        batches = list(scenario_builder.iter_create({"customers": docs}, max_batch_bytes=2500))
+
+        assert [len(ids) for _, ids in batches] == [2, 2, 1]
+
+    def test_iter_create_reports_inserted_ids(self, scenario_builder, db):
+        """The yielded ids are the _id of the inserted documents."""
+        [(_, inserted_ids)] = scenario_builder.iter_create(
+            {"orders": [{"id": "order_001"}]}, add_scenario_id=True
+        )
+
+        order = db["orders"].find_one({"_id": inserted_ids[0]})
+        assert order["id"] == "order_001"
+        assert "scenario_id" in order
+
+    def test_iter_create_raises_on_partial_insert(self, scenario_builder, db, monkeypatch):
+        """A batch of which fewer documents than sent are inserted raises ValueError."""
+        _fake_partial_inserts(monkeypatch, db)
+
+        with pytest.raises(ValueError):
+            list(scenario_builder.iter_create({"customers": [{"name": "a"}, {"name": "b"}]}))
+
+    def test_create_streaming_returns_counts(self, scenario_builder, db):
+        """create_streaming reports a count per collection instead of ids."""
+        result = scenario_builder.create_streaming(
+            {
+                "customers": ({"name": f"c{i}"} for i in range(30)),
+                "orders": ({"id": f"o{i}"} for i in range(7)),
+            },
+            batch_size=8,
+            ordered=False,
+        )
+
+        assert result == {"customers": 30, "orders": 7}
+        assert db["customers"].count_documents({}) == 30
+        assert db["orders"].count_documents({}) == 7
+
+
+class TestUnorderedInserts:
+    """Tests for unordered inserts and structured insert errors.
+    Error classes are looked up on the module, which test_module_reload may reload."""
+
+    def test_unordered_create_reports_failed_documents(self, scenario_builder, db):
+        """Every failed document is listed with its collection, index and error code."""
+        duplicate_id = ObjectId()
+
+        with pytest.raises(scenario.ScenarioInsertError) as exc_info:
+            scenario_builder.create(
+                {
+                    "customers": [
+                        {"_id": duplicate_id, "name": "a"},
+                        {"_id": duplicate_id, "name": "b"},
+                        {"name": "c"},
+                    ],
+                    "products": [{"name": "Laptop"}],
+                },
+                ordered=False,
+            )
+
+        [failure] = exc_info.value.failures["customers"]
+        assert failure.index == 1
+        assert failure.code == 11000
+        assert failure.document["name"] == "b"
+        assert "customers[1]" in str(exc_info.value)
+        # Unordered inserts keep going past the failure, and other collections are inserted
+        assert db["customers"].count_documents({}) == 2
+        assert db["products"].count_documents({}) == 1
+
+    def test_unordered_create_merges_failures_of_all_collections(self, scenario_builder):
+        """Failures of several collections are reported in a single error."""
+        customer_id, order_id = ObjectId(), ObjectId()
+
+        with pytest.raises(scenario.ScenarioInsertError) as exc_info:
+            scenario_builder.create(
+                {
+                    "customers": [{"_id": customer_id}, {"_id": customer_id}],
+                    "orders": [{"_id": order_id}, {"_id": order_id}, {"_id": order_id}],
+                },
+                ordered=False,
+            )
+
+        failures = exc_info.value.failures
+        assert [failure.index for failure in failures["customers"]] == [1]
+        assert [failure.index for failure in failures["orders"]] == [1, 2]
+
+    def test_ordered_create_raises_insert_error(self, scenario_builder):
+        """Ordered inserts stop at the first failure, still as a ValueError."""
+        duplicate_id = ObjectId()
+
+        with pytest.raises(ValueError) as exc_info:
+            scenario_builder.create({"customers": [{"_id": duplicate_id}, {"_id": duplicate_id}]})
+
+        assert isinstance(exc_info.value, scenario.ScenarioInsertError)
+        assert exc_info.value.failures["customers"][0].index == 1
+
+    def test_streaming_failures_are_indexed_from_collection_start(self, scenario_builder):
+        """Streaming errors report the position within the collection, not the batch."""
+        duplicate_id = ObjectId()
+        docs = [{"name": "a"}, {"name": "b"}, {"_id": duplicate_id}, {"_id": duplicate_id}]
+
+        with pytest.raises(scenario.ScenarioInsertError) as exc_info:
+            scenario_builder.create_streaming({"customers": docs}, batch_size=2, ordered=False)
+
+        assert [failure.index for failure in exc_info.value.failures["customers"]] == [3]
+
+    def test_insert_error_from_bulk_write_error(self):
+        """Write errors are mapped to the documents that caused them."""
+        docs = [{"name": "a"}, {"name": "b"}]
+        error = BulkWriteError(
+            {"writeErrors": [{"index": 1, "code": 121, "errmsg": "Document failed validation"}]}
+        )
+
+        insert_error = scenario.ScenarioInsertError.from_bulk_write_error(
+            "customers", docs, error, 10
+        )
+
+        assert insert_error.failures == {
+            "customers": [
+                scenario.FailedDocument(
+                    index=11, code=121, message="Document failed validation", document=docs[1]
+                )
+            ]
+        }
+        assert str(insert_error) == (
+            "Failed to insert all documents: customers[11]: Document failed validation"
+        )
+
+
+def test_create_deep_merges_nested_template_fields(scenario_builder, db):
+    """Nested overrides keep the other fields of the template subdocument."""
+    scenario_builder.create(
+        {"products": [{"product_id": "a", "specs": {"ram_gb": 32}}, {"specs.cpu": "M3"}]}
+    )
+
+    first = db["products"].find_one({"product_id": "a"})
+    second = db["products"].find_one({"specs.cpu": "M3"})
+    assert first["specs"] == {"cpu": "Intel Core i7", "ram_gb": 32, "storage_gb": 512}
+    assert second["specs"] == {"cpu": "M3", "ram_gb": 16, "storage_gb": 512}
+
+
+class TestLazyScenarioBuilder:
+    """A lazy builder imports templates and creates collections on first use."""
+
+    def test_lazy_builder_loads_only_used_templates(self, db, tmp_path):
+        (tmp_path / "lazy_users.py").write_text("TEMPLATE = {'status': 'active'}\n")
+        (tmp_path / "lazy_events.py").write_text("TEMPLATE = {'kind': 'click'}\n")
+        templates = LazyTemplates(str(tmp_path))
+        builder = ScenarioBuilder(db.database, templates, lazy=True)
+
+        builder.create({"lazy_users": [{"name": "Alice"}]})
+
+        assert templates.loaded == {"lazy_users"}
+        assert db["lazy_users"].find_one({"name": "Alice"})["status"] == "active"
+        assert "lazy_events" not in db.list_collection_names()
+        assert builder.dirty_collections >= {"lazy_users", "lazy_events"}
+        builder.cleanup_collections()
+        db.drop_collection("lazy_users")
+        builder.close()
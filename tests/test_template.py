@@ -0,0 +1,160 @@
+"""
+Tests for compiled templates and their deep-merge rules.
+"""
+
+import uuid
+
+import bson
+import pytest
+from bson import ObjectId
+from bson.binary import UuidRepresentation
+from bson.codec_options import CodecOptions
+
+from pytest_scenarios.template import MIN_SPLICED_BYTES, CompiledTemplate
+from tests.templates import products
+
+
+def test_merge_without_overrides_returns_template_copy():
+    """Merging nothing yields an equal but independent document."""
+    template = CompiledTemplate(products.TEMPLATE)
+
+    doc = template.merge()
+
+    assert doc == products.TEMPLATE
+    assert doc is not template.template
+
+
+def test_merge_deep_merges_nested_documents():
+    """Overriding one nested key keeps its sibling keys."""
+    template = CompiledTemplate(products.TEMPLATE)
+
+    doc = template.merge({"specs": {"ram_gb": 32}})
+
+    assert doc["specs"] == {"cpu": "Intel Core i7", "ram_gb": 32, "storage_gb": 512}
+    assert products.TEMPLATE["specs"]["ram_gb"] == 16
+
+
+def test_merge_dotted_path_overrides():
+    """Dotted keys override a single nested field, creating missing parents."""
+    template = CompiledTemplate(products.TEMPLATE)
+
+    doc = template.merge({"specs.ram_gb": 64, "shipping.box.weight_kg": 2})
+
+    assert doc["specs"]["ram_gb"] == 64
+    assert doc["specs"]["cpu"] == "Intel Core i7"
+    assert doc["shipping"] == {"box": {"weight_kg": 2}}
+    assert "specs.ram_gb" not in doc
+
+
+def test_merge_replaces_lists_and_scalars():
+    """Values other than dictionaries replace the template value."""
+    template = CompiledTemplate({"items": [1, 2], "specs": {"cpu": "x"}, "price": 1})
+
+    doc = template.merge({"items": [3], "specs": None, "price": 2})
+
+    assert doc == {"items": [3], "specs": None, "price": 2}
+
+
+def test_merge_applies_overrides_in_order():
+    """Later overrides win over earlier ones."""
+    template = CompiledTemplate({"a": 1})
+
+    assert template.merge({"a": 2}, {"a": 3, "b": 4}) == {"a": 3, "b": 4}
+
+
+def test_merge_shares_untouched_subdocuments():
+    """Copy-on-write: only overridden subdocuments are copied."""
+    template = CompiledTemplate({"specs": {"cpu": "x"}, "dims": {"w": 1}})
+
+    first = template.merge({"dims": {"w": 2}})
+    second = template.merge({})
+
+    assert first["specs"] is second["specs"] is template.template["specs"]
+    assert first["dims"] is not template.template["dims"]
+    assert template.template["dims"] == {"w": 1}
+
+
+def test_compiled_template_is_isolated_from_source():
+    """Changing the source template after compiling does not affect merges."""
+    source = {"specs": {"cpu": "x"}}
+    template = CompiledTemplate(source)
+
+    source["specs"]["cpu"] = "y"
+
+    assert template.merge()["specs"] == {"cpu": "x"}
+
+
+# Large enough for encode to splice the cached template fields.
+WIDE_TEMPLATE = {
+    **products.TEMPLATE,
+    "description": "x" * MIN_SPLICED_BYTES,
+    "tags": ["a", "b"],
+}
+
+
+def _decoded(raw) -> list:
+    return list(bson.decode(raw.raw).items())
+
+
+@pytest.mark.parametrize("source", [products.TEMPLATE, WIDE_TEMPLATE], ids=["small", "wide"])
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        (),
+        ({"price": 10},),
+        ({"specs.ram_gb": 64, "shipping.box.weight_kg": 2},),
+        ({"specs": {"cpu": "ARM"}, "tags": None}, {"scenario_id": "s", "price": 3}),
+        ({"_id": "fixed", "name": "Phone"},),
+    ],
+)
+def test_encode_matches_merge(source, overrides):
+    """Encoded documents hold the merged fields in the same order, _id first."""
+    template = CompiledTemplate(source)
+
+    doc_id, raw = template.encode(*overrides)
+
+    expected = {"_id": doc_id, **template.merge(*overrides)}
+    assert _decoded(raw) == list(expected.items())
+
+
+def test_encode_assigns_new_ids():
+    template = CompiledTemplate(WIDE_TEMPLATE)
+
+    first_id, first = template.encode({})
+    second_id, _ = template.encode({})
+
+    assert isinstance(first_id, ObjectId)
+    assert first_id != second_id
+    assert first["_id"] == first_id
+
+
+def test_encode_reuses_template_encoding():
+    """Untouched fields of wide templates are copied from their cached encoding."""
+    template = CompiledTemplate(WIDE_TEMPLATE)
+    template.encode({"price": 1})
+    cached = "c" * MIN_SPLICED_BYTES
+    template._elements["description"] = bson.encode({"description": cached})[4:-1]
+    template._plans.clear()
+
+    _, raw = template.encode({"price": 2})
+
+    assert raw["description"] == cached
+    assert raw["price"] == 2
+
+
+def test_splices_only_large_templates():
+    """Small templates are inserted as merged dicts, only wide ones are spliced."""
+    assert not CompiledTemplate(products.TEMPLATE).splices()
+    assert CompiledTemplate(WIDE_TEMPLATE).splices()
+
+
+def test_encode_uses_codec_options():
+    """Fields are encoded with the options of the target collection."""
+    template = CompiledTemplate({"token": uuid.UUID(int=1), "description": "x" * 1000})
+    options = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+
+    _, raw = template.encode({"other": uuid.UUID(int=2)}, codec_options=options)
+
+    decoded = bson.decode(raw.raw, codec_options=options)
+    assert decoded["token"] == uuid.UUID(int=1)
+    assert decoded["other"] == uuid.UUID(int=2)
@@ -8,7 +8,11 @@ from types import SimpleNamespace
 
 import pytest
 
-from pytest_scenarios.template_loader import load_templates_from_path
+from pytest_scenarios.template_loader import (
+    LazyTemplates,
+    discover_template_files,
+    load_templates_from_path,
+)
 from tests.templates import customers, orders, products
 
 
@@ -137,3 +141,179 @@ class TestTemplateLoaderEdgeCases:
         assert "valid" in templates
         assert "no_template" not in templates
         assert templates["valid"] == {"valid": True}
+
+
+class TestTemplateCache:
+    """Evaluated templates are cached on disk and reused while their module is unchanged."""
+
+    @pytest.fixture
+    def counting_template(self, tmp_path):
+        """A template module that appends to a log file each time it is executed."""
+        templates_dir = tmp_path / "templates"
+        templates_dir.mkdir()
+        log = tmp_path / "exec.log"
+        module = templates_dir / "customers.py"
+        module.write_text(
+            f"with open({str(log)!r}, 'a') as log:\n"
+            "    log.write('x')\n"
+            "TEMPLATE = {'name': 'Alice'}\n"
+        )
+        return templates_dir, module, log
+
+    def test_unchanged_modules_are_not_executed_again(self, tmp_path, counting_template):
+        templates_dir, _, log = counting_template
+        cache_dir = str(tmp_path / "cache")
+
+        first = load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+        second = load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        assert first == second == {"customers": {"name": "Alice"}}
+        assert log.read_text() == "x"
+
+    def test_cached_templates_are_independent_copies(self, tmp_path, counting_template):
+        templates_dir, _, _ = counting_template
+        cache_dir = str(tmp_path / "cache")
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir)["customers"]["x"] = 1
+
+        assert load_templates_from_path(str(templates_dir), cache_dir=cache_dir) == {
+            "customers": {"name": "Alice"}
+        }
+
+    def test_touched_module_with_same_content_is_not_executed(self, tmp_path, counting_template):
+        templates_dir, module, log = counting_template
+        cache_dir = str(tmp_path / "cache")
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        os.utime(module, ns=(0, 0))
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        assert log.read_text() == "x"
+
+    def test_changed_module_is_executed_again(self, tmp_path, counting_template):
+        templates_dir, module, log = counting_template
+        cache_dir = str(tmp_path / "cache")
+        load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        module.write_text(module.read_text().replace("Alice", "Bob"))
+        templates = load_templates_from_path(str(templates_dir), cache_dir=cache_dir)
+
+        assert templates == {"customers": {"name": "Bob"}}
+        assert log.read_text() == "xx"
+
+    def test_unpicklable_templates_are_not_cached(self, tmp_path):
+        (tmp_path / "lazy.py").write_text("TEMPLATE = {'default': lambda: 1}\n")
+        cache_dir = str(tmp_path / "cache")
+
+        templates = load_templates_from_path(str(tmp_path), cache_dir=cache_dir)
+
+        assert templates["lazy"]["default"]() == 1
+        assert load_templates_from_path(str(tmp_path), cache_dir=cache_dir).keys() == {"lazy"}
+
+    def test_corrupted_cache_is_ignored(self, tmp_path, counting_template):
+        templates_dir, _, _ = counting_template
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / "templates.pickle").write_bytes(b"not a pickle")
+
+        templates = load_templates_from_path(str(templates_dir), cache_dir=str(cache_dir))
+
+        assert templates == {"customers": {"name": "Alice"}}
+
+
+class TestLazyTemplates:
+    """Template modules are discovered by filename and imported on first access."""
+
+    @pytest.fixture
+    def templates_dir(self, tmp_path):
+        (tmp_path / "customers.py").write_text("TEMPLATE = {'name': 'Alice'}\n")
+        (tmp_path / "broken.py").write_text("raise RuntimeError('imported')\n")
+        (tmp_path / "no_template.py").write_text("VAR = 123\n")
+        (tmp_path / "__init__.py").write_text("")
+        return tmp_path
+
+    def test_names_are_listed_without_importing(self, templates_dir):
+        templates = LazyTemplates(str(templates_dir))
+
+        assert set(templates) == {"customers", "broken", "no_template"}
+        assert "customers" in templates
+        assert templates.loaded == set()
+
+    def test_modules_are_imported_on_first_access(self, templates_dir):
+        templates = LazyTemplates(str(templates_dir))
+
+        assert templates["customers"] == {"name": "Alice"}
+        assert templates["customers"] is templates["customers"]
+        assert templates.loaded == {"customers"}
+
+    def test_missing_template_raises_key_error(self, templates_dir):
+        templates = LazyTemplates(str(templates_dir))
+
+        assert templates.get("no_template") is None
+        assert templates.get("unknown") is None
+
+    def test_uses_template_cache(self, templates_dir, tmp_path_factory):
+        cache_dir = str(tmp_path_factory.mktemp("cache"))
+        log = tmp_path_factory.mktemp("log") / "exec.log"
+        (templates_dir / "orders.py").write_text(
+            f"with open({str(log)!r}, 'a') as log:\n    log.write('x')\nTEMPLATE = {{'id': 1}}\n"
+        )
+
+        for _ in range(2):
+            assert LazyTemplates(str(templates_dir), cache_dir=cache_dir)["orders"] == {"id": 1}
+
+        assert log.read_text() == "x"
+
+
+class TestRecursiveDiscovery:
+    """Templates can be organized in subdirectories."""
+
+    @pytest.fixture
+    def templates_dir(self, tmp_path):
+        (tmp_path / "customers.py").write_text("TEMPLATE = {'name': 'Alice'}\n")
+        billing = tmp_path / "billing"
+        billing.mkdir()
+        (billing / "__init__.py").write_text("")
+        (billing / "invoices.py").write_text("TEMPLATE = {'total': 10}\n")
+        (billing / "eu").mkdir()
+        (billing / "eu" / "vat.py").write_text("TEMPLATE = {'rate': 0.21}\n")
+        (tmp_path / "__pycache__").mkdir()
+        (tmp_path / "__pycache__" / "stale.py").write_text("TEMPLATE = {}\n")
+        return tmp_path
+
+    def test_subdirectories_are_namespaced_with_dots(self, templates_dir):
+        assert discover_template_files(str(templates_dir)) == {
+            "billing.eu.vat": str(templates_dir / "billing" / "eu" / "vat.py"),
+            "billing.invoices": str(templates_dir / "billing" / "invoices.py"),
+            "customers": str(templates_dir / "customers.py"),
+        }
+
+    def test_load_nested_templates(self, templates_dir):
+        templates = load_templates_from_path(str(templates_dir))
+
+        assert templates == {
+            "billing.eu.vat": {"rate": 0.21},
+            "billing.invoices": {"total": 10},
+            "customers": {"name": "Alice"},
+        }
+
+    def test_parallel_loading_with_timings(self, templates_dir):
+        timings: dict[str, float] = {}
+
+        templates = load_templates_from_path(str(templates_dir), workers=4, timings=timings)
+
+        assert templates == load_templates_from_path(str(templates_dir))
+        assert timings.keys() == templates.keys()
+        assert all(seconds >= 0 for seconds in timings.values())
+
+    def test_lazy_templates_are_namespaced_and_timed(self, templates_dir):
+        templates = LazyTemplates(str(templates_dir))
+
+        assert templates["billing.invoices"] == {"total": 10}
+        assert templates.timings.keys() == {"billing.invoices"}
+
+    def test_dotted_package_name(self):
+        assert load_templates_from_path("tests.templates") == load_templates_from_path(
+            "tests/templates"
+        )
@@ -0,0 +1,216 @@
+"""Tests for dirty-collection tracking and the cleanup it drives."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from pytest_scenarios.memory import MemoryClient
+from pytest_scenarios.scenario import ScenarioBuilder
+from pytest_scenarios.tracking import TrackedCollection, TrackedDatabase
+
+
+def test_collections_are_clean_at_test_start(scenario_builder: ScenarioBuilder):
+    """The autouse cleanup fixture resets dirty tracking before each test."""
+    assert scenario_builder.dirty_collections == set()
+
+
+def test_db_fixture_is_tracked(db: TrackedDatabase):
+    """The db fixture hands out tracked collections."""
+    assert isinstance(db, TrackedDatabase)
+    assert isinstance(db["customers"], TrackedCollection)
+    assert isinstance(db.customers, TrackedCollection)
+    assert isinstance(db.get_collection("customers"), TrackedCollection)
+
+
+def test_reads_do_not_mark_dirty(db: TrackedDatabase):
+    """Only write methods flag a collection as dirty."""
+    db["customers"].find_one({})
+    db["customers"].count_documents({})
+    assert db.dirty_collections == set()
+
+
+def test_writes_through_db_mark_dirty(db: TrackedDatabase):
+    """Writes made by the code under test through the db fixture are recorded."""
+    db["customers"].insert_one({"name": "Alice"})
+    db["orders"].update_many({}, {"$set": {"status": "done"}})
+    assert db.dirty_collections == {"customers", "orders"}
+
+
+def test_writes_through_builder_mark_dirty(scenario_builder: ScenarioBuilder):
+    """Collections populated by create are recorded as dirty."""
+    scenario_builder.create({"customers": [{"name": "Alice"}]})
+    assert scenario_builder.dirty_collections == {"customers"}
+
+
+def test_writes_to_unmanaged_collection_are_cleaned(
+    scenario_builder: ScenarioBuilder, db: TrackedDatabase
+):
+    """Dirty collections without a template are cleaned as well."""
+    db["audit_log"].insert_one({"event": "created"})
+    scenario_builder.cleanup_collections()
+    assert db["audit_log"].count_documents({}) == 0
+    assert scenario_builder.dirty_collections == set()
+
+
+def test_cleanup_skips_untouched_collections(
+    scenario_builder: ScenarioBuilder, db: TrackedDatabase
+):
+    """Data written behind the tracker's back survives a dirty-only cleanup."""
+    db.database["products"].insert_one({"name": "untracked"})
+    scenario_builder.create({"customers": [{"name": "Alice"}]})
+
+    scenario_builder.cleanup_collections()
+
+    assert db["customers"].count_documents({}) == 0
+    assert db["products"].count_documents({}) == 1
+    db.database["products"].delete_many({})
+
+
+def test_paranoid_cleanup_sweeps_all_collections(
+    scenario_builder: ScenarioBuilder, db: TrackedDatabase
+):
+    """Paranoid cleanup clears every template collection, tracked or not."""
+    db.database["products"].insert_one({"name": "untracked"})
+
+    scenario_builder.cleanup_collections(paranoid=True)
+
+    assert db["products"].count_documents({}) == 0
+    assert scenario_builder.dirty_collections == set()
+
+
+def test_new_builder_starts_with_all_collections_dirty(db: TrackedDatabase):
+    """A new builder cannot know what a previous session left behind."""
+    builder = ScenarioBuilder(db.database, {"customers": {}, "orders": {}})
+    assert builder.dirty_collections >= {"customers", "orders"}
+    builder.cleanup_collections()
+    assert builder.dirty_collections == set()
+
+
+def test_bound_session_is_passed_to_collection_methods():
+    """A bound session is injected into session-aware collection methods."""
+    raw_db = MagicMock()
+    tracked = TrackedDatabase(raw_db)
+    session = object()
+
+    tracked.bind_session(session)
+    tracked["customers"].insert_one({"name": "Alice"})
+    tracked["customers"].find_one({}, session="explicit")
+    tracked.bind_session(None)
+    tracked["customers"].count_documents({})
+
+    collection = raw_db.__getitem__.return_value
+    collection.insert_one.assert_called_once_with({"name": "Alice"}, session=session)
+    collection.find_one.assert_called_once_with({}, session="explicit")
+    collection.count_documents.assert_called_once_with({})
+
+
+def test_derived_handles_are_tracked(db: TrackedDatabase):
+    """Handles returned by with_options, database and create_collection report their writes."""
+    db["customers"].with_options().insert_one({"name": "Alice"})
+    db["orders"].database["products"].insert_one({"name": "Laptop"})
+    db.with_options()["invoices"].insert_one({"total": 1})
+    db.create_collection("audit_log", check_exists=False).insert_one({"event": "created"})
+
+    assert db.dirty_collections == {"customers", "products", "invoices", "audit_log"}
+    assert isinstance(db.with_options(), TrackedDatabase)
+
+
+def test_derived_databases_follow_the_bound_session():
+    """Database handles derived from a tracked database use its bound session."""
+    tracked = TrackedDatabase(MemoryClient()["sessions"])
+    derived = tracked.with_options()
+    session = object()
+
+    tracked.bind_session(session)
+
+    assert derived.session is session
+    assert tracked["customers"].database.session is session
+    tracked.bind_session(None)
+    assert derived.session is None
+
+
+def test_rename_marks_target_dirty():
+    raw_db = MagicMock()
+    raw_db.__getitem__.return_value.name = "customers"
+    tracked = TrackedDatabase(raw_db)
+
+    tracked["customers"].rename("clients")
+
+    assert tracked.dirty_collections == {"customers", "clients"}
+
+
+@pytest.mark.parametrize(
+    "stage",
+    [
+        {"$out": "report"},
+        {"$out": {"db": "test_db", "coll": "report"}},
+        {"$merge": "report"},
+        {"$merge": {"into": "report", "on": "_id"}},
+        {"$merge": {"into": {"db": "test_db", "coll": "report"}}},
+    ],
+)
+def test_aggregate_marks_output_collections_dirty(stage):
+    """The $out and $merge targets of a pipeline are written, so they need cleaning."""
+    tracked = TrackedDatabase(MagicMock())
+
+    tracked["orders"].aggregate([{"$match": {}}, stage])
+    tracked.aggregate([{"$documents": [{"a": 1}]}, stage])
+
+    assert tracked.dirty_collections == {"report"}
+
+
+def test_transaction_rolls_back_writes(scenario_builder: ScenarioBuilder, db: TrackedDatabase):
+    """Writes made inside the builder's transaction disappear when it is aborted."""
+    if not scenario_builder.supports_transactions():
+        pytest.skip("transactions need a replica set or sharded cluster")
+
+    with scenario_builder.transaction() as session:
+        scenario_builder.create({"customers": [{"name": "Alice"}]})
+        db["orders"].insert_one({"id": "order_001"})
+        assert db["customers"].count_documents({}) == 1
+        assert db.session is session
+
+    assert db.session is None
+    assert db["customers"].count_documents({}) == 0
+    assert db["orders"].count_documents({}) == 0
+    assert scenario_builder.dirty_collections == set()
+
+
+@pytest.fixture
+def large_collection(db: TrackedDatabase, monkeypatch):
+    """A dirty collection of 20 documents with a unique index, recording drops."""
+    db["bulk_things"].create_index("sku", unique=True)
+    db["bulk_things"].insert_many([{"sku": i} for i in range(20)])
+    dropped = []
+    drop_collection = db.drop_collection
+
+    def recording_drop_collection(name, **kwargs):
+        dropped.append(name)
+        return drop_collection(name, **kwargs)
+
+    monkeypatch.setattr(db, "drop_collection", recording_drop_collection)
+    yield dropped
+    drop_collection("bulk_things")
+
+
+def test_large_collections_are_dropped_and_recreated(db: TrackedDatabase, large_collection):
+    """Collections at the threshold are dropped and recreated with their indexes."""
+    builder = ScenarioBuilder(db, {}, drop_threshold=20)
+
+    builder.cleanup_collections()
+
+    assert large_collection == ["bulk_things"]
+    assert db["bulk_things"].count_documents({}) == 0
+    assert db["bulk_things"].index_information()["sku_1"]["unique"] is True
+    assert "bulk_things" in db.list_collection_names()
+    assert builder.dirty_collections == set()
+
+
+def test_small_collections_are_emptied(db: TrackedDatabase, large_collection):
+    """Below the threshold, or without one, documents are deleted instead."""
+    ScenarioBuilder(db, {}, drop_threshold=21).cleanup_collections()
+    db["bulk_things"].insert_one({"sku": "x"})
+    ScenarioBuilder(db, {}).cleanup_collections()
+
+    assert large_collection == []
+    assert db["bulk_things"].count_documents({}) == 0